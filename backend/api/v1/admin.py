@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, or_
 import logging
 from datetime import datetime
 
@@ -8,7 +8,20 @@ from backend.database.database import get_db
 from backend.database.models import User, Password, UserSettings
 from backend.security.dependencies import get_current_active_user
 from backend.security.utils import get_password_hash
-from backend.api.v1.schemas import AdminUserStats, AdminPasswordStats, AdminUserCreate, AdminUserResponse
+from backend.security.envelope import OWNER_USER, data_keys
+from backend.security.breach import breach_corpus
+from backend.security.health import admin_report, schedule_health_backfill
+from backend.security.policy import password_policy
+from backend.security.revocation import token_revocation
+from backend.security.sessions import session_store
+from backend.api.v1.schemas import (
+    AdminUserStats,
+    AdminPasswordStats,
+    AdminHealthStats,
+    PolicyViolationsResponse,
+    AdminUserCreate,
+    AdminUserResponse,
+)
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 logger = logging.getLogger(__name__)
@@ -71,6 +84,68 @@ async def get_password_stats(
     }
 
 
+@router.get("/stats/health", response_model=AdminHealthStats)
+async def get_health_stats(
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Gibt schwache, mehrfach verwendete und veraltete Passwörter pro Benutzer zurück (ohne Entschlüsselung)."""
+    return admin_report(db)
+
+
+@router.get("/policy-violations", response_model=PolicyViolationsResponse)
+async def get_policy_violations(
+    expired_only: bool = Query(False, description="Nur abgelaufene Passwörter"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Gibt Einträge zurück, die gegen die Passwort-Richtlinien verstoßen oder abgelaufen sind.
+
+    Verwendet das Ergebnis der letzten Prüfung (indizierte Spalten); Einträge
+    werden dafür nicht entschlüsselt.
+    """
+    now = datetime.utcnow()
+    expired = Password.password_expires_at < now
+    condition = expired if expired_only else or_(Password.policy_compliant == False, expired)
+
+    total = db.query(func.count(Password.id)).filter(condition).scalar()
+    rows = db.query(
+        Password.id, Password.title, Password.user_id, User.username,
+        Password.policy_violations, Password.password_expires_at
+    ).join(User, User.id == Password.user_id).filter(condition).order_by(Password.id).offset(offset).limit(limit).all()
+
+    return {
+        "total": total,
+        "policy_version": password_policy.get(db).version,
+        "entries": [{
+            "id": row.id,
+            "title": row.title or "",
+            "user_id": row.user_id,
+            "username": row.username,
+            "violations": row.policy_violations.split(",") if row.policy_violations else [],
+            "expired": row.password_expires_at is not None and row.password_expires_at < now,
+            "password_expires_at": row.password_expires_at,
+        } for row in rows]
+    }
+
+
+@router.post("/breach-scan", status_code=status.HTTP_202_ACCEPTED)
+async def start_breach_scan(
+    admin_user: User = Depends(get_admin_user),
+):
+    """Lädt die Breach-Datenbank neu und prüft alle noch nicht geprüften Einträge im Hintergrund."""
+    if not breach_corpus.load():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Keine Breach-Datenbank installiert"
+        )
+    schedule_health_backfill()
+    logger.info(f"Breach scan started by {admin_user.email}")
+    return {"message": "Prüfung gestartet", "corpus": breach_corpus.stats()}
+
+
 @router.get("/users", response_model=list[AdminUserResponse])
 async def get_all_users(
     admin_user: User = Depends(get_admin_user),
@@ -119,7 +194,11 @@ async def toggle_user_active(
 
     user.is_active = not user.is_active
     user.updated_at = datetime.utcnow()
-    db.commit()
+    if user.is_active:
+        db.commit()
+    else:
+        token_revocation.revoke_user(db, user)
+        session_store.revoke_user(db, user.id)
 
     logger.info(f"Admin {admin_user.email} hat den Status von Benutzer {user.email} auf {user.is_active} geändert")
     return {"id": user.id, "is_active": user.is_active}
@@ -147,7 +226,7 @@ async def toggle_user_admin(
 
     user.is_admin = not user.is_admin
     user.updated_at = datetime.utcnow()
-    db.commit()
+    token_revocation.revoke_user(db, user)
 
     logger.info(f"Admin {admin_user.email} hat den Admin-Status von Benutzer {user.email} auf {user.is_admin} geändert")
     return {"id": user.id, "is_admin": user.is_admin}
@@ -175,6 +254,14 @@ async def create_user(
                 detail="Benutzername wird bereits verwendet"
             )
 
+    policy = password_policy.get(db)
+    violations = policy.violations(user_data.password)
+    if violations:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=policy.message(violations, "The password")
+        )
+
     hashed_password = get_password_hash(user_data.password)
 
     new_user = User(
@@ -230,6 +317,7 @@ async def delete_user(
         )
 
     db.delete(user)
+    data_keys.delete(db, OWNER_USER, user_id)
     db.commit()
 
     logger.info(f"Admin {admin_user.email} hat den Benutzer {user.email} gelöscht")
@@ -4,10 +4,10 @@ from sqlalchemy.orm import Session
 from datetime import timedelta, datetime
 import logging
 from jose import JWTError, jwt
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 from backend.database.database import get_db
-from backend.database.models import User
+from backend.database.models import User, UserSession
 from backend.security.utils import (
     verify_password,
     get_password_hash,
@@ -17,13 +17,77 @@ from backend.security.utils import (
     ALGORITHM
 )
 from backend.security.dependencies import get_current_active_user, get_current_user
-from backend.api.v1.schemas import UserCreate, UserLogin, UserResponse, Token, PasswordReset, PasswordChange
-from backend.security.otp import verify_totp
+from backend.api.v1.schemas import (
+    UserCreate,
+    UserLogin,
+    UserResponse,
+    Token,
+    PasswordReset,
+    PasswordChange,
+    RefreshTokenRequest,
+    SessionResponse,
+)
+from backend.security.otp import verify_totp, decrypt_otp_secret
+from backend.security.admission import login_admission
+from backend.security.breach import breach_corpus
+from backend.security.policy import password_policy
+from backend.security.sessions import session_store
+from backend.security.revocation import token_revocation
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 logger = logging.getLogger(__name__)
 
 
+async def authenticate_user(request: Request, user: Optional[User], identifier: str, password: str,
+                            db: Session) -> bool:
+    """Prüft das Passwort hinter der Login-Zugangskontrolle und ersetzt veraltete Argon2-Hashes."""
+    client_ip = request.client.host if request.client else "unknown"
+    login_admission.check(client_ip, identifier)
+
+    if not user:
+        login_admission.record_failure(identifier)
+        return False
+
+    valid, new_hash = await login_admission.verify(password, user.hashed_password)
+    if not valid:
+        login_admission.record_failure(identifier)
+    elif new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+        logger.info(f"Password hash upgraded for user {user.id}")
+    return valid
+
+
+def issue_tokens(request: Request, user: User, db: Session) -> Dict[str, Any]:
+    """Startet eine neue Sitzung und gibt Access- und Refresh-Token zurück."""
+    session, refresh_token = session_store.create(
+        db,
+        user.id,
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+    )
+    return session_tokens(user, session.id, refresh_token)
+
+
+def session_tokens(user: User, session_id: int, refresh_token: str) -> Dict[str, Any]:
+    access_token = create_access_token(
+        data={"sub": str(user.id), "sid": session_id, "ver": user.token_version or 0},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+def current_session_id(request: Request) -> Optional[int]:
+    """Liest die Sitzungs-ID aus dem Access-Token der Anfrage."""
+    sid = decode_jwt(get_jwt_token_from_request(request)).get("sid")
+    return sid if isinstance(sid, int) else None
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user."""
@@ -41,6 +105,20 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
             detail="Username already taken"
         )
 
+    policy = password_policy.get(db)
+    violations = policy.violations(user_data.password)
+    if violations:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=policy.message(violations, "The password")
+        )
+
+    if breach_corpus.is_breached(user_data.password):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This password appears in a known data breach, please choose a different one"
+        )
+
     hashed_password = get_password_hash(user_data.password)
 
     db_user = User(
@@ -60,6 +138,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 @router.post("/token", response_model=Dict[str, Any])
 async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
@@ -68,7 +147,7 @@ async def login_for_access_token(
         (User.email == form_data.username) | (User.username == form_data.username)
     ).first()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not await authenticate_user(request, user, form_data.username, form_data.password, db):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -87,7 +166,7 @@ async def login_for_access_token(
         if not otp_code:
             temp_token_expires = timedelta(minutes=5)
             temp_token = create_access_token(
-                data={"sub": str(user.id), "temp": True, "requires_2fa": True},
+                data={"sub": str(user.id), "temp": True, "requires_2fa": True, "ver": user.token_version or 0},
                 expires_delta=temp_token_expires
             )
             return {
@@ -96,32 +175,27 @@ async def login_for_access_token(
                 "requires_2fa": True
             }
 
-        if not verify_totp(user.otp_secret, otp_code):
+        if not verify_totp(decrypt_otp_secret(user.otp_secret), otp_code):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Ungültiger 2FA-Code",
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(user.id)},
-        expires_delta=access_token_expires
-    )
-
     logger.info(f"User logged in: {user.email}")
-    return {"access_token": access_token, "token_type": "bearer"}
+    return issue_tokens(request, user, db)
 
 
 @router.post("/login", response_model=Dict[str, Any])
 async def login(
+    request: Request,
     user_data: UserLogin,
     db: Session = Depends(get_db)
 ):
     """Login mit E-Mail und Passwort."""
     user = db.query(User).filter(User.email == user_data.email).first()
 
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    if not await authenticate_user(request, user, user_data.email, user_data.password, db):
         return {
             "success": False,
             "detail": "Incorrect email or password"
@@ -141,23 +215,90 @@ async def login(
         }
 
     if user.otp_enabled and user_data.otp_code:
-        if not verify_totp(user.otp_secret, user_data.otp_code):
+        if not verify_totp(decrypt_otp_secret(user.otp_secret), user_data.otp_code):
             return {
                 "success": False,
                 "detail": "Ungültiger 2FA-Code"
             }
 
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(user.id)},
-        expires_delta=access_token_expires
-    )
+    return {"success": True, **issue_tokens(request, user, db)}
 
-    return {
-        "success": True,
-        "access_token": access_token,
-        "token_type": "bearer"
-    }
+
+@router.post("/refresh", response_model=Dict[str, Any])
+async def refresh_access_token(
+    refresh_data: RefreshTokenRequest,
+    db: Session = Depends(get_db)
+):
+    """Tauscht ein Refresh-Token gegen ein neues Token-Paar, ohne erneute Passwortprüfung."""
+    rotated = session_store.rotate(db, refresh_data.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Ungültiges oder abgelaufenes Refresh-Token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    session_id, user_id, refresh_token = rotated
+    user = db.get(User, user_id)
+    if user is None or not user.is_active:
+        session_store.revoke(db, session_id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Ungültiges oder abgelaufenes Refresh-Token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return session_tokens(user, session_id, refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_200_OK)
+async def logout(
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Beendet die Sitzung des aktuellen Access-Tokens."""
+    payload = decode_jwt(get_jwt_token_from_request(request))
+    token_revocation.revoke_token(db, payload.get("jti"), payload.get("exp"))
+
+    session_id = payload.get("sid")
+    if isinstance(session_id, int):
+        session_store.revoke(db, session_id, user_id=current_user.id)
+    return {"message": "Erfolgreich abgemeldet"}
+
+
+@router.get("/sessions", response_model=List[SessionResponse])
+async def list_sessions(
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Listet die aktiven Sitzungen des Benutzers."""
+    current_id = current_session_id(request)
+    sessions = db.query(UserSession).filter(
+        UserSession.user_id == current_user.id,
+        UserSession.expires_at > datetime.utcnow()
+    ).order_by(UserSession.last_used_at.desc()).all()
+
+    return [
+        SessionResponse.model_validate(session).model_copy(update={"current": session.id == current_id})
+        for session in sessions
+    ]
+
+
+@router.delete("/sessions/{session_id}", status_code=status.HTTP_200_OK)
+async def revoke_session(
+    session_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Widerruft eine Sitzung des Benutzers."""
+    if not session_store.revoke(db, session_id, user_id=current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sitzung nicht gefunden"
+        )
+    return {"message": "Sitzung widerrufen"}
 
 
 @router.post("/reset-password", status_code=status.HTTP_202_ACCEPTED)
@@ -171,6 +312,7 @@ async def request_password_reset(reset_data: PasswordReset, db: Session = Depend
 
 @router.post("/change-password", status_code=status.HTTP_200_OK)
 async def change_password(
+    request: Request,
     password_data: PasswordChange,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -181,29 +323,35 @@ async def change_password(
             detail="Aktuelles Passwort ist nicht korrekt"
         )
 
-    if len(password_data.new_password) < 12:
+    policy = password_policy.get(db)
+    violations = policy.violations(password_data.new_password)
+    if violations:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="The new password must be at least 12 characters long"
+            detail=policy.message(violations)
         )
 
-    has_lowercase = any(c.islower() for c in password_data.new_password)
-    has_uppercase = any(c.isupper() for c in password_data.new_password)
-    has_digit = any(c.isdigit() for c in password_data.new_password)
-    has_special = any(not c.isalnum() for c in password_data.new_password)
-
-    if not (has_lowercase and has_uppercase and has_digit and has_special):
+    if breach_corpus.is_breached(password_data.new_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="The new password must contain at least one lowercase letter, one uppercase letter, one digit, and one special character"
+            detail="The new password appears in a known data breach, please choose a different one"
         )
 
     current_user.hashed_password = get_password_hash(password_data.new_password)
     current_user.updated_at = datetime.utcnow()
-    db.commit()
+    token_revocation.revoke_user(db, current_user)
+
+    # All access tokens are now invalid; only the current session survives and
+    # gets a fresh access token so the client stays logged in.
+    session_id = current_session_id(request)
+    session_store.revoke_user(db, current_user.id, except_session_id=session_id)
+    access_token = create_access_token(
+        data={"sub": str(current_user.id), "sid": session_id, "ver": current_user.token_version},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
 
     logger.info(f"Password changed for user: {current_user.email}")
-    return {"message": "Password changed successfully"}
+    return {"message": "Password changed successfully", "access_token": access_token, "token_type": "bearer"}
 
 
 @router.get("/me", response_model=UserResponse)
@@ -4,18 +4,15 @@ import os
 import shutil
 import datetime
 import sqlite3
-from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 from backend.database.database import get_db
 from backend.api.v1.admin import get_admin_user
 from backend.database.models import User
+from backend.scheduler import scheduler
 
 router = APIRouter(prefix="/backup", tags=["backup"])
 
-scheduler = BackgroundScheduler()
-scheduler.start()
-
 backup_job = None
 backup_interval = None
 is_backup_scheduled = False
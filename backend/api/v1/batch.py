@@ -0,0 +1,165 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
+from typing import List
+import asyncio
+import json
+import logging
+
+from backend.database.database import get_db, shared_session
+from backend.database.models import User
+from backend.security.dependencies import get_current_active_user, oauth2_scheme, shared_principal
+from backend.api.v1.schemas import BatchRequest, BatchResponse, BatchSubRequest
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_REQUESTS = 20
+API_PREFIX = "/api/v1/"
+ALLOWED_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
+
+
+def check_sub_request(sub_request: BatchSubRequest) -> None:
+    method = sub_request.method.upper()
+    path = sub_request.path.split("?", 1)[0]
+
+    if method not in ALLOWED_METHODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Methode '{sub_request.method}' wird nicht unterstützt"
+        )
+    if not path.startswith(API_PREFIX) or path.rstrip("/") == f"{API_PREFIX}batch":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Ungültiger Pfad: {sub_request.path}"
+        )
+
+
+async def dispatch(request: Request, sub_request: BatchSubRequest) -> dict:
+    """Führt eine Teilanfrage direkt über die ASGI-Anwendung aus."""
+    path, _, query = sub_request.path.partition("?")
+    body = b"" if sub_request.body is None else json.dumps(sub_request.body).encode("utf-8")
+
+    headers = [(b"authorization", request.headers["authorization"].encode("latin-1"))]
+    if sub_request.body is not None:
+        headers.append((b"content-type", b"application/json"))
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+    if "accept-language" in request.headers:
+        headers.append((b"accept-language", request.headers["accept-language"].encode("latin-1")))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": sub_request.method.upper(),
+        "scheme": request.url.scheme,
+        "path": path,
+        "raw_path": path.encode("utf-8"),
+        "query_string": query.encode("utf-8"),
+        "root_path": "",
+        "headers": headers,
+        "client": request.scope.get("client"),
+        "server": request.scope.get("server"),
+    }
+
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()
+
+    response = {"status": 500, "headers": [], "body": []}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception as e:
+        logger.error(f"Fehler in Batch-Teilanfrage {sub_request.method} {path}: {str(e)}")
+        return {"id": sub_request.id, "status": 500, "body": {"detail": "Interner Serverfehler"}}
+
+    raw_body = b"".join(response["body"])
+    content_type = dict(response["headers"]).get(b"content-type", b"").decode("latin-1")
+
+    if not raw_body:
+        parsed_body = None
+    elif content_type.startswith("application/json"):
+        parsed_body = json.loads(raw_body)
+    else:
+        parsed_body = raw_body.decode("utf-8", errors="replace")
+
+    return {"id": sub_request.id, "status": response["status"], "body": parsed_body}
+
+
+def discard_changes(db: Session) -> None:
+    """Verwirft den Zustand einer fehlgeschlagenen Teilanfrage in der gemeinsamen Sitzung.
+
+    Die Handler speichern selbst mit commit(); was danach noch offen ist,
+    stammt aus der fehlgeschlagenen Anfrage. Das Rollback setzt auch eine
+    nach einem Fehler unbrauchbare Sitzung zurück und verwirft geladene
+    Objekte, die sie verändert hat.
+    """
+    db.rollback()
+
+
+async def run_reads(request: Request, db: Session, sub_requests: List[BatchSubRequest]) -> List[dict]:
+    responses = await asyncio.gather(*[dispatch(request, r) for r in sub_requests])
+    # Erst nach der ganzen Gruppe, um laufende Leseanfragen nicht zu stören.
+    if any(response["status"] >= 400 for response in responses):
+        discard_changes(db)
+    return responses
+
+
+@router.post("", response_model=BatchResponse)
+async def execute_batch(
+    request: Request,
+    batch: BatchRequest,
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Führt mehrere API-Anfragen mit einer Anmeldung und einer Datenbanksitzung aus.
+
+    Aufeinanderfolgende GET-Anfragen werden gemeinsam gestartet, wechseln sich
+    aber nur an Await-Punkten der Ereignisschleife ab: die Handler greifen
+    blockierend auf die Datenbank zu. Schreibende Anfragen werden in der
+    angegebenen Reihenfolge nacheinander ausgeführt. Nach einer
+    fehlgeschlagenen Teilanfrage werden ihre nicht gespeicherten Änderungen
+    verworfen, damit spätere Teilanfragen sie nicht mit speichern.
+    """
+    if len(batch.requests) > MAX_BATCH_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Maximal {MAX_BATCH_REQUESTS} Anfragen pro Batch erlaubt"
+        )
+
+    for sub_request in batch.requests:
+        check_sub_request(sub_request)
+
+    responses: List[dict] = []
+    with shared_session(db), shared_principal(token, current_user):
+        pending_reads = []
+        for sub_request in batch.requests:
+            if sub_request.method.upper() == "GET":
+                pending_reads.append(sub_request)
+                continue
+
+            if pending_reads:
+                responses.extend(await run_reads(request, db, pending_reads))
+                pending_reads = []
+            response = await dispatch(request, sub_request)
+            if response["status"] >= 400:
+                discard_changes(db)
+            responses.append(response)
+
+        if pending_reads:
+            responses.extend(await run_reads(request, db, pending_reads))
+
+    return {"responses": responses}
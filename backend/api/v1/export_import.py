@@ -10,11 +10,23 @@ from typing import List
 from backend.database.database import get_db
 from backend.database.models import User, Password
 from backend.security.dependencies import get_current_active_user
-from backend.security.utils import encrypt_password, decrypt_password
+from backend.security.envelope import data_keys
+from backend.security.blind_index import blind_index, open_metadata, seal_metadata
+from backend.security.health import health_columns
 from backend.api.v1.schemas import PasswordCreate
 
 router = APIRouter(prefix="/export-import", tags=["export-import"])
 
+
+def _same_username(user_id: int, username):
+    """Matches plain and (with ENCRYPT_METADATA) encrypted usernames via the blind index."""
+    condition = Password.username == username
+    index = blind_index(user_id, "username", username)
+    if index is not None:
+        condition = condition | (Password.username_bidx == index)
+    return condition
+
+
 @router.get("/export/{format}")
 async def export_passwords(
     format: str,
@@ -28,21 +40,23 @@ async def export_passwords(
         )
 
     passwords = db.query(Password).filter(Password.user_id == current_user.id).all()
+    cipher = data_keys.user(db, current_user.id)
 
     if format == "json":
         export_data = []
         for password in passwords:
-            decrypted_password = decrypt_password(password.encrypted_password)
+            decrypted_password = cipher.decrypt(password.encrypted_password)
+            metadata = open_metadata(cipher, password)
             export_data.append({
                 "title": password.title,
-                "username": password.username,
-                "email": password.email,
+                "username": metadata["username"],
+                "email": metadata["email"],
                 "password": decrypted_password,
-                "website": password.website,
+                "website": metadata["website"],
                 "category": password.category,
                 "notes": password.notes,
                 "favorite": password.favorite,
-                "totp_secret": decrypt_password(password.totp_secret) if password.totp_secret else None,
+                "totp_secret": cipher.decrypt(password.totp_secret) if password.totp_secret else None,
                 "totp_enabled": password.totp_enabled
             })
 
@@ -66,15 +80,16 @@ async def export_passwords(
         ])
 
         for password in passwords:
-            decrypted_password = decrypt_password(password.encrypted_password)
-            totp_secret = decrypt_password(password.totp_secret) if password.totp_secret else ""
+            decrypted_password = cipher.decrypt(password.encrypted_password)
+            totp_secret = cipher.decrypt(password.totp_secret) if password.totp_secret else ""
+            metadata = open_metadata(cipher, password)
 
             writer.writerow([
                 password.title,
-                password.username or "",
-                password.email or "",
+                metadata["username"] or "",
+                metadata["email"] or "",
                 decrypted_password,
-                password.website or "",
+                metadata["website"] or "",
                 password.category,
                 password.notes or "",
                 "Ja" if password.favorite else "Nein",
@@ -107,6 +122,7 @@ async def import_passwords(
     content = await file.read()
 
     try:
+        cipher = data_keys.user(db, current_user.id)
         imported_count = 0
         skipped_count = 0
 
@@ -117,22 +133,26 @@ async def import_passwords(
                 existing = db.query(Password).filter(
                     Password.user_id == current_user.id,
                     Password.title == item.get("title"),
-                    Password.username == item.get("username")
+                    _same_username(current_user.id, item.get("username"))
                 ).first()
 
                 if existing:
                     skipped_count += 1
                     continue
 
-                encrypted_password = encrypt_password(item.get("password", ""))
-                encrypted_totp = encrypt_password(item.get("totp_secret", "")) if item.get("totp_secret") else None
+                encrypted_password = cipher.encrypt(item.get("password", ""))
+                encrypted_totp = cipher.encrypt(item.get("totp_secret", "")) if item.get("totp_secret") else None
 
                 new_password = Password(
                     title=item.get("title"),
-                    username=item.get("username"),
-                    email=item.get("email"),
-                    website=item.get("website"),
+                    **seal_metadata(
+                        cipher, current_user.id,
+                        username=item.get("username"),
+                        email=item.get("email"),
+                        website=item.get("website")
+                    ),
                     encrypted_password=encrypted_password,
+                    **health_columns(current_user.id, item.get("password", "")),
                     category=item.get("category", "Importiert"),
                     notes=item.get("notes"),
                     favorite=item.get("favorite", False),
@@ -152,22 +172,26 @@ async def import_passwords(
                 existing = db.query(Password).filter(
                     Password.user_id == current_user.id,
                     Password.title == row.get("Titel"),
-                    Password.username == row.get("Benutzername")
+                    _same_username(current_user.id, row.get("Benutzername"))
                 ).first()
 
                 if existing:
                     skipped_count += 1
                     continue
 
-                encrypted_password = encrypt_password(row.get("Passwort", ""))
-                encrypted_totp = encrypt_password(row.get("TOTP Secret", "")) if row.get("TOTP Secret") else None
+                encrypted_password = cipher.encrypt(row.get("Passwort", ""))
+                encrypted_totp = cipher.encrypt(row.get("TOTP Secret", "")) if row.get("TOTP Secret") else None
 
                 new_password = Password(
                     title=row.get("Titel"),
-                    username=row.get("Benutzername"),
-                    email=row.get("E-Mail"),
-                    website=row.get("Webseite"),
+                    **seal_metadata(
+                        cipher, current_user.id,
+                        username=row.get("Benutzername"),
+                        email=row.get("E-Mail"),
+                        website=row.get("Webseite")
+                    ),
                     encrypted_password=encrypted_password,
+                    **health_columns(current_user.id, row.get("Passwort", "")),
                     category=row.get("Kategorie", "Importiert"),
                     notes=row.get("Notizen"),
                     favorite=row.get("Favorit") == "Ja",
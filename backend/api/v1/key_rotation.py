@@ -0,0 +1,98 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from backend.database.database import get_db
+from backend.database.models import KeyRotationJob, User
+from backend.security.dependencies import get_admin_user
+from backend.security.key_rotation import key_rotation
+from backend.security.utils import KEY_IDS
+from backend.api.v1.schemas import KeyRotationJobResponse, KeyRotationStart, KeyRotationStatus
+
+router = APIRouter(prefix="/system/key-rotation", tags=["system"])
+
+
+def job_to_dict(job: KeyRotationJob) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "target_key_id": job.target_key_id,
+        "current_target": job.current_target,
+        "last_id": job.last_id,
+        "total": job.total,
+        "processed": job.processed,
+        "rotated": job.rotated,
+        "failed": job.failed,
+        "progress": round(min(job.processed / job.total, 1.0) * 100, 1) if job.total else 100.0,
+        "batch_size": job.batch_size,
+        "throttle_ms": job.throttle_ms,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "finished_at": job.finished_at,
+    }
+
+
+@router.get("", response_model=KeyRotationStatus)
+async def get_key_rotation_status(
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Gibt den Schlüsselbund und den Fortschritt der letzten Neuverschlüsselung zurück."""
+    job = key_rotation.latest_job(db)
+    return {
+        "primary_key_id": KEY_IDS[0],
+        "key_ids": KEY_IDS,
+        "job": job_to_dict(job) if job else None,
+    }
+
+
+@router.post("", response_model=KeyRotationJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def start_key_rotation(
+    job_data: KeyRotationStart,
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Startet die Neuverschlüsselung aller Geheimnisse mit dem primären Schlüssel (nur Admin)."""
+    if key_rotation.active_job(db) is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Es läuft bereits eine Neuverschlüsselung"
+        )
+
+    job = key_rotation.start(db, job_data.batch_size, job_data.throttle_ms, admin_user.id)
+    return job_to_dict(job)
+
+
+@router.post("/resume", response_model=KeyRotationJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def resume_key_rotation(
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Setzt eine pausierte Neuverschlüsselung an der letzten Position fort."""
+    job = key_rotation.latest_job(db)
+    if job is None or job.status not in ("paused", "failed"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Keine pausierte Neuverschlüsselung gefunden"
+        )
+
+    job.status = "running"
+    job.error = None
+    db.commit()
+    key_rotation.schedule(job.id)
+    return job_to_dict(job)
+
+
+@router.delete("", response_model=KeyRotationJobResponse)
+async def pause_key_rotation(
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Pausiert die laufende Neuverschlüsselung nach dem aktuellen Batch."""
+    job = key_rotation.pause(db)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Keine laufende Neuverschlüsselung"
+        )
+    return job_to_dict(job)
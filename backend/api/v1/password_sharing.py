@@ -1,24 +1,48 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import and_, case, delete, func, insert, or_, update
 from sqlalchemy.orm import Session
+from cryptography.fernet import InvalidToken
 from datetime import datetime, timedelta
-import secrets
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import logging
 import os
-from pydantic import BaseModel
-from typing import List
+import secrets
+from pydantic import BaseModel, Field
+from typing import List, Sequence, Tuple
 
-from backend.database.database import get_db
+from backend.database.database import SessionLocal, get_db
 from backend.database.models import User, Password, SharedPasswordInvite
 from backend.security.dependencies import get_current_active_user
+from backend.security.envelope import data_keys
+from backend.security.blind_index import open_metadata, seal_metadata
+from backend.security.health import health_columns
+from backend.mail.outbox import enqueue_emails
+from backend.scheduler import scheduler
 
 router = APIRouter(prefix="/password-sharing", tags=["password sharing"])
 
+logger = logging.getLogger(__name__)
+
+INVITE_VALIDITY = timedelta(days=7)
+# Invites per bulk request (passwords x recipients).
+MAX_BULK_INVITES = int(os.environ.get("MAX_BULK_INVITES", "500"))
+INVITE_SWEEP_INTERVAL_MINUTES = int(os.environ.get("INVITE_SWEEP_INTERVAL_MINUTES", "60"))
+# Expired and rejected invites are deleted after this many days; accepted ones are kept for the statistics.
+INVITE_RETENTION_DAYS = int(os.environ.get("INVITE_RETENTION_DAYS", "30"))
+INVITE_SWEEP_BATCH = 500
+
 class SharePasswordRequest(BaseModel):
     password_id: int
     recipient_email: str
 
+class BulkShareRequest(BaseModel):
+    password_ids: List[int] = Field(..., min_length=1)
+    recipient_emails: List[str] = Field(..., min_length=1)
+
+class BulkShareResponse(BaseModel):
+    created: int
+    skipped: int
+    emails: int
+
 class PendingShareResponse(BaseModel):
     id: int
     password_title: str
@@ -26,22 +50,19 @@ class PendingShareResponse(BaseModel):
     created_at: datetime
     invite_token: str
 
-def send_share_email(recipient_email: str, sender_email: str, password_title: str, invite_token: str):
-    """Sendet die E-Mail für geteilte Passwörter"""
-    smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-    smtp_port = int(os.getenv("SMTP_PORT", "587"))
-    smtp_username = os.getenv("SMTP_USERNAME")
-    smtp_password = os.getenv("SMTP_PASSWORD")
-
-    if not smtp_username or not smtp_password:
-        print("E-Mail-Konfiguration fehlt - E-Mail wird nicht gesendet")
-        return
-
-    subject = f"Passwort-Freigabe: {password_title}"
+def share_email(sender_email: str, password_titles: Sequence[str]) -> Tuple[str, str]:
+    """Betreff und Text der Benachrichtigung über ein oder mehrere geteilte Passwörter."""
+    if len(password_titles) == 1:
+        subject = f"Passwort-Freigabe: {password_titles[0]}"
+        shared = f'ein Passwort mit Ihnen geteilt: "{password_titles[0]}"'
+    else:
+        subject = f"Passwort-Freigabe: {len(password_titles)} Passwörter"
+        titles = "\n".join(f'    - "{title}"' for title in password_titles)
+        shared = f"{len(password_titles)} Passwörter mit Ihnen geteilt:\n\n{titles}"
     body = f"""
     Hallo,
 
-    {sender_email} hat ein Passwort mit Ihnen geteilt: "{password_title}"
+    {sender_email} hat {shared}
 
     Um das geteilte Passwort zu akzeptieren, melden Sie sich bitte in Ihrem Authron-Konto an.
 
@@ -52,23 +73,12 @@ def send_share_email(recipient_email: str, sender_email: str, password_title: st
     Mit freundlichen Grüßen,
     Ihr Authron-Team
     """
+    return subject, body
 
-    try:
-        msg = MIMEMultipart()
-        msg['From'] = smtp_username
-        msg['To'] = recipient_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
-
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(smtp_username, smtp_password)
-        server.send_message(msg)
-        server.quit()
-
-        print(f"E-Mail erfolgreich an {recipient_email} gesendet")
-    except Exception as e:
-        print(f"Fehler beim Senden der E-Mail: {str(e)}")
+def queue_share_email(db: Session, recipient_email: str, sender_email: str, password_title: str):
+    """Legt die E-Mail für geteilte Passwörter im Postausgang ab (Versand im Hintergrund)."""
+    subject, body = share_email(sender_email, [password_title])
+    enqueue_emails(db, [(recipient_email, subject, body)])
 
 @router.post("/share")
 async def share_password(
@@ -95,16 +105,87 @@ async def share_password(
         sender_id=current_user.id,
         recipient_email=request.recipient_email,
         invite_token=invite_token,
-        expires_at=datetime.utcnow() + timedelta(days=7)
+        expires_at=datetime.utcnow() + INVITE_VALIDITY
     )
 
     db.add(invite)
+    # Einladung und E-Mail werden gemeinsam gespeichert: keine E-Mail ohne Einladung und umgekehrt.
+    queue_share_email(db, request.recipient_email, current_user.email, password.title)
     db.commit()
 
-    send_share_email(request.recipient_email, current_user.email, password.title, invite_token)
-
     return {"message": "Passwort erfolgreich geteilt"}
 
+@router.post("/share/bulk", response_model=BulkShareResponse)
+async def share_passwords_bulk(
+    request: BulkShareRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Teilt mehrere Passwörter mit mehreren Empfängern; eine E-Mail pro Empfänger"""
+    password_ids = list(dict.fromkeys(request.password_ids))
+    recipients = list(dict.fromkeys(email.strip() for email in request.recipient_emails if email.strip()))
+    if not recipients:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Keine Empfänger angegeben"
+        )
+    if len(password_ids) * len(recipients) > MAX_BULK_INVITES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Höchstens {MAX_BULK_INVITES} Freigaben pro Anfrage"
+        )
+
+    titles = dict(db.query(Password.id, Password.title).filter(
+        Password.id.in_(password_ids),
+        Password.user_id == current_user.id
+    ).all())
+    if len(titles) != len(password_ids):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Passwort nicht gefunden"
+        )
+
+    # Noch offene Einladungen werden nicht erneut verschickt.
+    now = datetime.utcnow()
+    existing = set(db.query(SharedPasswordInvite.password_id, SharedPasswordInvite.recipient_email).filter(
+        SharedPasswordInvite.password_id.in_(password_ids),
+        SharedPasswordInvite.recipient_email.in_(recipients),
+        SharedPasswordInvite.status == "pending",
+        SharedPasswordInvite.expires_at > now
+    ).all())
+
+    invites = []
+    shared_titles = {}
+    for recipient in recipients:
+        for password_id in password_ids:
+            if (password_id, recipient) in existing:
+                continue
+            invites.append({
+                "password_id": password_id,
+                "sender_id": current_user.id,
+                "recipient_email": recipient,
+                "invite_token": secrets.token_urlsafe(32),
+                "status": "pending",
+                "expires_at": now + INVITE_VALIDITY,
+                "created_at": now,
+            })
+            shared_titles.setdefault(recipient, []).append(titles[password_id])
+
+    emails = 0
+    if invites:
+        db.execute(insert(SharedPasswordInvite), invites)
+        emails = enqueue_emails(db, (
+            (recipient, *share_email(current_user.email, recipient_titles))
+            for recipient, recipient_titles in shared_titles.items()
+        ))
+        db.commit()
+
+    return BulkShareResponse(
+        created=len(invites),
+        skipped=len(password_ids) * len(recipients) - len(invites),
+        emails=emails
+    )
+
 @router.get("/pending", response_model=List[PendingShareResponse])
 async def get_pending_shares(
     current_user: User = Depends(get_current_active_user),
@@ -142,7 +223,7 @@ async def accept_share(
     invite = db.query(SharedPasswordInvite).filter(
         SharedPasswordInvite.invite_token == invite_token,
         SharedPasswordInvite.recipient_email == current_user.email,
-        SharedPasswordInvite.status == "pending"
+        SharedPasswordInvite.status.in_(("pending", "expired"))
     ).first()
 
     if not invite:
@@ -151,7 +232,7 @@ async def accept_share(
             detail="Einladung nicht gefunden"
         )
 
-    if invite.expires_at < datetime.utcnow():
+    if invite.status == "expired" or invite.expires_at < datetime.utcnow():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Diese Einladung ist abgelaufen"
@@ -159,12 +240,22 @@ async def accept_share(
 
     original_password = invite.password
 
+    # Die Kopie gehört dem Empfänger und wird daher mit dessen Datenschlüssel verschlüsselt.
+    sender_cipher = data_keys.user(db, original_password.user_id)
+    recipient_cipher = data_keys.user(db, current_user.id)
+    try:
+        plaintext = sender_cipher.decrypt_strict(original_password.encrypted_password)
+    except InvalidToken:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Passwort kann nicht entschlüsselt werden"
+        )
+
     new_password = Password(
         title=f"{original_password.title} (geteilt von {invite.sender.email})",
-        username=original_password.username,
-        email=original_password.email,
-        website=original_password.website,
-        encrypted_password=original_password.encrypted_password,
+        **seal_metadata(recipient_cipher, current_user.id, **open_metadata(sender_cipher, original_password)),
+        encrypted_password=recipient_cipher.encrypt(plaintext),
+        **health_columns(current_user.id, plaintext),
         category="Geteilt",
         notes=f"Geteilt von {invite.sender.email} am {datetime.utcnow().strftime('%d.%m.%Y')}",
         user_id=current_user.id
@@ -206,23 +297,72 @@ async def get_sharing_stats(
     db: Session = Depends(get_db)
 ):
     """Gibt Statistiken über geteilte Passwörter zurück"""
-    sent_count = db.query(SharedPasswordInvite).filter(
-        SharedPasswordInvite.sender_id == current_user.id
-    ).count()
-
-    received_count = db.query(SharedPasswordInvite).filter(
-        SharedPasswordInvite.recipient_email == current_user.email,
-        SharedPasswordInvite.status == "accepted"
-    ).count()
-
-    pending_count = db.query(SharedPasswordInvite).filter(
-        SharedPasswordInvite.recipient_email == current_user.email,
-        SharedPasswordInvite.status == "pending",
-        SharedPasswordInvite.expires_at > datetime.utcnow()
-    ).count()
+    sent = SharedPasswordInvite.sender_id == current_user.id
+    received = SharedPasswordInvite.recipient_email == current_user.email
+    sent_count, received_count, pending_count = db.query(
+        func.coalesce(func.sum(case((sent, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((and_(received, SharedPasswordInvite.status == "accepted"), 1), else_=0)), 0),
+        func.coalesce(func.sum(case((and_(
+            received,
+            SharedPasswordInvite.status == "pending",
+            SharedPasswordInvite.expires_at > datetime.utcnow()
+        ), 1), else_=0)), 0)
+    ).filter(or_(sent, received)).one()
 
     return {
         "sent": sent_count,
         "received": received_count,
         "pending": pending_count
     }
+
+
+def sweep_invites(batch_size: int = INVITE_SWEEP_BATCH) -> Tuple[int, int]:
+    """Marks overdue invites as expired and deletes old expired/rejected ones, in batches.
+
+    Returns the number of expired and deleted invites. Each batch is its own
+    transaction, so the sweep never holds long write locks; accepting an
+    invite while it is being expired fails with "Diese Einladung ist
+    abgelaufen" either way.
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(days=INVITE_RETENTION_DAYS)
+    expired = deleted = 0
+    with SessionLocal() as db:
+        while True:
+            ids = [invite_id for (invite_id,) in db.query(SharedPasswordInvite.id).filter(
+                SharedPasswordInvite.status == "pending",
+                SharedPasswordInvite.expires_at <= now
+            ).limit(batch_size)]
+            if not ids:
+                break
+            db.execute(update(SharedPasswordInvite).where(
+                SharedPasswordInvite.id.in_(ids),
+                SharedPasswordInvite.status == "pending"
+            ).values(status="expired"))
+            db.commit()
+            expired += len(ids)
+
+        while True:
+            ids = [invite_id for (invite_id,) in db.query(SharedPasswordInvite.id).filter(or_(
+                and_(SharedPasswordInvite.status == "expired", SharedPasswordInvite.expires_at < cutoff),
+                and_(SharedPasswordInvite.status == "rejected", SharedPasswordInvite.created_at < cutoff)
+            )).limit(batch_size)]
+            if not ids:
+                break
+            db.execute(delete(SharedPasswordInvite).where(SharedPasswordInvite.id.in_(ids)))
+            db.commit()
+            deleted += len(ids)
+
+    if expired or deleted:
+        logger.info(f"Invite sweep: {expired} expired, {deleted} deleted")
+    return expired, deleted
+
+
+def schedule_invite_sweeper() -> None:
+    scheduler.add_job(
+        sweep_invites,
+        "interval",
+        minutes=INVITE_SWEEP_INTERVAL_MINUTES,
+        id="invite_sweeper",
+        replace_existing=True,
+    )
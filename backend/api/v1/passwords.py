@@ -1,18 +1,109 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
+from sqlalchemy import or_, update
+from cryptography.fernet import InvalidToken
 from typing import List, Optional
 import logging
 from datetime import datetime
 
 from backend.database.database import get_db
-from backend.database.models import Password, User
+from backend.database.models import Password, SharedPassword, Team, TeamMember, User
 from backend.security.dependencies import get_current_active_user
-from backend.security.utils import encrypt_password, decrypt_password
-from backend.api.v1.schemas import PasswordCreate, PasswordResponse, PasswordWithSecret, PasswordFavoriteUpdate
+from backend.security.envelope import data_keys
+from backend.security.blind_index import (
+    ENCRYPT_METADATA,
+    METADATA_FIELDS,
+    blind_index,
+    open_metadata,
+    seal_metadata,
+    site_columns,
+)
+from backend.security.crypto_pool import decrypt_many
+from backend.security.health import apply_health, health_columns, user_report
+from backend.api.v1.schemas import (
+    PasswordCreate,
+    PasswordResponse,
+    PasswordWithSecret,
+    PasswordFavoriteUpdate,
+    BulkOperationRequest,
+    BulkOperationResponse,
+    DecryptBatchRequest,
+    PasswordDecryptBatchResponse,
+    PasswordMatchResponse,
+    PasswordHealthReport,
+)
 
 router = APIRouter(prefix="/passwords", tags=["passwords"])
 logger = logging.getLogger(__name__)
 
+MAX_BULK_ITEMS = 1000
+MAX_DECRYPT_BATCH = 100
+MAX_MATCHES = 100
+
+
+def check_decrypt_batch(request: DecryptBatchRequest) -> list:
+    """Gibt die angefragten IDs ohne Duplikate zurück."""
+    requested_ids = list(dict.fromkeys(request.ids))
+    if len(requested_ids) > MAX_DECRYPT_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Maximal {MAX_DECRYPT_BATCH} Einträge pro Anfrage erlaubt"
+        )
+    return requested_ids
+
+
+def check_bulk_operations(request: BulkOperationRequest, allowed_actions: set) -> set:
+    """Prüft eine Bulk-Anfrage vor dem Schreiben und gibt alle betroffenen IDs zurück."""
+    requested_ids = set()
+    total_items = 0
+
+    for operation in request.operations:
+        if operation.action not in allowed_actions:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Aktion '{operation.action}' wird nicht unterstützt"
+            )
+        if operation.action == "move" and not operation.category:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Für 'move' muss eine Kategorie angegeben werden"
+            )
+        if operation.action == "favorite" and operation.favorite is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Für 'favorite' muss der Favoriten-Status angegeben werden"
+            )
+        if operation.action == "update" and (
+            operation.fields is None or not operation.fields.model_dump(exclude_none=True)
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Für 'update' müssen Felder angegeben werden"
+            )
+
+        total_items += len(operation.ids)
+        requested_ids.update(operation.ids)
+
+    if total_items > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Maximal {MAX_BULK_ITEMS} Einträge pro Anfrage erlaubt"
+        )
+
+    return requested_ids
+
+
+def bulk_response(results: list) -> dict:
+    succeeded = sum(1 for result in results if result["success"])
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+
+def password_fields(password: Password, cipher) -> dict:
+    """Felder eines Eintrags für die Antwort, mit entschlüsselten Metadaten."""
+    fields = {name: getattr(password, name) for name in PasswordResponse.model_fields}
+    fields.update(open_metadata(cipher, password))
+    return fields
+
 @router.post("", response_model=PasswordResponse, status_code=status.HTTP_201_CREATED)
 async def create_password(
     password_data: PasswordCreate,
@@ -20,14 +111,19 @@ async def create_password(
     db: Session = Depends(get_db)
 ):
     try:
-        encrypted_password = encrypt_password(password_data.password)
+        cipher = data_keys.user(db, current_user.id)
+        encrypted_password = cipher.encrypt(password_data.password)
 
         db_password = Password(
             title=password_data.title,
-            username=password_data.username,
-            email=password_data.email,
-            website=password_data.website,
+            **seal_metadata(
+                cipher, current_user.id,
+                username=password_data.username,
+                email=password_data.email,
+                website=password_data.website
+            ),
             encrypted_password=encrypted_password,
+            **health_columns(current_user.id, password_data.password),
             category=password_data.category,
             notes=password_data.notes,
             user_id=current_user.id,
@@ -39,7 +135,7 @@ async def create_password(
         db.refresh(db_password)
 
         logger.info(f"Passworteintrag für Benutzer {current_user.email} erstellt: {password_data.title}")
-        return db_password
+        return password_fields(db_password, cipher)
     except Exception as e:
         logger.error(f"Fehler beim Erstellen des Passworteintrags: {str(e)}")
         raise HTTPException(
@@ -61,15 +157,217 @@ async def get_all_passwords(
 
     if search:
         search_term = f"%{search}%"
-        query = query.filter(
-            (Password.title.ilike(search_term)) |
-            (Password.username.ilike(search_term)) |
-            (Password.email.ilike(search_term)) |
-            (Password.website.ilike(search_term))
-        )
+        # Metadaten werden über die Blind-Indizes gefunden, ohne Einträge zu entschlüsseln.
+        conditions = [Password.title.ilike(search_term)]
+        for field in METADATA_FIELDS:
+            index = blind_index(current_user.id, field, search)
+            if index:
+                conditions.append(getattr(Password, f"{field}_bidx") == index)
+        if not ENCRYPT_METADATA:
+            conditions.extend(getattr(Password, field).ilike(search_term) for field in METADATA_FIELDS)
+        query = query.filter(or_(*conditions))
 
     passwords = query.all()
-    return passwords
+    cipher = data_keys.user(db, current_user.id)
+    return [password_fields(password, cipher) for password in passwords]
+
+@router.post("/bulk", response_model=BulkOperationResponse)
+async def bulk_update_passwords(
+    request: BulkOperationRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Wendet mehrere Operationen in einer Transaktion auf Passworteinträge an."""
+    requested_ids = check_bulk_operations(
+        request, {"update", "move", "favorite", "delete", "reencrypt"}
+    )
+
+    owned_ids = {
+        password_id for (password_id,) in db.query(Password.id).filter(
+            Password.user_id == current_user.id,
+            Password.id.in_(requested_ids)
+        ).all()
+    } if requested_ids else set()
+
+    results = []
+    now = datetime.utcnow()
+    cipher = data_keys.user(db, current_user.id)
+
+    try:
+        for operation in request.operations:
+            targets = []
+            for password_id in dict.fromkeys(operation.ids):
+                if password_id in owned_ids:
+                    targets.append(password_id)
+                else:
+                    results.append({
+                        "id": password_id,
+                        "action": operation.action,
+                        "success": False,
+                        "detail": "Passworteintrag nicht gefunden"
+                    })
+
+            if not targets:
+                continue
+
+            failed = {}
+            target_filter = Password.id.in_(targets)
+
+            if operation.action == "delete":
+                db.query(Password).filter(target_filter).delete(synchronize_session=False)
+                owned_ids.difference_update(targets)
+
+            elif operation.action == "move":
+                db.query(Password).filter(target_filter).update(
+                    {Password.category: operation.category, Password.updated_at: now},
+                    synchronize_session=False
+                )
+
+            elif operation.action == "favorite":
+                db.query(Password).filter(target_filter).update(
+                    {Password.favorite: operation.favorite},
+                    synchronize_session=False
+                )
+
+            elif operation.action == "update":
+                fields = operation.fields.model_dump(exclude_none=True)
+                new_password = fields.pop("password", None)
+                fields.update(seal_metadata(cipher, current_user.id, **{
+                    field: fields.pop(field) for field in METADATA_FIELDS if field in fields
+                }))
+
+                values = {getattr(Password, key): value for key, value in fields.items()}
+                values[Password.updated_at] = now
+                db.query(Password).filter(target_filter).update(values, synchronize_session=False)
+
+                if new_password:
+                    health = health_columns(current_user.id, new_password)
+                    db.execute(update(Password), [
+                        {"id": password_id, "encrypted_password": cipher.encrypt(new_password), **health}
+                        for password_id in targets
+                    ])
+
+            elif operation.action == "reencrypt":
+                rows = db.query(
+                    Password.id, Password.encrypted_password, Password.totp_secret
+                ).filter(target_filter).all()
+
+                mappings = []
+                for password_id, encrypted, totp_secret in rows:
+                    try:
+                        mappings.append({
+                            "id": password_id,
+                            "encrypted_password": cipher.reencrypt(encrypted),
+                            "totp_secret": cipher.reencrypt(totp_secret)
+                        })
+                    except InvalidToken:
+                        failed[password_id] = "Passwort kann nicht entschlüsselt werden"
+
+                if mappings:
+                    db.execute(update(Password), mappings)
+
+            for password_id in targets:
+                results.append({
+                    "id": password_id,
+                    "action": operation.action,
+                    "success": password_id not in failed,
+                    "detail": failed.get(password_id)
+                })
+
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Fehler bei der Bulk-Operation: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Fehler bei der Bulk-Operation"
+        )
+
+    logger.info(f"Bulk-Operation für Benutzer {current_user.email}: {len(results)} Einträge verarbeitet")
+    return bulk_response(results)
+
+@router.get("/health", response_model=PasswordHealthReport)
+async def get_password_health(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Gibt schwache, mehrfach verwendete und veraltete Passwörter des Benutzers zurück.
+
+    Der Bericht basiert auf Fingerabdruck und Stärke, die beim Speichern
+    berechnet werden; dafür wird kein Passwort entschlüsselt.
+    """
+    return user_report(db, current_user.id)
+
+@router.get("/match", response_model=PasswordMatchResponse)
+async def match_passwords(
+    url: str = Query(..., description="URL oder Domain der Seite, die ausgefüllt werden soll"),
+    limit: int = Query(20, ge=1, le=MAX_MATCHES),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Findet persönliche und Team-Einträge für eine URL (für Autofill).
+
+    Gesucht wird über die registrierbare Domain (indiziert); Treffer auf dem
+    exakten Host kommen vor anderen Subdomains, danach nach letzter Nutzung.
+    """
+    site = site_columns(url)
+    if not site["host"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Ungültige URL"
+        )
+
+    matches = []
+
+    # Persönliche Einträge: mit ENCRYPT_METADATA enthalten die Spalten Blind-Indizes.
+    personal = site_columns(url, current_user.id)
+    passwords = db.query(Password).filter(
+        Password.user_id == current_user.id,
+        Password.registrable_domain == personal["registrable_domain"]
+    ).all()
+    if passwords:
+        cipher = data_keys.user(db, current_user.id)
+        for password in passwords:
+            metadata = open_metadata(cipher, password)
+            matches.append({
+                "id": password.id,
+                "source": "personal",
+                "match": "host" if password.host == personal["host"] else "domain",
+                "title": password.title,
+                **metadata,
+                "last_used": password.last_used,
+            })
+
+    team_ids = db.query(TeamMember.team_id).filter(TeamMember.user_id == current_user.id)
+    shared = db.query(SharedPassword, Team.name).join(Team, Team.id == SharedPassword.team_id).filter(
+        SharedPassword.team_id.in_(team_ids),
+        SharedPassword.registrable_domain == site["registrable_domain"]
+    ).all()
+    for password, team_name in shared:
+        matches.append({
+            "id": password.id,
+            "source": "team",
+            "match": "host" if password.host == site["host"] else "domain",
+            "title": password.title,
+            "username": password.username,
+            "email": password.email,
+            "website": password.website,
+            "team_id": password.team_id,
+            "team_name": team_name,
+            "last_used": None,
+        })
+
+    matches.sort(key=lambda match: (
+        match["match"] != "host",
+        match["last_used"] is None,
+        -(match["last_used"].timestamp() if match["last_used"] else 0)
+    ))
+
+    return {
+        "host": site["host"],
+        "registrable_domain": site["registrable_domain"],
+        "matches": matches[:limit],
+    }
 
 @router.get("/{password_id}", response_model=PasswordResponse)
 async def get_password(
@@ -89,7 +387,7 @@ async def get_password(
             detail="Passworteintrag nicht gefunden"
         )
 
-    return password
+    return password_fields(password, data_keys.user(db, current_user.id))
 
 @router.get("/{password_id}/decrypt", response_model=PasswordWithSecret)
 async def get_decrypted_password(
@@ -110,22 +408,11 @@ async def get_decrypted_password(
                 detail="Passworteintrag nicht gefunden"
             )
 
-        result = {
-            "id": password.id,
-            "title": password.title,
-            "username": password.username,
-            "email": password.email,
-            "website": password.website,
-            "category": password.category,
-            "notes": password.notes,
-            "favorite": password.favorite,
-            "last_used": password.last_used,
-            "created_at": password.created_at,
-            "updated_at": password.updated_at
-        }
+        cipher = data_keys.user(db, current_user.id)
+        result = password_fields(password, cipher)
 
         try:
-            decrypted_password = decrypt_password(password.encrypted_password)
+            decrypted_password = cipher.decrypt(password.encrypted_password)
             result["password"] = decrypted_password
         except Exception as e:
             logger.error(f"Fehler beim Entschlüsseln des Passworts: {str(e)}")
@@ -146,6 +433,42 @@ async def get_decrypted_password(
             updated_at=datetime.utcnow()
         )
 
+@router.post("/decrypt-batch", response_model=PasswordDecryptBatchResponse)
+async def get_decrypted_passwords_batch(
+    request: DecryptBatchRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Gibt mehrere Passworteinträge mit entschlüsseltem Passwort zurück."""
+    requested_ids = check_decrypt_batch(request)
+    if not requested_ids:
+        return {"passwords": [], "missing": []}
+
+    rows = db.query(Password).filter(
+        Password.user_id == current_user.id,
+        Password.id.in_(requested_ids)
+    ).all()
+    found = {password.id: password for password in rows}
+    passwords = [found[password_id] for password_id in requested_ids if password_id in found]
+
+    cipher = data_keys.user(db, current_user.id)
+    decrypted = await decrypt_many([password.encrypted_password for password in passwords], [cipher] * len(passwords))
+
+    result = []
+    for password, decrypted_password in zip(passwords, decrypted):
+        result.append(PasswordWithSecret(**password_fields(password, cipher), password=decrypted_password))
+
+    if passwords:
+        db.query(Password).filter(Password.id.in_(found.keys())).update(
+            {Password.last_used: datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
+
+    return {
+        "passwords": result,
+        "missing": [password_id for password_id in requested_ids if password_id not in found]
+    }
+
 @router.put("/{password_id}", response_model=PasswordResponse)
 async def update_password(
     password_id: int,
@@ -165,14 +488,20 @@ async def update_password(
             detail="Passworteintrag nicht gefunden"
         )
 
+    cipher = data_keys.user(db, current_user.id)
     password.title = password_data.title
-    password.username = password_data.username
-    password.email = password_data.email
-    password.website = password_data.website
+    for column, value in seal_metadata(
+        cipher, current_user.id,
+        username=password_data.username,
+        email=password_data.email,
+        website=password_data.website
+    ).items():
+        setattr(password, column, value)
 
     if password_data.password:
         try:
-            password.encrypted_password = encrypt_password(password_data.password)
+            password.encrypted_password = cipher.encrypt(password_data.password)
+            apply_health(password, current_user.id, password_data.password)
         except Exception as e:
             logger.error(f"Fehler beim Verschlüsseln des Passworts: {str(e)}")
             raise HTTPException(
@@ -189,7 +518,7 @@ async def update_password(
     db.refresh(password)
 
     logger.info(f"Passworteintrag für Benutzer {current_user.email} aktualisiert: {password.title}")
-    return password
+    return password_fields(password, cipher)
 
 @router.delete("/{password_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_password(
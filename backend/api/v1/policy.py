@@ -6,10 +6,19 @@ from datetime import datetime
 from backend.database.database import get_db
 from backend.database.models import User, PasswordPolicy
 from backend.security.dependencies import get_current_active_user, get_admin_user
+from backend.security.health import schedule_health_backfill
+from backend.security.policy import password_policy
 from backend.api.v1.schemas import PasswordPolicyCreate, PasswordPolicyResponse
 
 router = APIRouter(prefix="/policies", tags=["password policies"])
 
+
+def policy_changed() -> None:
+    """Verwirft die kompilierte Richtlinie und prüft die Tresoreinträge erneut."""
+    password_policy.invalidate()
+    schedule_health_backfill()
+
+
 @router.get("", response_model=List[PasswordPolicyResponse])
 async def get_all_policies(
     current_user: User = Depends(get_current_active_user),
@@ -46,6 +55,7 @@ async def create_policy(
     db.add(policy)
     db.commit()
     db.refresh(policy)
+    policy_changed()
 
     return policy
 
@@ -97,6 +107,7 @@ async def update_policy(
 
     db.commit()
     db.refresh(policy)
+    policy_changed()
 
     return policy
 
@@ -115,5 +126,6 @@ async def delete_policy(
 
     db.delete(policy)
     db.commit()
+    policy_changed()
 
     return {"message": "Richtlinie erfolgreich gelöscht"}
@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+
+from backend.database.models import User
+from backend.monitoring.profiler import profiler
+from backend.security.dependencies import get_admin_user
+
+router = APIRouter(prefix="/system/profile", tags=["system"])
+
+
+class ProfileSessionCreate(BaseModel):
+    path_prefix: str = "/api/v1/"
+    max_requests: int = Field(10, ge=1, le=100)
+    duration_seconds: int = Field(300, ge=1, le=3600)
+    require_header: bool = False
+
+
+@router.get("")
+async def get_profile_session(admin_user: User = Depends(get_admin_user)):
+    """Gibt die aktive Profiling-Sitzung und alle gespeicherten Profile zurück."""
+    session = profiler.session
+    return {
+        "active": session is not None,
+        "session": session.to_dict() if session else None,
+        "profiles": profiler.list_profiles(),
+    }
+
+
+@router.post("", status_code=status.HTTP_201_CREATED)
+async def start_profile_session(
+    session_data: ProfileSessionCreate,
+    admin_user: User = Depends(get_admin_user)
+):
+    """Startet eine Profiling-Sitzung (nur Admin).
+
+    Mit require_header werden nur Anfragen mit dem Header X-Authron-Profile erfasst.
+    """
+    session = profiler.start(
+        path_prefix=session_data.path_prefix,
+        max_requests=session_data.max_requests,
+        duration_seconds=session_data.duration_seconds,
+        require_header=session_data.require_header,
+        created_by=admin_user.email,
+    )
+    return session.to_dict()
+
+
+@router.delete("")
+async def stop_profile_session(admin_user: User = Depends(get_admin_user)):
+    """Beendet die aktive Profiling-Sitzung."""
+    profiler.stop()
+    return {"message": "Profiling beendet"}
+
+
+@router.get("/{filename}")
+async def download_profile(filename: str, admin_user: User = Depends(get_admin_user)):
+    """Lädt ein gespeichertes Profil im pstats-Format herunter."""
+    path = profiler.profile_path(filename)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profil '{filename}' nicht gefunden"
+        )
+
+    return FileResponse(path, media_type="application/octet-stream", filename=filename)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Any, Optional, List, Literal
 from datetime import datetime
 
 
@@ -50,6 +50,23 @@ class PasswordReset(BaseModel):
     email: EmailStr
 
 
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
+class SessionResponse(BaseModel):
+    id: int
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    created_at: datetime
+    last_used_at: datetime
+    expires_at: datetime
+    current: bool = False
+
+    class Config:
+        from_attributes = True
+
+
 class PasswordCreate(BaseModel):
     title: str
     username: Optional[str] = None
@@ -71,6 +88,9 @@ class PasswordResponse(BaseModel):
     notes: Optional[str] = None
     favorite: bool = False
     totp_enabled: bool = False
+    password_breached: Optional[bool] = None
+    policy_compliant: Optional[bool] = None
+    password_expires_at: Optional[datetime] = None
     last_used: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
@@ -91,6 +111,82 @@ class PasswordFavoriteUpdate(BaseModel):
     favorite: bool
 
 
+class DecryptBatchRequest(BaseModel):
+    ids: List[int]
+
+
+class PasswordDecryptBatchResponse(BaseModel):
+    passwords: List[PasswordWithSecret]
+    missing: List[int]
+
+
+class PasswordMatch(BaseModel):
+    id: int
+    source: Literal["personal", "team"]
+    match: Literal["host", "domain"]
+    title: str
+    username: Optional[str] = None
+    email: Optional[str] = None
+    website: Optional[str] = None
+    team_id: Optional[int] = None
+    team_name: Optional[str] = None
+    last_used: Optional[datetime] = None
+
+
+class PasswordMatchResponse(BaseModel):
+    host: str
+    registrable_domain: str
+    matches: List[PasswordMatch]
+
+
+class BulkFieldsUpdate(BaseModel):
+    title: Optional[str] = None
+    username: Optional[str] = None
+    email: Optional[EmailStr] = None
+    website: Optional[str] = None
+    password: Optional[str] = None
+    category: Optional[str] = None
+    notes: Optional[str] = None
+    favorite: Optional[bool] = None
+
+
+class BulkOperation(BaseModel):
+    action: Literal["update", "move", "favorite", "delete", "reencrypt"]
+    ids: List[int]
+    category: Optional[str] = None
+    favorite: Optional[bool] = None
+    fields: Optional[BulkFieldsUpdate] = None
+
+
+class BulkOperationRequest(BaseModel):
+    operations: List[BulkOperation]
+
+
+class BulkItemResult(BaseModel):
+    id: int
+    action: str
+    success: bool
+    detail: Optional[str] = None
+
+
+class BulkOperationResponse(BaseModel):
+    results: List[BulkItemResult]
+    succeeded: int
+    failed: int
+
+
+class TOTPCode(BaseModel):
+    password_id: int
+    code: Optional[str] = None
+    remaining_seconds: Optional[int] = None
+    interval: Optional[int] = None
+    error: Optional[str] = None
+
+
+class TOTPCodesResponse(BaseModel):
+    codes: List[TOTPCode]
+
+
 class UserSettingsBase(BaseModel):
     language: Optional[str] = None
     auto_logout_time: Optional[int] = None
@@ -132,6 +228,58 @@ class AdminPasswordStats(BaseModel):
     avg_per_user: float
 
 
+class PasswordHealthReport(BaseModel):
+    total: int
+    weak: int
+    breached: int
+    reused: int
+    old: int
+    pending: int
+    max_age_days: Optional[int] = None
+    weak_ids: List[int]
+    breached_ids: List[int]
+    reused_groups: List[List[int]]
+    old_ids: List[int]
+
+
+class UserHealthStats(BaseModel):
+    user_id: int
+    username: str
+    total: int
+    weak: int
+    breached: int
+    reused: int
+    old: int
+    pending: int
+
+
+class AdminHealthStats(BaseModel):
+    total: int
+    weak: int
+    breached: int
+    reused: int
+    old: int
+    pending: int
+    max_age_days: Optional[int] = None
+    users: List[UserHealthStats]
+
+
+class PolicyViolationEntry(BaseModel):
+    id: int
+    title: str
+    user_id: int
+    username: str
+    violations: List[str]
+    expired: bool
+    password_expires_at: Optional[datetime] = None
+
+
+class PolicyViolationsResponse(BaseModel):
+    total: int
+    policy_version: str
+    entries: List[PolicyViolationEntry]
+
+
 class AdminUserCreate(BaseModel):
     username: str
     email: EmailStr
@@ -217,6 +365,10 @@ class SharedPasswordWithSecret(SharedPasswordResponse):
     class Config:
         from_attributes = True
 
+class SharedPasswordDecryptBatchResponse(BaseModel):
+    passwords: List[SharedPasswordWithSecret]
+    missing: List[int]
+
 class PasswordPolicyCreate(BaseModel):
     name: str
     min_length: int = 12
@@ -259,3 +411,50 @@ class ActivityLogsResponse(BaseModel):
     total_logs: int
     total_pages: int
     page: int
+
+class BatchSubRequest(BaseModel):
+    id: Optional[str] = None
+    method: str = "GET"
+    path: str
+    body: Optional[Any] = None
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest]
+
+class BatchSubResponse(BaseModel):
+    id: Optional[str] = None
+    status: int
+    body: Optional[Any] = None
+
+class BatchResponse(BaseModel):
+    responses: List[BatchSubResponse]
+
+
+class KeyRotationStart(BaseModel):
+    batch_size: int = Field(500, ge=1, le=10000)
+    throttle_ms: int = Field(50, ge=0, le=10000)
+
+
+class KeyRotationJobResponse(BaseModel):
+    id: int
+    status: str
+    target_key_id: str
+    current_target: Optional[str] = None
+    last_id: int
+    total: int
+    processed: int
+    rotated: int
+    failed: int
+    progress: float
+    batch_size: int
+    throttle_ms: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+class KeyRotationStatus(BaseModel):
+    primary_key_id: str
+    key_ids: List[str]
+    job: Optional[KeyRotationJobResponse] = None
@@ -1,15 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy import update
+from cryptography.fernet import InvalidToken
 from typing import List
 from datetime import datetime
+import logging
 
 from backend.database.database import get_db
 from backend.database.models import User, SharedPassword, Team, TeamMember
 from backend.security.dependencies import get_current_active_user
-from backend.security.utils import encrypt_password, decrypt_password
-from backend.api.v1.schemas import SharedPasswordCreate, SharedPasswordResponse, SharedPasswordWithSecret
+from backend.security.blind_index import site_columns
+from backend.security.envelope import data_keys
+from backend.security.crypto_pool import decrypt_many
+from backend.api.v1.schemas import (
+    SharedPasswordCreate,
+    SharedPasswordResponse,
+    SharedPasswordWithSecret,
+    BulkOperationRequest,
+    BulkOperationResponse,
+    DecryptBatchRequest,
+    SharedPasswordDecryptBatchResponse,
+)
+from backend.api.v1.passwords import check_bulk_operations, bulk_response, check_decrypt_batch
 
 router = APIRouter(prefix="/shared/passwords", tags=["shared passwords"])
+logger = logging.getLogger(__name__)
 
 @router.get("", response_model=List[SharedPasswordResponse])
 async def get_shared_passwords(
@@ -70,13 +85,14 @@ async def create_shared_password(
             detail="Kein Zugriff auf dieses Team"
         )
 
-    encrypted_password = encrypt_password(password_data.password)
+    encrypted_password = data_keys.team(db, password_data.team_id).encrypt(password_data.password)
 
     shared_password = SharedPassword(
         title=password_data.title,
         username=password_data.username,
         email=password_data.email,
         website=password_data.website,
+        **site_columns(password_data.website),
         encrypted_password=encrypted_password,
         category=password_data.category,
         notes=password_data.notes,
@@ -106,6 +122,116 @@ async def create_shared_password(
         "updated_at": shared_password.updated_at
     }
 
+@router.post("/bulk", response_model=BulkOperationResponse)
+async def bulk_update_shared_passwords(
+    request: BulkOperationRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Wendet mehrere Operationen in einer Transaktion auf geteilte Passwörter an."""
+    requested_ids = check_bulk_operations(request, {"update", "move", "delete", "reencrypt"})
+
+    for operation in request.operations:
+        if operation.action == "update" and operation.fields.favorite is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Geteilte Passwörter haben keinen Favoriten-Status"
+            )
+
+    team_ids = db.query(TeamMember.team_id).filter(TeamMember.user_id == current_user.id)
+    accessible = dict(
+        db.query(SharedPassword.id, SharedPassword.team_id).filter(
+            SharedPassword.team_id.in_(team_ids),
+            SharedPassword.id.in_(requested_ids)
+        ).all()
+    ) if requested_ids else {}
+    accessible_ids = set(accessible)
+    ciphers = {team_id: data_keys.team(db, team_id) for team_id in set(accessible.values())}
+
+    results = []
+    now = datetime.utcnow()
+
+    try:
+        for operation in request.operations:
+            targets = []
+            for password_id in dict.fromkeys(operation.ids):
+                if password_id in accessible_ids:
+                    targets.append(password_id)
+                else:
+                    results.append({
+                        "id": password_id,
+                        "action": operation.action,
+                        "success": False,
+                        "detail": "Passwort nicht gefunden oder kein Zugriff"
+                    })
+
+            if not targets:
+                continue
+
+            failed = {}
+            target_filter = SharedPassword.id.in_(targets)
+
+            if operation.action == "delete":
+                db.query(SharedPassword).filter(target_filter).delete(synchronize_session=False)
+                accessible_ids.difference_update(targets)
+
+            elif operation.action == "move":
+                db.query(SharedPassword).filter(target_filter).update(
+                    {SharedPassword.category: operation.category, SharedPassword.updated_at: now},
+                    synchronize_session=False
+                )
+
+            elif operation.action == "update":
+                fields = operation.fields.model_dump(exclude_none=True)
+                new_password = fields.pop("password", None)
+                if "website" in fields:
+                    fields.update(site_columns(fields["website"]))
+
+                values = {getattr(SharedPassword, key): value for key, value in fields.items()}
+                values[SharedPassword.updated_at] = now
+                db.query(SharedPassword).filter(target_filter).update(values, synchronize_session=False)
+
+                if new_password:
+                    db.execute(update(SharedPassword), [
+                        {"id": password_id, "encrypted_password": ciphers[accessible[password_id]].encrypt(new_password)}
+                        for password_id in targets
+                    ])
+
+            elif operation.action == "reencrypt":
+                rows = db.query(SharedPassword.id, SharedPassword.encrypted_password).filter(target_filter).all()
+
+                mappings = []
+                for password_id, encrypted in rows:
+                    try:
+                        mappings.append({
+                            "id": password_id,
+                            "encrypted_password": ciphers[accessible[password_id]].reencrypt(encrypted)
+                        })
+                    except InvalidToken:
+                        failed[password_id] = "Passwort kann nicht entschlüsselt werden"
+
+                if mappings:
+                    db.execute(update(SharedPassword), mappings)
+
+            for password_id in targets:
+                results.append({
+                    "id": password_id,
+                    "action": operation.action,
+                    "success": password_id not in failed,
+                    "detail": failed.get(password_id)
+                })
+
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Fehler bei der Bulk-Operation für geteilte Passwörter: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Fehler bei der Bulk-Operation"
+        )
+
+    return bulk_response(results)
+
 @router.get("/{password_id}", response_model=SharedPasswordResponse)
 async def get_shared_password(
     password_id: int,
@@ -168,7 +294,7 @@ async def get_shared_password_with_secret(
     team = db.query(Team).filter(Team.id == password.team_id).first()
     creator = db.query(User).filter(User.id == password.created_by).first()
 
-    decrypted_password = decrypt_password(password.encrypted_password)
+    decrypted_password = data_keys.team(db, password.team_id).decrypt(password.encrypted_password)
 
     password.last_used = datetime.utcnow()
     db.commit()
@@ -190,6 +316,59 @@ async def get_shared_password_with_secret(
         "password": decrypted_password
     }
 
+@router.post("/decrypt-batch", response_model=SharedPasswordDecryptBatchResponse)
+async def get_shared_passwords_with_secret_batch(
+    request: DecryptBatchRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Gibt mehrere geteilte Passwörter mit entschlüsseltem Passwort zurück."""
+    requested_ids = check_decrypt_batch(request)
+    if not requested_ids:
+        return {"passwords": [], "missing": []}
+
+    team_ids = db.query(TeamMember.team_id).filter(TeamMember.user_id == current_user.id)
+    rows = db.query(SharedPassword, Team.name, User.username).outerjoin(
+        Team, Team.id == SharedPassword.team_id
+    ).outerjoin(
+        User, User.id == SharedPassword.created_by
+    ).filter(
+        SharedPassword.id.in_(requested_ids),
+        SharedPassword.team_id.in_(team_ids)
+    ).all()
+    found = {password.id: (password, team_name, creator_name) for password, team_name, creator_name in rows}
+    entries = [found[password_id] for password_id in requested_ids if password_id in found]
+
+    ciphers = {team_id: data_keys.team(db, team_id) for team_id in {password.team_id for password, _, _ in entries}}
+    decrypted = await decrypt_many(
+        [password.encrypted_password for password, _, _ in entries],
+        [ciphers[password.team_id] for password, _, _ in entries]
+    )
+
+    result = []
+    for (password, team_name, creator_name), decrypted_password in zip(entries, decrypted):
+        result.append({
+            "id": password.id,
+            "title": password.title,
+            "username": password.username,
+            "email": password.email,
+            "website": password.website,
+            "category": password.category,
+            "notes": password.notes,
+            "team_id": password.team_id,
+            "team_name": team_name or "Unbekanntes Team",
+            "created_by": password.created_by,
+            "creator_name": creator_name or "Unbekannter Benutzer",
+            "created_at": password.created_at,
+            "updated_at": password.updated_at,
+            "password": decrypted_password
+        })
+
+    return {
+        "passwords": result,
+        "missing": [password_id for password_id in requested_ids if password_id not in found]
+    }
+
 @router.put("/{password_id}", response_model=SharedPasswordResponse)
 async def update_shared_password(
     password_id: int,
@@ -215,11 +394,13 @@ async def update_shared_password(
     password.username = password_data.username
     password.email = password_data.email
     password.website = password_data.website
+    for column, value in site_columns(password_data.website).items():
+        setattr(password, column, value)
     password.category = password_data.category
     password.notes = password_data.notes
 
     if password_data.password:
-        password.encrypted_password = encrypt_password(password_data.password)
+        password.encrypted_password = data_keys.team(db, password.team_id).encrypt(password_data.password)
 
     password.updated_at = datetime.utcnow()
     db.commit()
@@ -250,7 +431,7 @@ async def delete_shared_password(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    user_teams = db.query(TeamMember).filter(TeamMember.user_id == current_user.id).all()
+    user_teams = db.query(TeamMember.team_id).filter(TeamMember.user_id == current_user.id).all()
     team_ids = [team_id for (team_id,) in user_teams]
 
     password = db.query(SharedPassword).filter(
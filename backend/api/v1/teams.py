@@ -6,6 +6,7 @@ from datetime import datetime
 from backend.database.database import get_db
 from backend.database.models import User, Team, TeamMember
 from backend.security.dependencies import get_current_active_user
+from backend.security.envelope import OWNER_TEAM, data_keys
 from backend.api.v1.schemas import TeamCreate, TeamUpdate, TeamResponse, TeamMemberCreate, TeamMemberResponse
 
 router = APIRouter(prefix="/teams", tags=["teams"])
@@ -170,6 +171,7 @@ async def delete_team(
         )
 
     db.delete(team)
+    data_keys.delete(db, OWNER_TEAM, team_id)
     db.commit()
 
     return {"message": "Team erfolgreich gelöscht"}
@@ -307,6 +309,8 @@ async def remove_team_member(
         )
 
     db.delete(member)
+    # Nur der Teamschlüssel wird neu verpackt, die geteilten Einträge bleiben unverändert.
+    data_keys.rewrap(db, OWNER_TEAM, team_id)
     db.commit()
 
     return {"message": "Teammitglied erfolgreich entfernt"}
@@ -3,15 +3,53 @@ from sqlalchemy.orm import Session
 from typing import Dict, Any
 import pyotp
 import base64
+import logging
 from datetime import datetime
 
 from backend.database.database import get_db
 from backend.database.models import Password, User
 from backend.security.dependencies import get_current_active_user
-from backend.security.utils import decrypt_password, encrypt_password
+from backend.security.envelope import data_keys
+from backend.security.otp import totp_code_cache
+from backend.api.v1.schemas import TOTPCodesResponse
 
 router = APIRouter(prefix="/totp", tags=["totp"])
 
+logger = logging.getLogger(__name__)
+
+@router.get("/codes", response_model=TOTPCodesResponse)
+async def get_totp_codes(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Gibt die aktuellen TOTP-Codes aller Einträge des Benutzers zurück."""
+    entries = db.query(Password.id, Password.totp_secret).filter(
+        Password.user_id == current_user.id,
+        Password.totp_enabled == True,
+        Password.totp_secret.isnot(None)
+    ).all()
+
+    cipher = data_keys.user(db, current_user.id)
+    codes = []
+    for password_id, totp_secret in entries:
+        try:
+            code, remaining_seconds, interval = totp_code_cache.code(password_id, totp_secret, cipher.decrypt_strict)
+            codes.append({
+                "password_id": password_id,
+                "code": code,
+                "remaining_seconds": remaining_seconds,
+                "interval": interval
+            })
+        except Exception as e:
+            # The details (pyotp, binascii) stay in the log.
+            logger.warning(f"TOTP-Code für Eintrag {password_id} konnte nicht erzeugt werden: {e}")
+            codes.append({
+                "password_id": password_id,
+                "error": "TOTP-Secret konnte nicht entschlüsselt werden"
+            })
+
+    return {"codes": codes}
+
 @router.post("/{password_id}/setup", response_model=Dict[str, Any])
 async def setup_totp(
     password_id: int,
@@ -35,10 +73,11 @@ async def setup_totp(
         clean_secret = totp_secret.replace(" ", "").upper()
         pyotp.TOTP(clean_secret).now()
 
-        password_entry.totp_secret = encrypt_password(clean_secret)
+        password_entry.totp_secret = data_keys.user(db, current_user.id).encrypt(clean_secret)
         password_entry.totp_enabled = True
         password_entry.updated_at = datetime.utcnow()
         db.commit()
+        totp_code_cache.invalidate(password_id)
 
         return {
             "success": True,
@@ -74,7 +113,7 @@ async def get_totp_code(
         )
 
     try:
-        decrypted_secret = decrypt_password(password_entry.totp_secret)
+        decrypted_secret = data_keys.user(db, current_user.id).decrypt(password_entry.totp_secret)
 
         if not decrypted_secret:
             raise HTTPException(
@@ -136,6 +175,7 @@ async def disable_totp(
     password_entry.totp_secret = None
     password_entry.updated_at = datetime.utcnow()
     db.commit()
+    totp_code_cache.invalidate(password_id)
 
     return {"message": "TOTP erfolgreich deaktiviert"}
 
@@ -164,7 +204,7 @@ async def get_totp_secret(
         )
 
     try:
-        decrypted_secret = decrypt_password(password_entry.totp_secret)
+        decrypted_secret = data_keys.user(db, current_user.id).decrypt(password_entry.totp_secret)
 
         if not decrypted_secret:
             raise HTTPException(
@@ -1,19 +1,39 @@
-from fastapi import APIRouter, Path
+from fastapi import APIRouter, Path, Request, Response, status
 from typing import Dict, Optional
 
 from backend.translations.service import TranslationService
 
 router = APIRouter(prefix="/translations", tags=["translations"])
 
+TRANSLATIONS_CACHE_CONTROL = "public, max-age=86400"
+
 @router.get("/languages", response_model=Dict[str, str])
 async def get_languages():
     """Get all available languages."""
     return TranslationService.get_languages()
 
 @router.get("/{language_code}", response_model=Dict[str, str])
-async def get_translations(language_code: str = Path(..., description="Language code (e.g., 'de', 'en')")):
+async def get_translations(
+    request: Request,
+    language_code: str = Path(..., description="Language code (e.g., 'de', 'en')")
+):
     """Get all translations for a specific language."""
-    return TranslationService.get_translations(language_code)
+    bundle = TranslationService.get_bundle(language_code)
+    headers = {
+        "ETag": bundle.etag,
+        "Cache-Control": TRANSLATIONS_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if bundle.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=bundle.gzip_body, media_type="application/json", headers=headers)
+
+    return Response(content=bundle.body, media_type="application/json", headers=headers)
 
 @router.get("/{language_code}/{key}")
 async def translate(
@@ -5,7 +5,8 @@ from backend.database.database import get_db
 from backend.database.models import User
 from backend.security.dependencies import get_current_active_user
 from backend.security.utils import verify_password
-from backend.security.otp import setup_2fa, verify_totp
+from backend.security.otp import setup_2fa, verify_totp, encrypt_otp_secret, decrypt_otp_secret
+from backend.security.revocation import token_revocation
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/auth/2fa", tags=["2fa"])
@@ -32,7 +33,7 @@ async def setup_two_factor(
 
     setup_data = setup_2fa(current_user.email)
 
-    current_user.otp_secret = setup_data["secret"]
+    current_user.otp_secret = encrypt_otp_secret(setup_data["secret"])
     db.commit()
 
     return {
@@ -54,7 +55,7 @@ async def verify_two_factor(
             detail="2FA wurde noch nicht eingerichtet"
         )
 
-    if verify_totp(current_user.otp_secret, request.otp_code):
+    if verify_totp(decrypt_otp_secret(current_user.otp_secret), request.otp_code):
         current_user.otp_enabled = True
         db.commit()
         return {"success": True, "message": "2FA erfolgreich aktiviert"}
@@ -86,6 +87,6 @@ async def disable_two_factor(
 
     current_user.otp_enabled = False
     current_user.otp_secret = None
-    db.commit()
+    token_revocation.revoke_user(db, current_user)
 
     return {"success": True, "message": "2FA erfolgreich deaktiviert"}
@@ -13,7 +13,7 @@ a = Analysis(
     ['standalone_server.py'],
     pathex=['.', '..'],
     binaries=[],
-    datas=[('translations', 'translations')],
+    datas=[('translations', 'translations'), ('data', 'data')],
     hiddenimports=hiddenimports,
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,259 @@
+"""Micro-benchmarks for the crypto primitives and Argon2 calibration.
+
+Examples::
+
+    python -m backend.benchmarks.crypto run --output /tmp/crypto.json
+    python -m backend.benchmarks.crypto storage --rows 100000
+    python -m backend.benchmarks.crypto calibrate --target-ms 250 --max-memory-mib 256
+
+`run` compares the legacy Fernet text formats with the binary AES-GCM format
+for encrypt/decrypt throughput; `storage` compares their on-disk size.
+`calibrate` prints ARGON2_* environment variables for the API. After changing
+them, existing hashes are replaced on each user's next successful login.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import string
+import tempfile
+import time
+from datetime import timedelta
+from typing import Callable, List, Optional, Sequence
+
+import pyotp
+from cryptography.fernet import Fernet
+from jose import jwt
+from passlib.hash import argon2
+
+from backend.security.envelope import ENVELOPE_PREFIX, EnvelopeCipher, derive_aead
+from backend.security.otp import generate_totp_uri, get_qr_code_image
+from backend.security.utils import (
+    ALGORITHM,
+    ARGON2_MEMORY_COST,
+    ARGON2_PARALLELISM,
+    ARGON2_TIME_COST,
+    SECRET_KEY,
+    create_access_token,
+    decrypt_password,
+    encrypt_password,
+    get_password_hash,
+    verify_password,
+)
+
+PAYLOAD_SIZES = (16, 64, 256, 1024, 4096)
+
+
+def _bench_cipher() -> EnvelopeCipher:
+    data_key = Fernet.generate_key()
+    return EnvelopeCipher("user", 1, Fernet(data_key), derive_aead(data_key))
+
+
+def _legacy_envelope(cipher: EnvelopeCipher, plaintext: str) -> str:
+    """The text format written by earlier versions: "e1:" + Fernet token under the data key."""
+    return ENVELOPE_PREFIX + cipher._key.encrypt(plaintext.encode()).decode()
+
+
+def measure(func: Callable[[], object], min_time: float, min_runs: int = 3) -> dict:
+    """Calls func repeatedly for at least min_time seconds and returns per-call statistics."""
+    func()
+    samples: List[float] = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < min_runs or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+
+    samples.sort()
+    return {
+        "runs": len(samples),
+        "mean_us": round(statistics.fmean(samples) * 1e6, 2),
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 2),
+        "p99_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6, 2),
+        "ops_per_s": round(len(samples) / sum(samples), 1),
+    }
+
+
+def run_suite(min_time: float) -> dict:
+    results = {}
+
+    def bench(name: str, func: Callable[[], object]) -> None:
+        results[name] = measure(func, min_time)
+        stats = results[name]
+        print(f"{name:<32} {stats['p50_us']:>12.1f} {stats['p99_us']:>12.1f} {stats['ops_per_s']:>12.1f}", flush=True)
+
+    print(f"{'benchmark':<32} {'p50 us':>12} {'p99 us':>12} {'ops/s':>12}")
+
+    password = "Correct-Horse-Battery-9"
+    stored_hash = get_password_hash(password)
+    bench("argon2.hash", lambda: get_password_hash(password))
+    bench("argon2.verify", lambda: verify_password(password, stored_hash))
+
+    cipher = _bench_cipher()
+    for size in PAYLOAD_SIZES:
+        plaintext = "x" * size
+        ciphertext = encrypt_password(plaintext)
+        bench(f"fernet.encrypt[{size}B]", lambda plaintext=plaintext: encrypt_password(plaintext))
+        bench(f"fernet.decrypt[{size}B]", lambda ciphertext=ciphertext: decrypt_password(ciphertext))
+        envelope_text = _legacy_envelope(cipher, plaintext)
+        bench(f"envelope_text.decrypt[{size}B]", lambda value=envelope_text: cipher.decrypt(value))
+        binary = cipher.encrypt(plaintext)
+        bench(f"aead.encrypt[{size}B]", lambda plaintext=plaintext: cipher.encrypt(plaintext))
+        bench(f"aead.decrypt[{size}B]", lambda value=binary: cipher.decrypt(value))
+
+    token = create_access_token({"sub": "1"}, expires_delta=timedelta(minutes=30))
+    bench("jwt.encode", lambda: create_access_token({"sub": "1"}, expires_delta=timedelta(minutes=30)))
+    bench("jwt.decode", lambda: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]))
+
+    secret = pyotp.random_base32()
+    totp = pyotp.TOTP(secret)
+    bench("totp.now", totp.now)
+    bench("totp.verify", lambda: totp.verify(totp.now()))
+    uri = generate_totp_uri(secret, "benchmark@example.com")
+    bench("qr.render", lambda: get_qr_code_image(uri))
+
+    return results
+
+
+def storage_suite(rows: int, seed: int = 1) -> dict:
+    """Stores `rows` random passwords per format in a scratch SQLite file and compares sizes."""
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + "!@#$%&*"
+    plaintexts = ["".join(rng.choice(alphabet) for _ in range(rng.randint(12, 24))) for _ in range(rows)]
+    cipher = _bench_cipher()
+    formats = {
+        "plaintext": lambda value: value,
+        "fernet_text": encrypt_password,
+        "envelope_text": lambda value: _legacy_envelope(cipher, value),
+        "aead_binary": cipher.encrypt,
+    }
+
+    results = {}
+    print(f"{'format':<16} {'bytes/value':>12} {'file bytes':>14} {'vs plaintext':>13}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, encode in formats.items():
+            values = [encode(value) for value in plaintexts]
+            path = os.path.join(directory, f"{name}.db")
+            con = sqlite3.connect(path)
+            con.execute("CREATE TABLE secrets (id INTEGER PRIMARY KEY, value BLOB)")
+            con.executemany("INSERT INTO secrets (value) VALUES (?)", ((value,) for value in values))
+            con.commit()
+            con.execute("VACUUM")
+            con.close()
+
+            value_bytes = sum(len(value) for value in values)
+            results[name] = {
+                "bytes_per_value": round(value_bytes / rows, 1),
+                "file_bytes": os.path.getsize(path),
+            }
+
+    baseline = results["plaintext"]["file_bytes"]
+    for name, stats in results.items():
+        stats["vs_plaintext"] = round(stats["file_bytes"] / baseline, 2)
+        print(f"{name:<16} {stats['bytes_per_value']:>12.1f} {stats['file_bytes']:>14} {stats['vs_plaintext']:>12.2f}x")
+    return results
+
+
+def _hash_time(time_cost: int, memory_cost: int, parallelism: int, samples: int = 3) -> float:
+    handler = argon2.using(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    handler.hash("calibration")
+    durations = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.hash("calibration")
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def calibrate(target_ms: float, max_memory_kib: int, min_memory_kib: int, parallelism: int,
+              max_time_cost: int = 20) -> dict:
+    """Picks the largest memory cost that fits the target, then raises time cost up to it.
+
+    Memory hardness is the more valuable property against GPU attacks, so memory
+    is halved only if even time_cost=1 is slower than the target.
+    """
+    target = target_ms / 1000
+    memory_cost = max_memory_kib
+    while True:
+        duration = _hash_time(1, memory_cost, parallelism)
+        print(f"  m={memory_cost} KiB t=1 p={parallelism}: {duration * 1000:.1f} ms", flush=True)
+        if duration <= target or memory_cost // 2 < min_memory_kib:
+            break
+        memory_cost //= 2
+
+    time_cost = 1
+    while time_cost < max_time_cost:
+        next_duration = _hash_time(time_cost + 1, memory_cost, parallelism)
+        print(f"  m={memory_cost} KiB t={time_cost + 1} p={parallelism}: {next_duration * 1000:.1f} ms", flush=True)
+        if next_duration > target:
+            break
+        time_cost += 1
+        duration = next_duration
+
+    return {
+        "time_cost": time_cost,
+        "memory_cost": memory_cost,
+        "parallelism": parallelism,
+        "hash_ms": round(duration * 1000, 1),
+        "target_ms": target_ms,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Authron crypto micro-benchmarks and Argon2 calibration")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the micro-benchmarks")
+    run.add_argument("--min-time", type=float, default=0.5, help="seconds per benchmark")
+    run.add_argument("--output", help="write JSON results to this file")
+
+    storage = commands.add_parser("storage", help="compare the on-disk size of the ciphertext formats")
+    storage.add_argument("--rows", type=int, default=100000)
+    storage.add_argument("--output", help="write JSON results to this file")
+
+    calibrate_parser = commands.add_parser("calibrate", help="pick Argon2 parameters for a target latency")
+    calibrate_parser.add_argument("--target-ms", type=float, default=250, help="target hash/verify time")
+    calibrate_parser.add_argument("--max-memory-mib", type=int, default=256)
+    calibrate_parser.add_argument("--min-memory-mib", type=int, default=19, help="lower bound (OWASP minimum)")
+    calibrate_parser.add_argument("--parallelism", type=int, default=ARGON2_PARALLELISM)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "calibrate":
+        print(f"Current: ARGON2_TIME_COST={ARGON2_TIME_COST} ARGON2_MEMORY_COST={ARGON2_MEMORY_COST} "
+              f"ARGON2_PARALLELISM={ARGON2_PARALLELISM}")
+        result = calibrate(args.target_ms, args.max_memory_mib * 1024, args.min_memory_mib * 1024, args.parallelism)
+        print(f"\nHash time {result['hash_ms']} ms (target {result['target_ms']} ms):")
+        print(f"ARGON2_TIME_COST={result['time_cost']}")
+        print(f"ARGON2_MEMORY_COST={result['memory_cost']}")
+        print(f"ARGON2_PARALLELISM={result['parallelism']}")
+        return
+
+    if args.command == "storage":
+        results = storage_suite(args.rows)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({"rows": args.rows, "results": results}, f, indent=2)
+        return
+
+    results = run_suite(args.min_time)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpu_count": os.cpu_count(),
+                    "argon2": {"time_cost": ARGON2_TIME_COST, "memory_cost": ARGON2_MEMORY_COST,
+                               "parallelism": ARGON2_PARALLELISM},
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
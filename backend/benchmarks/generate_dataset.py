@@ -0,0 +1,380 @@
+"""Synthetic database generator for scale testing.
+
+Creates a fresh SQLite database with users, vaults of varying size (log-normal
+distribution, so a few users have very large vaults), teams with shared
+passwords, share invites, TOTP secrets and activity log rows. The admin
+account from create_tables (admin@example.com / Admin@1234) is included; all
+other users log in with BENCH_PASSWORD.
+
+Entries are written in the format the API writes them: every user and team
+gets a data key wrapped by the master keyring, secrets are sealed with
+EnvelopeCipher, and the metadata and health columns are filled in, so the
+startup backfills find nothing to do. Run it with the ENCRYPTION_KEYS,
+BLIND_INDEX_KEY and ENCRYPT_METADATA settings of the API that will use the
+database.
+
+Rows are generated from a seeded RNG, so two runs with the same seed produce
+the same users, entries and relations. Ciphertexts and data keys still
+differ between runs. Rows are sealed in a process pool and written with bulk
+inserts in chunks. SQLite runs without fsync and journal
+while generating, so an interrupted run leaves an unusable file behind.
+
+Example (about one million vault entries)::
+
+    python -m backend.benchmarks.generate_dataset --database /tmp/large.db \\
+        --users 12000 --vault-median 50 --activity-logs 3000000 --teams 800
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+from cryptography.fernet import Fernet
+from sqlalchemy import create_engine, event, insert
+
+from backend.benchmarks.journeys import BENCH_PASSWORD
+from backend.database.models import (
+    ActivityLog,
+    Base,
+    DataKey,
+    Password,
+    SharedPassword,
+    SharedPasswordInvite,
+    Team,
+    TeamMember,
+    User,
+)
+from backend.security.blind_index import seal_metadata, site_columns
+from backend.security.envelope import OWNER_TEAM, OWNER_USER, EnvelopeCipher, derive_aead
+from backend.security.health import health_columns
+from backend.security.policy import CompiledPolicy
+from backend.security.utils import KEY_IDS, encrypt_password, fernet, get_password_hash
+
+CATEGORIES = ("Allgemein", "Arbeit", "Privat", "Finanzen", "Social Media", "Shopping")
+ACTIONS = ("login", "logout", "password_view", "password_create", "password_update",
+           "password_delete", "password_copy", "export", "settings_update", "team_join")
+DOMAINS = ("google.com", "github.com", "amazon.de", "paypal.com", "netflix.com", "spotify.com",
+           "microsoft.com", "apple.com", "dropbox.com", "slack.com", "atlassian.net", "ebay.de")
+BASE32 = "ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
+# A fresh database has no password policies, so the built-in rules apply.
+DEFAULT_POLICY = CompiledPolicy.compile([])
+
+# Sealing functions run in the worker processes. Rows carry the plaintext
+# and the raw data key of their owner in "_data_key", which is not inserted.
+
+
+def _cipher(owner_type: str, owner_id: int, data_key: bytes) -> EnvelopeCipher:
+    return EnvelopeCipher(owner_type, owner_id, Fernet(data_key), derive_aead(data_key))
+
+
+def seal_data_keys(rows: List[dict]) -> List[dict]:
+    for row in rows:
+        row["wrapped_key"] = fernet.encrypt(row.pop("_data_key")).decode()
+    return rows
+
+
+def seal_users(rows: List[dict]) -> List[dict]:
+    # 2FA secrets stay under the master keyring, like in the API.
+    for row in rows:
+        row["otp_secret"] = encrypt_password(row["otp_secret"]) if row["otp_secret"] else None
+    return rows
+
+
+def seal_passwords(rows: List[dict]) -> List[dict]:
+    for row in rows:
+        user_id = row["user_id"]
+        cipher = _cipher(OWNER_USER, user_id, row.pop("_data_key"))
+        plaintext = row["encrypted_password"]
+        row.update(seal_metadata(cipher, user_id, username=row["username"], email=row["email"],
+                                 website=row["website"]))
+        row.update(health_columns(user_id, plaintext, changed_at=row["created_at"], policy=DEFAULT_POLICY))
+        row["encrypted_password"] = cipher.encrypt(plaintext)
+        row["totp_secret"] = cipher.encrypt(row["totp_secret"]) if row["totp_secret"] else None
+    return rows
+
+
+def seal_shared_passwords(rows: List[dict]) -> List[dict]:
+    for row in rows:
+        cipher = _cipher(OWNER_TEAM, row["team_id"], row.pop("_data_key"))
+        row.update(site_columns(row["website"]))
+        row["encrypted_password"] = cipher.encrypt(row["encrypted_password"])
+    return rows
+
+
+class BulkWriter:
+    """Seals rows in a process pool and bulk-inserts them in order.
+
+    Keeps at most a few chunks in flight so memory stays flat for large runs.
+    """
+
+    def __init__(self, engine, workers: int, chunk_size: int):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        self.max_in_flight = max(2, workers * 2)
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def _insert(self, model, rows: List[dict]) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(insert(model), rows)
+
+    def write(self, model, rows: Iterable[dict], seal: Optional[Callable[[List[dict]], List[dict]]] = None) -> int:
+        """Inserts rows; with `seal`, each chunk is passed through it first (in the pool, so it must be picklable)."""
+        pending = deque()
+        count = 0
+
+        def flush_one():
+            chunk = pending.popleft()
+            self._insert(model, chunk.result() if isinstance(chunk, Future) else chunk)
+
+        for chunk in _chunks(rows, self.chunk_size):
+            count += len(chunk)
+            if seal is not None:
+                chunk = self.pool.submit(seal, chunk) if self.pool else seal(chunk)
+            pending.append(chunk)
+            if len(pending) >= self.max_in_flight:
+                flush_one()
+
+        while pending:
+            flush_one()
+        return count
+
+
+def _chunks(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _random_base32(rng: random.Random, length: int = 32) -> str:
+    return "".join(rng.choice(BASE32) for _ in range(length))
+
+
+def _random_secret(rng: random.Random) -> str:
+    return "".join(rng.choice("abcdefghijkmnpqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ23456789!@#$%&*")
+                   for _ in range(rng.randint(10, 24)))
+
+
+def _random_time(rng: random.Random, now: datetime, days: int) -> datetime:
+    return now - timedelta(seconds=rng.randint(0, days * 86400))
+
+
+def vault_sizes(rng: random.Random, users: int, median: float, sigma: float, maximum: int) -> List[int]:
+    """Log-normal vault sizes; most users have a few dozen entries, some thousands."""
+    return [min(maximum, int(rng.lognormvariate(0, sigma) * median)) for _ in range(users)]
+
+
+def create_engine_for(path: str):
+    engine = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(engine, "connect")
+    def set_bulk_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-262144")
+        cursor.close()
+
+    return engine
+
+
+def generate(args) -> dict:
+    rng = random.Random(args.seed)
+    now = datetime(2025, 1, 1)
+    engine = create_engine_for(args.database)
+    Base.metadata.create_all(bind=engine)
+
+    writer = BulkWriter(engine, args.workers, args.chunk_size)
+    counts = {}
+    timings = {}
+
+    def step(name: str, model, rows: Iterable[dict], seal=None) -> None:
+        start = time.perf_counter()
+        counts[name] = writer.write(model, rows, seal)
+        timings[name] = round(time.perf_counter() - start, 2)
+        print(f"  {name:<16} {counts[name]:>10} rows  {timings[name]:>8.2f} s", flush=True)
+
+    try:
+        # Argon2 is deliberately slow; one hash shared by all generated users keeps generation fast.
+        shared_hash = get_password_hash(BENCH_PASSWORD)
+        user_ids = list(range(2, args.users + 2))
+        otp_users = set(rng.sample(user_ids, int(len(user_ids) * args.otp_ratio)))
+
+        def users() -> Iterator[dict]:
+            yield {
+                "id": 1, "email": "admin@example.com", "username": "admin", "full_name": "Administrator",
+                "hashed_password": get_password_hash("Admin@1234"), "is_active": True, "is_admin": True,
+                "otp_secret": None, "otp_enabled": False, "created_at": now, "updated_at": now,
+            }
+            for user_id in user_ids:
+                created = _random_time(rng, now, 3 * 365)
+                yield {
+                    "id": user_id, "email": f"user{user_id}@example.com", "username": f"user{user_id}",
+                    "full_name": f"User {user_id}", "hashed_password": shared_hash,
+                    "is_active": rng.random() > 0.02, "is_admin": False,
+                    "otp_secret": _random_base32(rng) if user_id in otp_users else None,
+                    "otp_enabled": user_id in otp_users, "created_at": created, "updated_at": created,
+                }
+
+        print(f"Generating into {args.database} (seed {args.seed})", flush=True)
+        step("users", User, users(), seal=seal_users)
+
+        user_keys = {user_id: Fernet.generate_key() for user_id in user_ids}
+        team_keys = {team_id: Fernet.generate_key() for team_id in range(1, args.teams + 1)}
+
+        def data_keys() -> Iterator[dict]:
+            for owner_type, keys in ((OWNER_USER, user_keys), (OWNER_TEAM, team_keys)):
+                for owner_id, data_key in keys.items():
+                    yield {"owner_type": owner_type, "owner_id": owner_id, "_data_key": data_key,
+                           "master_key_id": KEY_IDS[0], "created_at": now}
+
+        step("data_keys", DataKey, data_keys(), seal=seal_data_keys)
+
+        sizes = vault_sizes(rng, args.users, args.vault_median, args.vault_sigma, args.vault_max)
+        password_owners: List[int] = []
+
+        def passwords() -> Iterator[dict]:
+            password_id = 0
+            for user_id, size in zip(user_ids, sizes):
+                for index in range(size):
+                    password_id += 1
+                    password_owners.append(user_id)
+                    domain = rng.choice(DOMAINS)
+                    created = _random_time(rng, now, 2 * 365)
+                    has_totp = rng.random() < args.totp_ratio
+                    yield {
+                        "id": password_id, "user_id": user_id, "_data_key": user_keys[user_id],
+                        "title": f"{domain.split('.')[0].capitalize()} {index}",
+                        "username": f"user{user_id}", "email": f"user{user_id}@example.com",
+                        "website": f"https://{'www.' if rng.random() < 0.5 else ''}{domain}",
+                        "encrypted_password": _random_secret(rng),
+                        "category": rng.choice(CATEGORIES), "notes": None,
+                        "favorite": rng.random() < 0.1,
+                        "totp_secret": _random_base32(rng) if has_totp else None,
+                        "totp_enabled": has_totp,
+                        "last_used": _random_time(rng, now, 90) if rng.random() < 0.6 else None,
+                        "created_at": created, "updated_at": created,
+                    }
+
+        step("passwords", Password, passwords(), seal=seal_passwords)
+
+        team_members = {}
+
+        def teams() -> Iterator[dict]:
+            for team_id in range(1, args.teams + 1):
+                team_members[team_id] = rng.sample(user_ids, min(len(user_ids), rng.randint(2, args.team_size)))
+                created = _random_time(rng, now, 365)
+                yield {"id": team_id, "name": f"Team {team_id}", "description": None,
+                       "created_at": created, "updated_at": created}
+
+        def members() -> Iterator[dict]:
+            for team_id, member_ids in team_members.items():
+                for position, user_id in enumerate(member_ids):
+                    yield {"team_id": team_id, "user_id": user_id,
+                           "role": "admin" if position == 0 else "member", "created_at": now}
+
+        def shared_passwords() -> Iterator[dict]:
+            for team_id, member_ids in team_members.items():
+                for index in range(rng.randint(0, 2 * args.shared_per_team)):
+                    domain = rng.choice(DOMAINS)
+                    created = _random_time(rng, now, 365)
+                    yield {
+                        "team_id": team_id, "_data_key": team_keys[team_id], "created_by": rng.choice(member_ids),
+                        "title": f"Team {team_id} {domain} {index}", "username": f"team{team_id}",
+                        "email": None, "website": f"https://{domain}",
+                        "encrypted_password": _random_secret(rng), "category": "Shared", "notes": None,
+                        "created_at": created, "updated_at": created,
+                    }
+
+        step("teams", Team, teams())
+        step("team_members", TeamMember, members())
+        step("shared_passwords", SharedPassword, shared_passwords(), seal=seal_shared_passwords)
+
+        def invites() -> Iterator[dict]:
+            if not password_owners:
+                return
+            for _ in range(args.invites):
+                password_id = rng.randint(1, len(password_owners))
+                created = _random_time(rng, now, 60)
+                yield {
+                    "password_id": password_id, "sender_id": password_owners[password_id - 1],
+                    "recipient_email": f"user{rng.choice(user_ids)}@example.com",
+                    "invite_token": f"{rng.getrandbits(192):048x}",
+                    "status": rng.choices(("pending", "accepted", "expired"), (6, 3, 1))[0],
+                    "expires_at": created + timedelta(days=7), "created_at": created,
+                }
+
+        step("invites", SharedPasswordInvite, invites())
+
+        def activity_logs() -> Iterator[dict]:
+            for _ in range(args.activity_logs):
+                action = rng.choice(ACTIONS)
+                is_password = action.startswith("password_")
+                yield {
+                    "user_id": rng.choice(user_ids), "action": action,
+                    "resource_type": "password" if is_password else None,
+                    "resource_id": rng.randint(1, max(1, len(password_owners))) if is_password else None,
+                    "details": None,
+                    "ip_address": f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                    "timestamp": _random_time(rng, now, 365),
+                }
+
+        step("activity_logs", ActivityLog, activity_logs())
+    finally:
+        writer.close()
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    engine.dispose()
+
+    return {"counts": counts, "timings": timings}
+
+
+def main(argv: Sequence[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic Authron database for scale testing")
+    parser.add_argument("--database", required=True, help="path of the SQLite file to create")
+    parser.add_argument("--force", action="store_true", help="overwrite an existing file")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--vault-median", type=float, default=50, help="median vault size")
+    parser.add_argument("--vault-sigma", type=float, default=1.0, help="spread of the log-normal vault size")
+    parser.add_argument("--vault-max", type=int, default=5000, help="upper bound for a single vault")
+    parser.add_argument("--totp-ratio", type=float, default=0.1, help="share of vault entries with a TOTP secret")
+    parser.add_argument("--otp-ratio", type=float, default=0.2, help="share of users with 2FA enabled")
+    parser.add_argument("--teams", type=int, default=50)
+    parser.add_argument("--team-size", type=int, default=12, help="maximum members per team")
+    parser.add_argument("--shared-per-team", type=int, default=20, help="average shared passwords per team")
+    parser.add_argument("--invites", type=int, default=2000)
+    parser.add_argument("--activity-logs", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="sealing processes")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="rows per bulk insert")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.database):
+        if not args.force:
+            sys.exit(f"{args.database} exists, use --force to overwrite it")
+        os.remove(args.database)
+
+    start = time.perf_counter()
+    result = generate(args)
+    total = sum(result["counts"].values())
+    print(f"Done: {total} rows in {time.perf_counter() - start:.1f} s")
+    print(f"Start the API against it with DATABASE_URL=sqlite:///{os.path.abspath(args.database)}")
+
+
+if __name__ == "__main__":
+    main()
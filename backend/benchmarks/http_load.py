@@ -0,0 +1,307 @@
+"""HTTP load and latency benchmark for the Authron API.
+
+Runs scripted user journeys against ``backend.main:app``, either in-process over
+httpx's ASGI transport (no network, measures the application itself) or
+against a real uvicorn process (includes HTTP parsing and the socket layer).
+Both targets use a fresh SQLite database in a temporary directory.
+
+Examples::
+
+    python -m backend.benchmarks.http_load run --target asgi --concurrency 8 --iterations 20
+    python -m backend.benchmarks.http_load run --target uvicorn --journeys login,vault,decrypt
+    python -m backend.benchmarks.http_load compare results/before.json results/after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import httpx
+
+from backend.benchmarks.journeys import JOURNEYS, Recorder, VirtualUser, setup_user
+
+# Every virtual user logs in from the same address; keep the per-IP login throttle out of the way.
+BENCHMARK_ENV = {"LOGIN_IP_LIMIT": "1000000"}
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SERVER_START_TIMEOUT = 30
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Linear-interpolated percentile (q in 0..100) of an unsorted sequence."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(recorder: Recorder, wall_time: float) -> dict:
+    endpoints = {}
+    for endpoint, latencies in sorted(recorder.latencies.items()):
+        endpoints[endpoint] = {
+            "count": len(latencies),
+            "errors": recorder.errors.get(endpoint, 0),
+            "statuses": {str(code): count for code, count in sorted(recorder.statuses[endpoint].items())},
+            "throughput_rps": round(len(latencies) / wall_time, 2) if wall_time else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "max_ms": round(max(latencies) * 1000, 3),
+        }
+
+    total = sum(stats["count"] for stats in endpoints.values())
+    return {
+        "requests": total,
+        "errors": sum(stats["errors"] for stats in endpoints.values()),
+        "wall_time_s": round(wall_time, 3),
+        "throughput_rps": round(total / wall_time, 2) if wall_time else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def asgi_client(workdir: str):
+    """In-process client; the app is imported only after DATABASE_URL points at the temp database."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    for name, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(name, value)
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        from backend.main import app
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+                yield client
+    finally:
+        os.chdir(previous_cwd)
+
+
+@asynccontextmanager
+async def uvicorn_client(workdir: str, workers: int):
+    port = _free_port()
+    env = {
+        **BENCHMARK_ENV,
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'benchmark.db')}",
+        "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])),
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=workdir,
+        env=env,
+    )
+
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+            deadline = time.monotonic() + SERVER_START_TIMEOUT
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+                try:
+                    if (await client.get("/openapi.json")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not become ready in time")
+                await asyncio.sleep(0.2)
+            yield client
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def _worker(user: VirtualUser, journeys: List[str], iterations: int, deadline: Optional[float],
+                  failures: Dict[str, int]) -> None:
+    iteration = 0
+    while (time.monotonic() < deadline) if deadline is not None else (iteration < iterations):
+        for name in journeys:
+            try:
+                await JOURNEYS[name](user)
+            except Exception:
+                failures[name] = failures.get(name, 0) + 1
+                if user.token is None:
+                    await JOURNEYS["login"](user)
+        iteration += 1
+
+
+async def run_benchmark(args) -> dict:
+    journeys = list(JOURNEYS) if args.journeys == "all" else args.journeys.split(",")
+    unknown = [name for name in journeys if name not in JOURNEYS]
+    if unknown:
+        raise SystemExit(f"Unknown journeys: {', '.join(unknown)} (available: {', '.join(JOURNEYS)})")
+
+    run_id = datetime.utcnow().strftime("%H%M%S%f")
+    with tempfile.TemporaryDirectory(prefix="authron-bench-") as workdir:
+        if args.target == "asgi":
+            client_context = asgi_client(workdir)
+        else:
+            client_context = uvicorn_client(workdir, args.workers)
+
+        async with client_context as client:
+            users = [VirtualUser(client, None, index, run_id) for index in range(args.concurrency)]
+            # Every other user has 2FA enabled so the login journey covers both flows.
+            for index, user in enumerate(users):
+                await setup_user(user, args.vault_size, with_2fa=index % 2 == 1)
+
+            failures: Dict[str, int] = {}
+            if args.warmup:
+                await asyncio.gather(*[_worker(user, journeys, args.warmup, None, {}) for user in users])
+
+            recorder = Recorder()
+            for user in users:
+                user.recorder = recorder
+
+            deadline = time.monotonic() + args.duration if args.duration else None
+            iterations = 0 if args.duration else args.iterations
+            start = time.perf_counter()
+            await asyncio.gather(*[_worker(user, journeys, iterations, deadline, failures) for user in users])
+            wall_time = time.perf_counter() - start
+
+    return {
+        "meta": {
+            "target": args.target,
+            "journeys": journeys,
+            "concurrency": args.concurrency,
+            "iterations": iterations,
+            "duration_s": args.duration,
+            "vault_size": args.vault_size,
+            "workers": args.workers if args.target == "uvicorn" else None,
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "git_revision": _git_revision(),
+        },
+        "journey_failures": failures,
+        "summary": summarize(recorder, wall_time),
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result: dict) -> None:
+    summary = result["summary"]
+    meta = result["meta"]
+    print(f"\nTarget: {meta['target']}  concurrency: {meta['concurrency']}  "
+          f"requests: {summary['requests']}  errors: {summary['errors']}  "
+          f"wall: {summary['wall_time_s']} s  throughput: {summary['throughput_rps']} req/s")
+    if result.get("journey_failures"):
+        print(f"Journey failures: {result['journey_failures']}")
+
+    print(f"\n{'endpoint':<48} {'count':>7} {'err':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, stats in summary["endpoints"].items():
+        print(f"{endpoint:<48} {stats['count']:>7} {stats['errors']:>5} {stats['throughput_rps']:>9} "
+              f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+
+
+def _delta(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def compare_results(before: dict, after: dict) -> None:
+    print(f"Throughput: {before['summary']['throughput_rps']} -> {after['summary']['throughput_rps']} req/s "
+          f"({_delta(before['summary']['throughput_rps'], after['summary']['throughput_rps'])})")
+
+    print(f"\n{'endpoint':<48} {'p50':>18} {'p95':>18} {'p99':>18}")
+    before_endpoints = before["summary"]["endpoints"]
+    for endpoint, stats in after["summary"]["endpoints"].items():
+        baseline = before_endpoints.get(endpoint)
+        if baseline is None:
+            print(f"{endpoint:<48} (new)")
+            continue
+        columns = [
+            f"{stats[key]:>8} {_delta(baseline[key], stats[key]):>9}"
+            for key in ("p50_ms", "p95_ms", "p99_ms")
+        ]
+        print(f"{endpoint:<48} " + " ".join(columns))
+
+    for endpoint in before_endpoints.keys() - after["summary"]["endpoints"].keys():
+        print(f"{endpoint:<48} (missing)")
+
+
+def _load(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Authron HTTP load and latency benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmark")
+    run.add_argument("--target", choices=("asgi", "uvicorn"), default="asgi")
+    run.add_argument("--journeys", default="all", help=f"comma-separated subset of: {', '.join(JOURNEYS)}")
+    run.add_argument("--concurrency", type=int, default=4, help="virtual users running in parallel")
+    run.add_argument("--iterations", type=int, default=10, help="journey rounds per virtual user")
+    run.add_argument("--duration", type=float, default=0, help="run for N seconds instead of a fixed number of rounds")
+    run.add_argument("--warmup", type=int, default=1, help="unrecorded rounds before measuring")
+    run.add_argument("--vault-size", type=int, default=50, help="password entries per virtual user")
+    run.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    run.add_argument("--output", help="write JSON results to this file")
+    run.add_argument("--compare", help="previous JSON result to compare against")
+
+    compare = commands.add_parser("compare", help="compare two saved results")
+    compare.add_argument("before")
+    compare.add_argument("after")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        compare_results(_load(args.before), _load(args.after))
+        return
+
+    # The ASGI target changes into a temporary directory while it runs.
+    args.output = os.path.abspath(args.output) if args.output else None
+    args.compare = os.path.abspath(args.compare) if args.compare else None
+
+    result = asyncio.run(run_benchmark(args))
+    print_report(result)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        print()
+        compare_results(_load(args.compare), result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+import httpx
+import pyotp
+
+API = "/api/v1"
+# Registration enforces the password policy; this satisfies the built-in rules.
+BENCH_PASSWORD = "Bench@12345678"
+
+
+class Recorder:
+    """Collects latencies per endpoint template (e.g. "GET /passwords/{id}/decrypt")."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, endpoint: str, duration: float, status_code: Optional[int], ok: bool) -> None:
+        self.latencies[endpoint].append(duration)
+        self.statuses[endpoint][status_code or 0] += 1
+        if not ok:
+            self.errors[endpoint] += 1
+
+
+class VirtualUser:
+    """One benchmark account with its own token and vault entries."""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Optional[Recorder], index: int, run_id: str):
+        self.client = client
+        self.recorder = recorder
+        self.email = f"bench{index}.{run_id}@example.com"
+        self.username = f"bench{index}_{run_id}"
+        self.token: Optional[str] = None
+        self.otp_secret: Optional[str] = None
+        self.password_ids: List[int] = []
+        self.team_id: Optional[int] = None
+        self.rng = random.Random(index)
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+    async def call(self, method: str, endpoint: str, path: str, expected: int = 200, **kwargs) -> httpx.Response:
+        """Sends one request and records it under `endpoint` (the route template, not the concrete path)."""
+        headers = dict(self.headers, **kwargs.pop("headers", {}))
+        start = time.perf_counter()
+        status_code = None
+        try:
+            response = await self.client.request(method, f"{API}{path}", headers=headers, **kwargs)
+            status_code = response.status_code
+            return response
+        finally:
+            if self.recorder is not None:
+                self.recorder.record(f"{method} {endpoint}", time.perf_counter() - start,
+                                     status_code, status_code == expected)
+
+    async def json(self, method: str, endpoint: str, path: str, expected: int = 200, **kwargs):
+        response = await self.call(method, endpoint, path, expected, **kwargs)
+        if response.status_code != expected:
+            raise RuntimeError(f"{method} {path} -> {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+
+async def setup_user(user: VirtualUser, vault_size: int, with_2fa: bool) -> None:
+    """Registers the account and fills its vault; runs unrecorded before the measurement."""
+    recorder, user.recorder = user.recorder, None
+    try:
+        await user.json("POST", "/auth/register", "/auth/register", expected=201, json={
+            "email": user.email,
+            "username": user.username,
+            "full_name": f"Benchmark {user.username}",
+            "password": BENCH_PASSWORD,
+        })
+        await _password_login(user)
+
+        for index in range(vault_size):
+            entry = await user.json("POST", "/passwords", "/passwords", expected=201, json={
+                "title": f"Service {index}",
+                "username": f"{user.username}-{index}",
+                "website": f"https://service{index}.example.com",
+                "password": f"Secret-{index}-{user.rng.random():.8f}",
+                "category": ("Allgemein", "Arbeit", "Privat")[index % 3],
+            })
+            user.password_ids.append(entry["id"])
+
+        for password_id in user.password_ids[: max(1, vault_size // 4)]:
+            await user.json("POST", "/totp/{password_id}/setup", f"/totp/{password_id}/setup",
+                            json={"totp_secret": pyotp.random_base32()})
+
+        team = await user.json("POST", "/teams", "/teams", expected=201,
+                               json={"name": f"Team {user.username}"})
+        user.team_id = team["id"]
+
+        if with_2fa:
+            setup = await user.json("POST", "/auth/2fa/setup", "/auth/2fa/setup")
+            user.otp_secret = setup["secret"]
+            await user.json("POST", "/auth/2fa/verify", "/auth/2fa/verify",
+                            json={"otp_code": pyotp.TOTP(user.otp_secret).now()})
+    finally:
+        user.recorder = recorder
+
+
+async def _password_login(user: VirtualUser) -> None:
+    data = await user.json("POST", "/auth/token", "/auth/token",
+                           data={"username": user.email, "password": BENCH_PASSWORD})
+    user.token = data["access_token"]
+
+
+async def login(user: VirtualUser) -> None:
+    user.token = None
+    if user.otp_secret is None:
+        await _password_login(user)
+        return
+
+    first = await user.json("POST", "/auth/login", "/auth/login",
+                            json={"email": user.email, "password": BENCH_PASSWORD})
+    if not first.get("requires_2fa"):
+        raise RuntimeError("2FA-Login ohne 2FA-Anforderung")
+    data = await user.json("POST", "/auth/login", "/auth/login", json={
+        "email": user.email,
+        "password": BENCH_PASSWORD,
+        "otp_code": pyotp.TOTP(user.otp_secret).now(),
+    })
+    user.token = data["access_token"]
+
+
+async def vault(user: VirtualUser) -> None:
+    await user.json("GET", "/passwords", "/passwords")
+    await user.json("GET", "/passwords?search=", "/passwords", params={"search": f"service{user.rng.randint(0, 9)}"})
+    await user.json("GET", "/passwords?category=", "/passwords", params={"category": "Arbeit"})
+
+
+async def decrypt(user: VirtualUser) -> None:
+    if not user.password_ids:
+        return
+    password_id = user.rng.choice(user.password_ids)
+    await user.json("GET", "/passwords/{password_id}/decrypt", f"/passwords/{password_id}/decrypt")
+    await user.json("POST", "/passwords/decrypt-batch", "/passwords/decrypt-batch",
+                    json={"ids": user.password_ids[:20]})
+
+
+async def totp(user: VirtualUser) -> None:
+    await user.json("GET", "/totp/codes", "/totp/codes")
+
+
+async def team_share(user: VirtualUser) -> None:
+    shared = await user.json("POST", "/shared/passwords", "/shared/passwords", expected=201, json={
+        "title": f"Shared {user.rng.randint(0, 10 ** 6)}",
+        "username": user.username,
+        "password": "Shared-Secret-1",
+        "team_id": user.team_id,
+    })
+    await user.json("GET", "/shared/passwords", "/shared/passwords")
+    await user.json("GET", "/shared/passwords/{password_id}/decrypt", f"/shared/passwords/{shared['id']}/decrypt")
+    await user.json("DELETE", "/shared/passwords/{password_id}", f"/shared/passwords/{shared['id']}")
+
+
+async def export_import(user: VirtualUser) -> None:
+    exported = await user.call("GET", "/export-import/export/{format}", "/export-import/export/json")
+    if exported.status_code != 200:
+        raise RuntimeError(f"Export fehlgeschlagen: {exported.status_code}")
+
+    entries = json.loads(exported.content)
+    # Re-importing the export exercises the duplicate check for every entry.
+    await user.json("POST", "/export-import/import", "/export-import/import",
+                    files={"file": ("export.json", json.dumps(entries).encode("utf-8"), "application/json")})
+
+
+JOURNEYS: Dict[str, Callable] = {
+    "login": login,
+    "vault": vault,
+    "decrypt": decrypt,
+    "totp": totp,
+    "team_share": team_share,
+    "export_import": export_import,
+}
@@ -0,0 +1,194 @@
+"""Local SMTP stand-in for testing email delivery without a real mail server.
+
+Accepts any login and every message, optionally failing a share of them to
+exercise the outbox retries, and reports how many connections and messages
+it saw. Point the API at it with::
+
+    python -m backend.benchmarks.smtp_sink --port 2525 --fail-rate 0.2 --maildir /tmp/mails
+    SMTP_SERVER=127.0.0.1 SMTP_PORT=2525 SMTP_STARTTLS=false uvicorn backend.main:app
+
+`--fail-rate` answers that share of messages with a temporary 451 (the
+outbox retries them), `--reject-domain` refuses recipients of a domain with
+a permanent 550, and `--delay-ms` slows down every reply to simulate a
+remote server. Use `SmtpSink.start_in_thread()` to run it inside a script.
+"""
+import argparse
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import List, Optional, Sequence
+
+
+class SmtpSink:
+    def __init__(self, host: str = "127.0.0.1", port: int = 2525, fail_rate: float = 0.0,
+                 reject_domain: Optional[str] = None, delay_ms: float = 0.0, maildir: Optional[str] = None,
+                 seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.fail_rate = fail_rate
+        self.reject_domain = reject_domain.lower() if reject_domain else None
+        self.delay = delay_ms / 1000
+        self.maildir = maildir
+        self._random = random.Random(seed)
+        self.connections = 0
+        self.accepted = 0
+        self.failed = 0
+        self.rejected = 0
+        self.messages: List[dict] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.connections,
+            "accepted": self.accepted,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    async def _reply(self, writer: asyncio.StreamWriter, line: str) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        writer.write(line.encode() + b"\r\n")
+        await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        sender, recipients = None, []
+        try:
+            await self._reply(writer, "220 authron-smtp-sink ESMTP")
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                line = raw.decode(errors="replace").rstrip("\r\n")
+                command = line[:4].upper()
+
+                if command == "EHLO":
+                    await self._reply(writer, "250-authron-smtp-sink\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME")
+                elif command == "HELO":
+                    await self._reply(writer, "250 authron-smtp-sink")
+                elif command == "AUTH":
+                    parts = line.split()
+                    if len(parts) > 1 and parts[1].upper() == "LOGIN":
+                        for prompt in ("VXNlcm5hbWU6", "UGFzc3dvcmQ6"):
+                            if len(parts) > 2 and prompt == "VXNlcm5hbWU6":
+                                continue
+                            await self._reply(writer, f"334 {prompt}")
+                            await reader.readline()
+                    elif len(parts) == 2:
+                        await self._reply(writer, "334 ")
+                        await reader.readline()
+                    await self._reply(writer, "235 Authentication successful")
+                elif command == "MAIL":
+                    sender, recipients = line[10:].strip(), []
+                    await self._reply(writer, "250 OK")
+                elif command == "RCPT":
+                    recipient = line[8:].strip().strip("<>")
+                    if self.reject_domain and recipient.lower().endswith("@" + self.reject_domain):
+                        self.rejected += 1
+                        await self._reply(writer, "550 Mailbox unavailable")
+                    else:
+                        recipients.append(recipient)
+                        await self._reply(writer, "250 OK")
+                elif command == "DATA":
+                    await self._reply(writer, "354 End data with <CR><LF>.<CR><LF>")
+                    data = []
+                    while True:
+                        chunk = await reader.readline()
+                        if not chunk or chunk in (b".\r\n", b".\n"):
+                            break
+                        data.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                    if self._random.random() < self.fail_rate:
+                        self.failed += 1
+                        await self._reply(writer, "451 Temporary failure, try again later")
+                    else:
+                        self._store(sender, recipients, b"".join(data))
+                        await self._reply(writer, "250 OK: queued")
+                elif command == "RSET":
+                    sender, recipients = None, []
+                    await self._reply(writer, "250 OK")
+                elif command == "NOOP":
+                    await self._reply(writer, "250 OK")
+                elif command == "QUIT":
+                    await self._reply(writer, "221 Bye")
+                    break
+                elif command == "STAR":
+                    await self._reply(writer, "454 TLS not available")
+                else:
+                    await self._reply(writer, "502 Command not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _store(self, sender: Optional[str], recipients: List[str], data: bytes) -> None:
+        self.accepted += 1
+        message = {"from": sender, "to": recipients, "size": len(data), "received": time.time()}
+        self.messages.append(message)
+        if self.maildir:
+            path = os.path.join(self.maildir, f"{int(time.time() * 1000)}-{self.accepted}.eml")
+            with open(path, "wb") as f:
+                f.write(data)
+
+    async def start(self) -> None:
+        if self.maildir:
+            os.makedirs(self.maildir, exist_ok=True)
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self) -> "SmtpSink":
+        """Runs the sink on a daemon thread and returns once it accepts connections (port 0 picks a free port)."""
+        ready = threading.Event()
+
+        def run() -> None:
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(self.start())
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name="smtp-sink", daemon=True).start()
+        ready.wait()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Local SMTP stand-in for testing email delivery")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of messages answered with 451")
+    parser.add_argument("--reject-domain", help="refuse recipients of this domain with 550")
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="delay before every reply")
+    parser.add_argument("--maildir", help="write received messages as .eml files into this directory")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="seconds between statistics lines")
+    args = parser.parse_args(argv)
+
+    sink = SmtpSink(args.host, args.port, args.fail_rate, args.reject_domain, args.delay_ms, args.maildir)
+
+    async def run() -> None:
+        await sink.start()
+        print(f"SMTP sink listening on {sink.host}:{sink.port}")
+        while True:
+            await asyncio.sleep(args.report_interval)
+            print(sink.stats(), flush=True)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print(sink.stats())
+
+
+if __name__ == "__main__":
+    main()
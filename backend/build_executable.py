@@ -16,6 +16,7 @@ def build_backend():
         '--workpath=build',
         '--specpath=.',
         '--add-data=translations:translations',
+        '--add-data=data:data',
         '--paths=.',
         '--paths=..',
         '--hidden-import=uvicorn.main',
@@ -1,6 +1,7 @@
 
 from backend.database.database import engine, SessionLocal
 from backend.database.models import Base, User
+from backend.database.migrations import ensure_columns
 from backend.security.utils import get_password_hash
 import logging
 
@@ -10,6 +11,7 @@ logger = logging.getLogger(__name__)
 def init_db():
     logger.info("Creating tables...")
     Base.metadata.create_all(bind=engine)
+    ensure_columns(engine)
     logger.info("Tables created")
 
     db = SessionLocal()
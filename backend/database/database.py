@@ -1,18 +1,48 @@
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./password_manager.db"
+from backend.database.instrumentation import instrument_engine
+
+SQLALCHEMY_DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./password_manager.db")
+
+engine_options = {}
+if SQLALCHEMY_DATABASE_URL in ("sqlite://", "sqlite:///:memory:"):
+    # An in-memory database exists per connection; share one across threads (used by the tests).
+    engine_options["poolclass"] = StaticPool
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, **engine_options
 )
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+_shared_session: ContextVar = ContextVar("shared_session", default=None)
+
+
+@contextmanager
+def shared_session(db):
+    """Lets get_db hand out the given session instead of opening a new one."""
+    token = _shared_session.set(db)
+    try:
+        yield db
+    finally:
+        _shared_session.reset(token)
+
+
 # Dependency
 def get_db():
+    shared = _shared_session.get()
+    if shared is not None:
+        yield shared
+        return
+
     db = SessionLocal()
     try:
         yield db
@@ -0,0 +1,140 @@
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import event
+
+from backend.monitoring.metrics import registry
+from backend.monitoring.tracing import current_trace, record_span
+
+SQL_DEBUG = os.environ.get("SQL_DEBUG", "").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "100"))
+
+slow_query_logger = logging.getLogger("backend.database.slow_query")
+
+db_queries_total = registry.counter(
+    "authron_db_queries_total",
+    "SQL statements executed.",
+)
+db_query_duration_seconds = registry.histogram(
+    "authron_db_query_duration_seconds",
+    "SQL statement execution time.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryStats:
+    """Number and total duration of SQL statements within one request."""
+
+    def __init__(self, keep_statements: bool = False):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Optional[List[str]] = [] if keep_statements else None
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        if self.statements is not None:
+            self.statements.append(normalize_sql(statement))
+
+
+_query_stats: ContextVar = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries():
+    """Collects QueryStats for all statements executed in the current context."""
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def normalize_sql(statement: str) -> str:
+    """Strips literals and collapses IN-lists so equal query shapes compare equal."""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(?...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def parameter_shape(parameters, executemany: bool = False) -> str:
+    """Describes bind parameters by type only, never by value."""
+    if executemany:
+        rows = list(parameters or [])
+        first = parameter_shape(rows[0]) if rows else "()"
+        return f"{len(rows)} x {first}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - context._query_start
+
+    db_queries_total.inc()
+    db_query_duration_seconds.observe(value=duration)
+
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+    if current_trace() is not None:
+        record_span("db.query", context._query_start, duration, statement=normalize_sql(statement))
+
+    if duration * 1000 >= SLOW_QUERY_MS:
+        slow_query_logger.warning(
+            f"Slow query ({duration * 1000:.1f} ms): {normalize_sql(statement)} "
+            f"params={parameter_shape(parameters, executemany)}"
+        )
+
+
+def instrument_engine(engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(limit: int, engine=None):
+    """Test helper failing when more than `limit` statements run inside the block.
+
+    Counts on the engine itself rather than via the request context, so it also
+    sees queries issued from TestClient's worker thread::
+
+        with assert_max_queries(3):
+            client.get("/api/v1/passwords", headers=headers)
+    """
+    if engine is None:
+        from backend.database.database import engine
+
+    stats = QueryStats(keep_statements=True)
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        stats.record(statement, 0.0)
+
+    event.listen(engine, "after_cursor_execute", count)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "after_cursor_execute", count)
+
+    if stats.count > limit:
+        statements = "\n".join(f"  {index + 1}. {sql}" for index, sql in enumerate(stats.statements))
+        raise AssertionError(f"{stats.count} queries executed, expected at most {limit}:\n{statements}")
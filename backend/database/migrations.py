@@ -0,0 +1,59 @@
+import logging
+from typing import List
+
+from sqlalchemy import inspect, literal
+
+logger = logging.getLogger(__name__)
+
+
+def _default_sql(column, dialect) -> str:
+    default = column.default
+    if default is None or not default.is_scalar:
+        return ""
+    return " DEFAULT " + str(literal(default.arg).compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+
+def ensure_columns(engine, metadata=None) -> List[str]:
+    """Adds columns that exist in the models but not yet in the database.
+
+    create_all only creates missing tables, so databases created by older
+    versions would lack new columns. Scalar defaults are applied to existing
+    rows; missing non-unique indexes are created as well. Columns that cannot
+    be added with ALTER TABLE (primary keys, unique constraints) are not
+    handled.
+    """
+    if metadata is None:
+        from backend.database.models import Base
+        metadata = Base.metadata
+
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.exec_driver_sql(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+                    f"{_default_sql(column, engine.dialect)}"
+                )
+                for index in table.indexes:
+                    if column.name in index.columns:
+                        index.create(conn, checkfirst=True)
+                added.append(f"{table.name}.{column.name}")
+
+            # Indexes added later to existing columns; unique ones could fail on existing rows.
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if not index.unique and index.name not in existing_indexes:
+                    index.create(conn, checkfirst=True)
+
+    for name in added:
+        logger.info(f"Added column {name}")
+    return added
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
 from backend.database.database import Base
+from backend.database.types import Ciphertext
 
 class User(Base):
     __tablename__ = "users"
@@ -16,26 +17,48 @@ class User(Base):
     is_admin = Column(Boolean, default=False)
     otp_secret = Column(String, nullable=True)
     otp_enabled = Column(Boolean, default=False)
+    token_version = Column(Integer, default=0, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     passwords = relationship("Password", back_populates="owner", cascade="all, delete-orphan")
     settings = relationship("UserSettings", back_populates="user", uselist=False, cascade="all, delete-orphan")
     team_memberships = relationship("TeamMember", back_populates="user", cascade="all, delete-orphan")
+    sessions = relationship("UserSession", back_populates="user", cascade="all, delete-orphan")
 
 class Password(Base):
     __tablename__ = "passwords"
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
-    username = Column(String)
-    email = Column(String)
-    website = Column(String)
-    encrypted_password = Column(String)
+    # Plain text, or encrypted (bytes) with ENCRYPT_METADATA; searched via the blind indexes.
+    username = Column(Ciphertext)
+    email = Column(Ciphertext)
+    website = Column(Ciphertext)
+    username_bidx = Column(String(32), index=True, nullable=True)
+    email_bidx = Column(String(32), index=True, nullable=True)
+    website_bidx = Column(String(32), index=True, nullable=True)
+    # Autofill lookup; blind indexes instead of plain values with ENCRYPT_METADATA.
+    host = Column(String, nullable=True)
+    registrable_domain = Column(String, index=True, nullable=True)
+    encrypted_password = Column(Ciphertext)
+    # Password health, kept current on every write so reports need no decryption.
+    password_fingerprint = Column(String(32), index=True, nullable=True)
+    # Identifies the fingerprint key, so fingerprints are recomputed when it changes.
+    fingerprint_key_id = Column(String(8), nullable=True)
+    password_strength = Column(Integer, nullable=True)
+    password_changed_at = Column(DateTime, index=True, nullable=True)
+    password_breached = Column(Boolean, nullable=True)
+    breach_checked_at = Column(DateTime, nullable=True)
+    # Compliance with the password policies, as of the policy version it was checked against.
+    policy_compliant = Column(Boolean, index=True, nullable=True)
+    policy_violations = Column(String, nullable=True)
+    policy_version = Column(String(16), index=True, nullable=True)
+    password_expires_at = Column(DateTime, index=True, nullable=True)
     category = Column(String, default="Other")
     notes = Column(String, nullable=True)
     favorite = Column(Boolean, default=False)
-    totp_secret = Column(String, nullable=True)
+    totp_secret = Column(Ciphertext, nullable=True)
     totp_enabled = Column(Boolean, default=False)
     last_used = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -45,6 +68,63 @@ class Password(Base):
     owner = relationship("User", back_populates="passwords")
 
 
+class UserSession(Base):
+    __tablename__ = "user_sessions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    token_hash = Column(String(64))
+    previous_token_hash = Column(String(64), nullable=True)
+    ip_address = Column(String, nullable=True)
+    user_agent = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, index=True)
+
+    user = relationship("User", back_populates="sessions")
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(32), primary_key=True)
+    expires_at = Column(DateTime, index=True)
+
+
+class DataKey(Base):
+    __tablename__ = "data_keys"
+    __table_args__ = (UniqueConstraint("owner_type", "owner_id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_type = Column(String(8))
+    owner_id = Column(Integer)
+    wrapped_key = Column(String)
+    master_key_id = Column(String(8))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    rotated_at = Column(DateTime, nullable=True)
+
+
+class KeyRotationJob(Base):
+    __tablename__ = "key_rotation_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, default="running")
+    target_key_id = Column(String)
+    current_target = Column(String, nullable=True)
+    last_id = Column(Integer, default=0)
+    total = Column(Integer, default=0)
+    processed = Column(Integer, default=0)
+    rotated = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    batch_size = Column(Integer, default=500)
+    throttle_ms = Column(Integer, default=50)
+    error = Column(String, nullable=True)
+    started_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
 class UserSettings(Base):
     __tablename__ = "user_settings"
 
@@ -91,7 +171,9 @@ class SharedPassword(Base):
     username = Column(String)
     email = Column(String, nullable=True)
     website = Column(String, nullable=True)
-    encrypted_password = Column(String)
+    host = Column(String, nullable=True)
+    registrable_domain = Column(String, index=True, nullable=True)
+    encrypted_password = Column(Ciphertext)
     category = Column(String, default="Shared")
     notes = Column(String, nullable=True)
     team_id = Column(Integer, ForeignKey("teams.id"))
@@ -105,17 +187,35 @@ class SharedPasswordInvite(Base):
     __tablename__ = "shared_password_invites"
 
     id = Column(Integer, primary_key=True, index=True)
-    password_id = Column(Integer, ForeignKey("passwords.id"))
-    sender_id = Column(Integer, ForeignKey("users.id"))
+    password_id = Column(Integer, ForeignKey("passwords.id"), index=True)
+    sender_id = Column(Integer, ForeignKey("users.id"), index=True)
     recipient_email = Column(String, index=True)
     invite_token = Column(String, unique=True, index=True)
-    status = Column(String, default="pending")
-    expires_at = Column(DateTime)
+    # pending -> accepted / rejected, or expired by the invite sweeper.
+    status = Column(String, default="pending", index=True)
+    expires_at = Column(DateTime, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     password = relationship("Password")
     sender = relationship("User")
 
 
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String)
+    subject = Column(String)
+    body = Column(String)
+    # pending -> sending -> sent, or failed after permanent errors / too many attempts.
+    status = Column(String, default="pending", index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, index=True)
+    claim_token = Column(String(32), nullable=True, index=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+
 class PasswordPolicy(Base):
     __tablename__ = "password_policies"
 
@@ -0,0 +1,31 @@
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+
+class Ciphertext(TypeDecorator):
+    """Encrypted value column: binary AEAD ciphertext as bytes, anything else as str.
+
+    Text values are legacy Fernet tokens, or plain metadata while
+    ENCRYPT_METADATA is off. Rows written before the binary format keep their
+    text value until they are written again. Text values are bound as text, so
+    comparisons against them (e.g. the compare-and-set updates of the rotation
+    job) still match; SQLite stores either kind in the same column.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def bind_processor(self, dialect):
+        process = self.impl_instance.bind_processor(dialect)
+
+        def bind(value):
+            if value is None or isinstance(value, str) or process is None:
+                return value
+            return process(value)
+
+        return bind
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, memoryview):
+            return value.tobytes()
+        return value
@@ -0,0 +1,396 @@
+import logging
+import math
+import os
+import random
+import secrets
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, func, insert, or_, update
+from sqlalchemy.orm import Session
+
+from backend.database.database import SessionLocal
+from backend.database.models import EmailOutbox
+from backend.monitoring.metrics import registry
+from backend.scheduler import scheduler
+
+SMTP_SERVER = os.environ.get("SMTP_SERVER", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", "587"))
+SMTP_USERNAME = os.environ.get("SMTP_USERNAME")
+SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD")
+SMTP_FROM = os.environ.get("SMTP_FROM") or SMTP_USERNAME or "authron@localhost"
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes")
+SMTP_TIMEOUT = float(os.environ.get("SMTP_TIMEOUT", "30"))
+# Connections kept open between batches; idle ones are closed after SMTP_IDLE_TIMEOUT.
+SMTP_POOL_SIZE = int(os.environ.get("SMTP_POOL_SIZE", "2"))
+SMTP_IDLE_TIMEOUT = float(os.environ.get("SMTP_IDLE_TIMEOUT", "60"))
+
+OUTBOX_POLL_SECONDS = float(os.environ.get("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_RETRY_BASE = float(os.environ.get("OUTBOX_RETRY_BASE", "30"))
+OUTBOX_RETRY_MAX = float(os.environ.get("OUTBOX_RETRY_MAX", "3600"))
+OUTBOX_RETENTION_DAYS = int(os.environ.get("OUTBOX_RETENTION_DAYS", "7"))
+# A claimed message whose sender died is picked up again after its lease. The
+# lease covers the worst case of the claimed batch (every SMTP command taking
+# SMTP_TIMEOUT), so a slow but live sender never loses its claim; this is the
+# minimum.
+OUTBOX_CLAIM_LEASE = timedelta(minutes=5)
+# Blocking SMTP operations per connection setup (connect, greeting, EHLO,
+# STARTTLS, EHLO, AUTH) and per message (MAIL, RCPT, DATA, data + reply).
+SMTP_CONNECT_OPERATIONS = 6
+SMTP_MESSAGE_OPERATIONS = 4
+
+STATUS_PENDING = "pending"
+STATUS_SENDING = "sending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+logger = logging.getLogger(__name__)
+
+email_sent_total = registry.counter(
+    "authron_email_sent_total",
+    "Emails delivered to the SMTP server.",
+)
+email_failures_total = registry.counter(
+    "authron_email_failures_total",
+    "Failed delivery attempts; 'retry' is rescheduled, 'permanent' is given up.",
+    ("kind",),
+)
+email_send_duration_seconds = registry.histogram(
+    "authron_email_send_duration_seconds",
+    "Time to hand a single message to the SMTP server.",
+)
+smtp_connections_total = registry.counter(
+    "authron_smtp_connections_total",
+    "SMTP connections opened (including STARTTLS and login).",
+)
+
+
+def mail_enabled() -> bool:
+    """Mail is sent if credentials are configured or an SMTP server is set explicitly (e.g. a relay)."""
+    return bool(SMTP_USERNAME and SMTP_PASSWORD) or "SMTP_SERVER" in os.environ
+
+
+def enqueue_email(db: Session, recipient: str, subject: str, body: str) -> Optional[EmailOutbox]:
+    """Adds a message to the outbox; it is stored with the caller's commit and sent in the background."""
+    if not mail_enabled():
+        logger.info("E-Mail-Konfiguration fehlt - E-Mail wird nicht gesendet")
+        return None
+    message = EmailOutbox(recipient=recipient, subject=subject, body=body, next_attempt_at=datetime.utcnow())
+    db.add(message)
+    return message
+
+
+def enqueue_emails(db: Session, messages: Iterable[Tuple[str, str, str]]) -> int:
+    """Adds (recipient, subject, body) messages with a single multi-row INSERT; stored with the caller's commit."""
+    if not mail_enabled():
+        logger.info("E-Mail-Konfiguration fehlt - E-Mails werden nicht gesendet")
+        return 0
+    now = datetime.utcnow()
+    rows = [
+        {"recipient": recipient, "subject": subject, "body": body, "status": STATUS_PENDING,
+         "attempts": 0, "next_attempt_at": now, "created_at": now}
+        for recipient, subject, body in messages
+    ]
+    if rows:
+        db.execute(insert(EmailOutbox), rows)
+    return len(rows)
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter, so failed messages do not retry in lockstep."""
+    delay = min(OUTBOX_RETRY_BASE * 2 ** max(attempts - 1, 0), OUTBOX_RETRY_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class SmtpPool:
+    """Keeps authenticated SMTP connections open across batches.
+
+    Opening a connection costs a TCP and TLS handshake plus login; reusing it
+    reduces a message to a single SMTP transaction. Connections that were
+    idle longer than SMTP_IDLE_TIMEOUT are closed, and a NOOP checks the
+    others before use, since servers drop idle clients.
+    """
+
+    def __init__(self, size: int = SMTP_POOL_SIZE, idle_timeout: float = SMTP_IDLE_TIMEOUT):
+        self.size = max(size, 1)
+        self.idle_timeout = idle_timeout
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        try:
+            connection.ehlo()
+            if SMTP_STARTTLS:
+                connection.starttls()
+                connection.ehlo()
+            if SMTP_USERNAME and SMTP_PASSWORD:
+                connection.login(SMTP_USERNAME, SMTP_PASSWORD)
+        except Exception:
+            self._close(connection)
+            raise
+        smtp_connections_total.inc()
+        return connection
+
+    @staticmethod
+    def _close(connection: smtplib.SMTP) -> None:
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
+
+    def acquire(self) -> smtplib.SMTP:
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, released = self._idle.pop()
+            if now - released > self.idle_timeout:
+                self._close(connection)
+                continue
+            try:
+                if connection.noop()[0] == 250:
+                    return connection
+            except (smtplib.SMTPException, OSError):
+                pass
+            connection.close()
+        return self._connect()
+
+    def release(self, connection: smtplib.SMTP, broken: bool = False) -> None:
+        if broken:
+            connection.close()
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((connection, time.monotonic()))
+                return
+        self._close(connection)
+
+    def close_idle(self, max_idle: Optional[float] = None) -> None:
+        """Closes idle connections (all of them without max_idle)."""
+        now = time.monotonic()
+        with self._lock:
+            idle, self._idle = self._idle, []
+            for connection, released in idle:
+                if max_idle is not None and now - released <= max_idle:
+                    self._idle.append((connection, released))
+        for connection, released in idle:
+            if max_idle is None or now - released > max_idle:
+                self._close(connection)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"idle": len(self._idle), "size": self.size}
+
+
+class OutboxSender:
+    """Background delivery of the email outbox.
+
+    Each run claims a batch of due messages with a claim token (so several
+    worker processes never send the same message), splits it over the pooled
+    connections and records the outcome per message. The claim lease is
+    sized for the batch (see claim_lease), and outcomes are only written
+    while the row still carries the run's claim token. Claiming counts as an
+    attempt, so a message whose sender keeps dying is failed after
+    OUTBOX_MAX_ATTEMPTS like any other. Temporary failures (4xx replies,
+    connection errors) are retried with exponential backoff up to
+    OUTBOX_MAX_ATTEMPTS; permanent 5xx replies fail the message at once.
+    Sent messages are deleted after OUTBOX_RETENTION_DAYS.
+    """
+
+    def __init__(self, pool: SmtpPool):
+        self.pool = pool
+        self._executor = ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="smtp")
+
+    def claim_lease(self, count: int) -> timedelta:
+        """Longest time sending `count` messages over the pool can take."""
+        per_connection = math.ceil(count / self.pool.size)
+        operations = SMTP_CONNECT_OPERATIONS + per_connection * SMTP_MESSAGE_OPERATIONS
+        return max(OUTBOX_CLAIM_LEASE, timedelta(seconds=operations * SMTP_TIMEOUT))
+
+    def _claim(self, db: Session, batch_size: int) -> List[EmailOutbox]:
+        now = datetime.utcnow()
+        # The sender of these died during every attempt (or they took it down).
+        abandoned = db.query(EmailOutbox).filter(
+            EmailOutbox.status == STATUS_SENDING,
+            EmailOutbox.next_attempt_at <= now,
+            EmailOutbox.attempts >= OUTBOX_MAX_ATTEMPTS
+        ).update({
+            EmailOutbox.status: STATUS_FAILED,
+            EmailOutbox.claim_token: None,
+            EmailOutbox.last_error: "Claim lease expired on the last attempt",
+        }, synchronize_session=False)
+        if abandoned:
+            email_failures_total.inc("permanent", amount=abandoned)
+            logger.error(f"{abandoned} E-Mails endgültig fehlgeschlagen: Versand wiederholt abgebrochen")
+
+        due = or_(
+            EmailOutbox.status == STATUS_PENDING,
+            EmailOutbox.status == STATUS_SENDING  # lease of a crashed sender expired
+        )
+        ids = [message_id for (message_id,) in db.query(EmailOutbox.id).filter(
+            due, EmailOutbox.next_attempt_at <= now
+        ).order_by(EmailOutbox.next_attempt_at).limit(batch_size)]
+        if not ids:
+            db.commit()
+            return []
+
+        token = secrets.token_hex(16)
+        db.query(EmailOutbox).filter(
+            EmailOutbox.id.in_(ids), due, EmailOutbox.next_attempt_at <= now
+        ).update({
+            EmailOutbox.status: STATUS_SENDING,
+            EmailOutbox.claim_token: token,
+            EmailOutbox.attempts: EmailOutbox.attempts + 1,
+            EmailOutbox.next_attempt_at: now + self.claim_lease(len(ids)),
+        }, synchronize_session=False)
+        db.commit()
+        return db.query(EmailOutbox).filter(EmailOutbox.claim_token == token).all()
+
+    @staticmethod
+    def _build(message: EmailOutbox) -> MIMEMultipart:
+        msg = MIMEMultipart()
+        msg["From"] = SMTP_FROM
+        msg["To"] = message.recipient
+        msg["Subject"] = message.subject
+        msg.attach(MIMEText(message.body, "plain"))
+        return msg
+
+    def _send_chunk(self, messages: List[Tuple[int, MIMEMultipart]]) -> List[Tuple[int, Optional[Exception]]]:
+        results = []
+        connection = None
+        for index, (message_id, msg) in enumerate(messages):
+            if connection is None:
+                try:
+                    connection = self.pool.acquire()
+                except (smtplib.SMTPException, OSError) as e:
+                    # Server unreachable: no point in connecting once per message.
+                    results.extend((remaining_id, e) for remaining_id, _ in messages[index:])
+                    break
+            started = time.perf_counter()
+            try:
+                connection.send_message(msg)
+                results.append((message_id, None))
+                email_send_duration_seconds.observe(value=time.perf_counter() - started)
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                # The server rejected this message; the connection is still usable.
+                results.append((message_id, e))
+            except (smtplib.SMTPException, OSError) as e:
+                results.append((message_id, e))
+                self.pool.release(connection, broken=True)
+                connection = None
+        if connection is not None:
+            self.pool.release(connection)
+        return results
+
+    @staticmethod
+    def _is_permanent(error: Exception) -> bool:
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return all(code >= 500 for code, _ in error.recipients.values())
+        code = getattr(error, "smtp_code", None)
+        return isinstance(code, int) and code >= 500 and not isinstance(error, smtplib.SMTPServerDisconnected)
+
+    def run(self, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+        """Sends one batch; returns the number of delivered messages."""
+        if not mail_enabled():
+            return 0
+        with SessionLocal() as db:
+            messages = self._claim(db, batch_size)
+            if not messages:
+                self.pool.close_idle(self.pool.idle_timeout)
+                self._purge(db)
+                return 0
+
+            prepared = [(message.id, self._build(message)) for message in messages]
+            chunks = [prepared[i::self.pool.size] for i in range(self.pool.size) if prepared[i::self.pool.size]]
+            results = [result for chunk in self._executor.map(self._send_chunk, chunks) for result in chunk]
+
+            by_id = {message.id: message for message in messages}
+            token = messages[0].claim_token
+            now = datetime.utcnow()
+            sent = 0
+            outcomes = []
+            for message_id, error in results:
+                message = by_id[message_id]
+                outcome = {"row_id": message_id, "new_status": STATUS_SENT, "new_sent_at": now,
+                           "new_error": None, "new_next_attempt_at": message.next_attempt_at}
+                outcomes.append(outcome)
+                if error is None:
+                    sent += 1
+                    continue
+
+                outcome["new_sent_at"] = None
+                outcome["new_error"] = f"{type(error).__name__}: {error}"[:500]
+                if self._is_permanent(error) or message.attempts >= OUTBOX_MAX_ATTEMPTS:
+                    outcome["new_status"] = STATUS_FAILED
+                    email_failures_total.inc("permanent")
+                    logger.error(f"E-Mail {message.id} an {message.recipient} endgültig fehlgeschlagen: {error}")
+                else:
+                    outcome["new_status"] = STATUS_PENDING
+                    outcome["new_next_attempt_at"] = now + timedelta(seconds=retry_delay(message.attempts))
+                    email_failures_total.inc("retry")
+                    logger.warning(f"E-Mail {message.id} wird erneut versucht (Versuch {message.attempts}): {error}")
+
+            # Rows reclaimed by another sender after an expired lease belong to it now.
+            table = EmailOutbox.__table__
+            result = db.connection().execute(
+                update(table).where(and_(
+                    table.c.id == bindparam("row_id"),
+                    table.c.claim_token == token
+                )).values(
+                    status=bindparam("new_status"),
+                    sent_at=bindparam("new_sent_at"),
+                    last_error=bindparam("new_error"),
+                    next_attempt_at=bindparam("new_next_attempt_at"),
+                    claim_token=None,
+                ),
+                outcomes,
+            )
+            db.commit()
+            if 0 <= result.rowcount < len(outcomes):
+                logger.warning(f"{len(outcomes) - result.rowcount} E-Mails wurden nach Ablauf der Lease neu vergeben")
+
+        if sent:
+            email_sent_total.inc(amount=sent)
+        return sent
+
+    @staticmethod
+    def _purge(db: Session) -> None:
+        cutoff = datetime.utcnow() - timedelta(days=OUTBOX_RETENTION_DAYS)
+        deleted = db.query(EmailOutbox).filter(
+            EmailOutbox.status == STATUS_SENT,
+            EmailOutbox.sent_at < cutoff
+        ).delete(synchronize_session=False)
+        if deleted:
+            db.commit()
+
+    def counts(self) -> dict:
+        with SessionLocal() as db:
+            return dict(db.query(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status).all())
+
+    def close(self) -> None:
+        self.pool.close_idle()
+
+
+outbox_sender = OutboxSender(SmtpPool())
+
+
+def schedule_outbox_sender() -> None:
+    scheduler.add_job(
+        outbox_sender.run,
+        "interval",
+        seconds=OUTBOX_POLL_SECONDS,
+        id="email_outbox",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
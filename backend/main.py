@@ -1,11 +1,21 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import logging
+import os
+import secrets
 from contextlib import asynccontextmanager
 
 from backend.api.v1 import auth, passwords, admin, user_settings, translations
 from backend.database.database import engine
 from backend.database.models import Base
+from backend.database.migrations import ensure_columns
+from backend.monitoring.metrics import registry
+from backend.monitoring.middleware import MetricsMiddleware, QueryStatsMiddleware
+from backend.monitoring.profiler import ProfilerMiddleware
+from backend.monitoring.tracing import TracingMiddleware, TracedJSONResponse
+from backend.database.instrumentation import SQL_DEBUG
+from backend.monitoring import collectors  # noqa: F401 - registers scrape-time collectors
 from backend.api.v1 import (
     auth,
     passwords,
@@ -21,7 +31,10 @@ from backend.api.v1 import (
     policy,
     logs,
     export_import,
-    password_sharing
+    password_sharing,
+    batch,
+    profiling,
+    key_rotation
 )
 
 logging.basicConfig(
@@ -31,19 +44,47 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Bearer token for /metrics; without it the endpoint is disabled, as the
+# metrics include business data and every scrape runs COUNT queries.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    ensure_columns(engine)
 
     # Erstelle Admin-Account falls er nicht existiert
     from backend.create_tables import init_db
     init_db()
 
+    from backend.security.sessions import session_store, schedule_session_cleanup
+    from backend.security.revocation import token_revocation, schedule_revocation_purge
+    logger.info(f"Loaded {session_store.load()} active sessions")
+    schedule_session_cleanup()
+    token_revocation.load()
+    schedule_revocation_purge()
+
+    from backend.security.key_rotation import key_rotation
+    key_rotation.resume_interrupted()
+
+    from backend.security.blind_index import schedule_metadata_backfill
+    schedule_metadata_backfill()
+
+    from backend.security.health import schedule_health_backfill
+    schedule_health_backfill()
+
+    from backend.mail.outbox import outbox_sender, schedule_outbox_sender
+    schedule_outbox_sender()
+
+    from backend.api.v1.password_sharing import schedule_invite_sweeper
+    schedule_invite_sweeper()
+
     logger.info("Database ready")
     yield
     logger.info("Shutting down application")
+    outbox_sender.close()
 
 
 app = FastAPI(
@@ -51,6 +92,7 @@ app = FastAPI(
     description="Secure password management API",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=TracedJSONResponse,
 )
 
 origins = [
@@ -69,6 +111,11 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["*"],
 )
+app.add_middleware(ProfilerMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware)
+if SQL_DEBUG:
+    app.add_middleware(QueryStatsMiddleware)
 
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(passwords.router, prefix="/api/v1")
@@ -85,6 +132,9 @@ app.include_router(policy.router, prefix="/api/v1")
 app.include_router(logs.router, prefix="/api/v1")
 app.include_router(export_import.router, prefix="/api/v1")
 app.include_router(password_sharing.router, prefix="/api/v1")
+app.include_router(batch.router, prefix="/api/v1")
+app.include_router(profiling.router, prefix="/api/v1")
+app.include_router(key_rotation.router, prefix="/api/v1")
 @app.get("/")
 async def root():
     return {"message": "Password Manager API running"}
@@ -93,3 +143,14 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request):
+    """Prometheus text exposition of request, pool and business metrics; requires METRICS_TOKEN."""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Metrics are disabled, set METRICS_TOKEN")
+    if not secrets.compare_digest(request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
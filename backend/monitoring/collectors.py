@@ -0,0 +1,87 @@
+from sqlalchemy import func
+
+from backend.database.database import engine, SessionLocal
+from backend.database.models import User, Password, Team
+from backend.mail.outbox import outbox_sender
+from backend.monitoring.metrics import registry, gauge_family
+from backend.security.admission import login_admission
+from backend.security.crypto_pool import crypto_executor
+from backend.security.envelope import data_keys
+
+
+@registry.register_collector
+def collect_db_pool():
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return []
+
+    return [
+        gauge_family("authron_db_pool_size", "Configured size of the database connection pool.", pool.size()),
+        gauge_family("authron_db_pool_checked_out", "Database connections currently in use.", pool.checkedout()),
+        gauge_family("authron_db_pool_checked_in", "Idle database connections in the pool.", pool.checkedin()),
+        gauge_family("authron_db_pool_overflow", "Connections opened beyond the pool size.", max(pool.overflow(), 0)),
+    ]
+
+
+@registry.register_collector
+def collect_crypto_executor():
+    stats = crypto_executor.stats()
+    return [
+        gauge_family("authron_crypto_executor_workers", "Threads of the crypto executor.", stats["workers"]),
+        gauge_family("authron_crypto_executor_in_flight", "Crypto chunks queued or running.", stats["in_flight"]),
+        ("authron_crypto_executor_chunks_total", "counter", "Crypto chunks completed.",
+         [("authron_crypto_executor_chunks_total", {}, stats["completed"])]),
+        ("authron_crypto_executor_items_total", "counter", "Values processed by the crypto executor.",
+         [("authron_crypto_executor_items_total", {}, stats["items"])]),
+    ]
+
+
+@registry.register_collector
+def collect_data_key_cache():
+    stats = data_keys.stats()
+    return [
+        gauge_family("authron_data_key_cache_entries", "Unwrapped data keys held in memory.", stats["cached"]),
+        ("authron_data_key_cache_lookups_total", "counter", "Data key cache lookups.", [
+            ("authron_data_key_cache_lookups_total", {"result": "hit"}, stats["hits"]),
+            ("authron_data_key_cache_lookups_total", {"result": "miss"}, stats["misses"]),
+        ]),
+    ]
+
+
+@registry.register_collector
+def collect_login_admission():
+    return [
+        ("authron_login_throttle_keys", "gauge", "Keys tracked by the login throttles.", [
+            ("authron_login_throttle_keys", {"scope": "ip"}, len(login_admission.ip_limiter)),
+            ("authron_login_throttle_keys", {"scope": "account"}, len(login_admission.account_limiter)),
+        ]),
+    ]
+
+
+@registry.register_collector
+def collect_email_outbox():
+    counts = outbox_sender.counts()
+    pool = outbox_sender.pool.stats()
+    return [
+        ("authron_email_outbox_messages", "gauge", "Messages in the email outbox by status.", [
+            ("authron_email_outbox_messages", {"status": status}, counts.get(status, 0))
+            for status in ("pending", "sending", "sent", "failed")
+        ]),
+        gauge_family("authron_smtp_pool_idle", "Idle pooled SMTP connections.", pool["idle"]),
+    ]
+
+
+@registry.register_collector
+def collect_business_gauges():
+    with SessionLocal() as session:
+        users = session.query(func.count(User.id)).scalar()
+        active_users = session.query(func.count(User.id)).filter(User.is_active == True).scalar()
+        passwords = session.query(func.count(Password.id)).scalar()
+        teams = session.query(func.count(Team.id)).scalar()
+
+    return [
+        gauge_family("authron_users", "Registered users.", users),
+        gauge_family("authron_users_active", "Active users.", active_users),
+        gauge_family("authron_passwords", "Stored vault entries.", passwords),
+        gauge_family("authron_teams", "Teams.", teams),
+    ]
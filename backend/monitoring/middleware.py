@@ -0,0 +1,74 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+
+from backend.database.instrumentation import track_queries
+from backend.monitoring.metrics import (
+    http_requests_total,
+    http_requests_in_flight,
+    http_request_duration_seconds,
+)
+
+
+# Label values must come from a bounded set; anything else would let clients create series at will.
+HTTP_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "CONNECT", "TRACE"))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts and latency per route template.
+
+    Unknown routes are counted as "unmatched" and non-standard methods as "other".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            http_requests_in_flight.dec()
+
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"] if scope["method"] in HTTP_METHODS else "other"
+            labels = (method, route_path, str(status_code))
+            http_requests_total.inc(*labels)
+            http_request_duration_seconds.observe(*labels, value=duration)
+
+
+class QueryStatsMiddleware:
+    """Adds per-request SQL query count and time as response headers (debugging only)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_with_headers(message):
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-DB-Query-Count", str(stats.count))
+                    headers.append("X-DB-Query-Time-Ms", f"{stats.duration * 1000:.2f}")
+                await send(message)
+
+            await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,187 @@
+import cProfile
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(os.getcwd(), "profiles"))
+PROFILE_HEADER = b"x-authron-profile"
+MAX_STORED_PROFILES = 200
+
+_PROFILE_NAME = re.compile(r"^[A-Za-z0-9_.-]+\.pstats$")
+
+
+class ProfilerSession:
+    def __init__(self, path_prefix: str, max_requests: int, duration_seconds: int,
+                 require_header: bool, created_by: str):
+        self.id = secrets.token_hex(4)
+        self.path_prefix = path_prefix
+        self.remaining = max_requests
+        self.require_header = require_header
+        self.created_by = created_by
+        self.started_at = datetime.utcnow()
+        self.expires_at = time.monotonic() + duration_seconds
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "path_prefix": self.path_prefix,
+            "remaining_requests": self.remaining,
+            "require_header": self.require_header,
+            "created_by": self.created_by,
+            "started_at": self.started_at.isoformat(),
+            "expires_in_seconds": max(0, int(self.expires_at - time.monotonic())),
+        }
+
+
+class RequestProfiler:
+    """Captures cProfile data for selected requests while an admin session is active.
+
+    cProfile only records function call statistics, never arguments, so request
+    bodies and secrets do not end up in the saved files. Because the profiler
+    is per thread, coroutines interleaving on the event loop during a profiled
+    request appear in its profile as well.
+    """
+
+    def __init__(self, profile_dir: str = PROFILE_DIR):
+        self.profile_dir = profile_dir
+        self.session: Optional[ProfilerSession] = None
+        self._lock = threading.Lock()
+        self._busy = False
+
+    def start(self, path_prefix: str, max_requests: int, duration_seconds: int,
+              require_header: bool, created_by: str) -> ProfilerSession:
+        self.session = ProfilerSession(path_prefix, max_requests, duration_seconds, require_header, created_by)
+        return self.session
+
+    def stop(self) -> None:
+        self.session = None
+
+    def acquire(self, scope) -> Optional[ProfilerSession]:
+        """Claims the profiler for a request if the active session selects it."""
+        session = self.session
+        if session is None:
+            return None
+
+        if time.monotonic() > session.expires_at or session.remaining <= 0:
+            self.session = None
+            return None
+        if not scope["path"].startswith(session.path_prefix):
+            return None
+        if session.require_header and not any(name == PROFILE_HEADER for name, _ in scope["headers"]):
+            return None
+
+        with self._lock:
+            if self._busy or session.remaining <= 0:
+                return None
+            self._busy = True
+            session.remaining -= 1
+        return session
+
+    def release(self) -> None:
+        with self._lock:
+            self._busy = False
+
+    def save(self, profile: cProfile.Profile, session: ProfilerSession, scope,
+             status_code: int, duration: float) -> str:
+        os.makedirs(self.profile_dir, exist_ok=True)
+
+        route = scope.get("route")
+        route_path = getattr(route, "path", None) or "unmatched"
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", route_path).strip("-") or "root"
+        name = f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')}_{scope['method']}_{slug}.pstats"
+
+        path = os.path.join(self.profile_dir, name)
+        profile.dump_stats(path)
+        with open(f"{path}.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "session_id": session.id,
+                "method": scope["method"],
+                "route": route_path,
+                "status": status_code,
+                "duration_ms": round(duration * 1000, 2),
+                "created_at": datetime.utcnow().isoformat(),
+            }, f)
+
+        self._prune()
+        return name
+
+    def _prune(self) -> None:
+        profiles = sorted(name for name in os.listdir(self.profile_dir) if _PROFILE_NAME.match(name))
+        for name in profiles[:-MAX_STORED_PROFILES]:
+            for path in (os.path.join(self.profile_dir, name), os.path.join(self.profile_dir, f"{name}.json")):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def list_profiles(self) -> List[dict]:
+        if not os.path.isdir(self.profile_dir):
+            return []
+
+        profiles = []
+        for name in sorted(os.listdir(self.profile_dir), reverse=True):
+            if not _PROFILE_NAME.match(name):
+                continue
+            path = os.path.join(self.profile_dir, name)
+            metadata = {}
+            try:
+                with open(f"{path}.json", "r", encoding="utf-8") as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                pass
+            profiles.append(dict(metadata, filename=name, size_bytes=os.path.getsize(path)))
+        return profiles
+
+    def profile_path(self, name: str) -> Optional[str]:
+        if not _PROFILE_NAME.match(name):
+            return None
+        path = os.path.join(self.profile_dir, name)
+        return path if os.path.isfile(path) else None
+
+
+profiler = RequestProfiler()
+
+
+class ProfilerMiddleware:
+    """Profiles requests selected by the active profiler session; a no-op otherwise."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if profiler.session is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        session = profiler.acquire(scope)
+        if session is None:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        profile = cProfile.Profile()
+        try:
+            try:
+                profile.enable()
+            except ValueError:
+                await self.app(scope, receive, send)
+                return
+
+            start = time.perf_counter()
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                profile.disable()
+                profiler.save(profile, session, scope, status_code, time.perf_counter() - start)
+        finally:
+            profiler.release()
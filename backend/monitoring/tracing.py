@@ -0,0 +1,161 @@
+import functools
+import itertools
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0"))
+TRACE_FILE = os.environ.get("TRACE_FILE", os.path.join(os.getcwd(), "traces", "traces.jsonl"))
+TRACE_MAX_BYTES = int(os.environ.get("TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_BACKUP_COUNT = int(os.environ.get("TRACE_BACKUP_COUNT", "5"))
+TRACE_HEADER = "X-Trace-Id"
+
+_trace_logger = logging.getLogger("backend.tracing")
+_trace_logger.propagate = False
+
+
+class Trace:
+    def __init__(self, name: str):
+        self.trace_id = os.urandom(16).hex()
+        self.name = name
+        self.started_at = datetime.utcnow()
+        self.start = time.perf_counter()
+        self.spans = []
+        self._ids = itertools.count(1)
+        self.attributes = {}
+
+    def new_span_id(self) -> int:
+        return next(self._ids)
+
+    def add_span(self, span_id: int, name: str, start: float, duration: float,
+                 parent_id: Optional[int], attributes: dict) -> None:
+        self.spans.append({
+            "id": span_id,
+            "parent_id": parent_id,
+            "name": name,
+            "start_ms": round((start - self.start) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3),
+            **({"attributes": attributes} if attributes else {}),
+        })
+
+    def to_dict(self, duration: float) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "timestamp": self.started_at.isoformat(),
+            "duration_ms": round(duration * 1000, 3),
+            "attributes": self.attributes,
+            "spans": sorted(self.spans, key=lambda span: span["start_ms"]),
+        }
+
+
+_current_trace: ContextVar = ContextVar("current_trace", default=None)
+_current_span: ContextVar = ContextVar("current_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Records a span in the current trace; does nothing when the request is not sampled."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    parent_id = _current_span.get()
+    span_id = trace.new_span_id()
+    token = _current_span.set(span_id)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
+        trace.add_span(span_id, name, start, time.perf_counter() - start, parent_id, attributes)
+
+
+def record_span(name: str, start: float, duration: float, **attributes) -> None:
+    """Adds an already timed span, e.g. from SQLAlchemy cursor events."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(trace.new_span_id(), name, start, duration, _current_span.get(), attributes)
+
+
+def traced(name: str):
+    """Decorator wrapping a synchronous function in a span."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _write_trace(data: dict) -> None:
+    if not _trace_logger.handlers:
+        os.makedirs(os.path.dirname(TRACE_FILE) or ".", exist_ok=True)
+        handler = RotatingFileHandler(TRACE_FILE, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUP_COUNT, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _trace_logger.addHandler(handler)
+        _trace_logger.setLevel(logging.INFO)
+
+    _trace_logger.info(json.dumps(data, separators=(",", ":")))
+
+
+class TracedJSONResponse(JSONResponse):
+    """JSONResponse recording the serialization step as a span."""
+
+    def render(self, content) -> bytes:
+        with span("response.render"):
+            return super().render(content)
+
+
+class TracingMiddleware:
+    """Samples requests, collects their spans and appends them to a rotating JSONL file."""
+
+    def __init__(self, app, sample_rate: float = TRACE_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(scope["method"])
+        token = _current_trace.set(trace)
+        status_code = 500
+
+        async def send_with_trace_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append(TRACE_HEADER, trace.trace_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            _current_trace.reset(token)
+            route = scope.get("route")
+            trace.name = f"{scope['method']} {getattr(route, 'path', None) or 'unmatched'}"
+            trace.attributes = {"method": scope["method"], "status": status_code}
+            try:
+                _write_trace(trace.to_dict(time.perf_counter() - trace.start))
+            except OSError:
+                pass
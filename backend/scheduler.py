@@ -0,0 +1,6 @@
+from apscheduler.schedulers.background import BackgroundScheduler
+
+# Shared by all background jobs (backups, session cleanup, ...), so the
+# process runs a single scheduler thread.
+scheduler = BackgroundScheduler()
+scheduler.start()
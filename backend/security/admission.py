@@ -0,0 +1,175 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from backend.monitoring.metrics import registry
+from backend.security.utils import verify_and_update_password
+
+LOGIN_MAX_CONCURRENCY = int(os.environ.get("LOGIN_MAX_CONCURRENCY", os.cpu_count() or 1))
+LOGIN_QUEUE_TIMEOUT = float(os.environ.get("LOGIN_QUEUE_TIMEOUT", "2"))
+LOGIN_IP_LIMIT = int(os.environ.get("LOGIN_IP_LIMIT", "30"))
+LOGIN_IP_WINDOW = float(os.environ.get("LOGIN_IP_WINDOW", "60"))
+LOGIN_ACCOUNT_LIMIT = int(os.environ.get("LOGIN_ACCOUNT_LIMIT", "10"))
+LOGIN_ACCOUNT_WINDOW = float(os.environ.get("LOGIN_ACCOUNT_WINDOW", "300"))
+LIMITER_MAX_KEYS = 100000
+
+login_rejections_total = registry.counter(
+    "authron_login_rejections_total",
+    "Login attempts rejected by admission control.",
+    ("reason",),
+)
+login_verify_in_flight = registry.gauge(
+    "authron_login_verify_in_flight",
+    "Password verifications currently running.",
+)
+login_verify_waiting = registry.gauge(
+    "authron_login_verify_waiting",
+    "Login requests waiting for a verification slot.",
+)
+login_verify_queue_seconds = registry.histogram(
+    "authron_login_verify_queue_seconds",
+    "Time login requests waited for a verification slot.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0),
+)
+
+
+class _Window:
+    __slots__ = ("start", "current", "previous")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.current = 0
+        self.previous = 0
+
+
+class SlidingWindowLimiter:
+    """Approximate sliding window: two counters per key instead of a timestamp per attempt.
+
+    The previous window's count is weighted by how much of it still overlaps the
+    sliding window. Keys are kept in LRU order and the least recently used ones
+    are dropped beyond max_keys, so memory stays bounded under spraying attacks.
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int = LIMITER_MAX_KEYS):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[str, _Window]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, key: str, now: float) -> _Window:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Window(now - now % self.window)
+            if len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+
+        elapsed_windows = int((now - entry.start) // self.window)
+        if elapsed_windows >= 1:
+            entry.previous = entry.current if elapsed_windows == 1 else 0
+            entry.current = 0
+            entry.start += elapsed_windows * self.window
+        return entry
+
+    def retry_after(self, key: str, now: Optional[float] = None) -> Optional[int]:
+        """Seconds until the next attempt is allowed, or None if it is allowed now."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entry(key, now)
+            overlap = 1 - (now - entry.start) / self.window
+            if entry.previous * overlap + entry.current < self.limit:
+                return None
+
+            if entry.current >= self.limit:
+                # The current window becomes the previous one and has to decay below the limit.
+                until = entry.start + self.window + (1 - self.limit / entry.current) * self.window
+            else:
+                needed_overlap = (self.limit - entry.current) / entry.previous
+                until = entry.start + (1 - needed_overlap) * self.window
+            return max(1, math.ceil(until - now))
+
+    def hit(self, key: str, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._entry(key, now).current += 1
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LoginAdmission:
+    """Throttles login attempts and bounds the number of concurrent Argon2 verifications.
+
+    Every attempt counts against the client IP; only failed attempts count
+    against the account, so a legitimate user is not locked out by someone
+    else's successful logins. Verification runs in the threadpool, so waiting
+    requests do not block the event loop.
+    """
+
+    def __init__(self, max_concurrency: int = LOGIN_MAX_CONCURRENCY, queue_timeout: float = LOGIN_QUEUE_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.ip_limiter = SlidingWindowLimiter(LOGIN_IP_LIMIT, LOGIN_IP_WINDOW)
+        self.account_limiter = SlidingWindowLimiter(LOGIN_ACCOUNT_LIMIT, LOGIN_ACCOUNT_WINDOW)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @staticmethod
+    def _reject(reason: str, retry_after: int, detail: str) -> HTTPException:
+        login_rejections_total.inc(reason)
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    def check(self, ip: str, account: str) -> None:
+        """Raises 429 if the IP or account is throttled; otherwise counts the attempt for the IP."""
+        account = account.lower()
+        retry_after = self.ip_limiter.retry_after(ip)
+        if retry_after is not None:
+            raise self._reject("ip", retry_after, "Zu viele Anmeldeversuche. Bitte später erneut versuchen.")
+
+        retry_after = self.account_limiter.retry_after(account)
+        if retry_after is not None:
+            raise self._reject("account", retry_after, "Zu viele fehlgeschlagene Anmeldeversuche für dieses Konto.")
+
+        self.ip_limiter.hit(ip)
+
+    def record_failure(self, account: str) -> None:
+        self.account_limiter.hit(account.lower())
+
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Runs verify_and_update_password once a slot is free, or raises 429 after queue_timeout."""
+        start = time.perf_counter()
+        login_verify_waiting.inc()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject("overload", 1, "Anmeldedienst ausgelastet. Bitte später erneut versuchen.")
+        finally:
+            login_verify_waiting.dec()
+
+        login_verify_queue_seconds.observe(value=time.perf_counter() - start)
+        login_verify_in_flight.inc()
+        try:
+            return await run_in_threadpool(verify_and_update_password, password, hashed_password)
+        finally:
+            login_verify_in_flight.dec()
+            self._semaphore.release()
+
+
+login_admission = LoginAdmission()
+
@@ -0,0 +1,255 @@
+import hashlib
+import hmac
+import logging
+import os
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+from cryptography.fernet import InvalidToken
+from sqlalchemy import and_, bindparam, update
+from sqlalchemy.orm import Session
+
+from backend.database.database import SessionLocal
+from backend.database.models import Password, SharedPassword
+from backend.scheduler import scheduler
+from backend.security.domains import split_host
+from backend.security.envelope import EnvelopeCipher, data_keys
+from backend.security.utils import derive_key
+
+# Encrypt username, email and website of vault entries. Search then relies on
+# the blind indexes only (exact and domain matches instead of substrings).
+ENCRYPT_METADATA = os.environ.get("ENCRYPT_METADATA", "").lower() in ("1", "true", "yes")
+# Without BLIND_INDEX_KEY the index key is derived from the master key, so it
+# is as secret as the keyring. Rotating the master key then changes every
+# index once (MetadataBackfill rebuilds them at startup); a configured key
+# keeps them stable across rotations. The index key alone reveals no stored value.
+_configured_index_key = os.environ.get("BLIND_INDEX_KEY")
+BLIND_INDEX_KEY = (
+    _configured_index_key.encode() if _configured_index_key else derive_key(b"authron blind index v1")
+)
+BLIND_INDEX_LENGTH = 32
+METADATA_BACKFILL_BATCH = 500
+METADATA_BACKFILL_PAUSE = 0.05
+
+METADATA_FIELDS = ("username", "email", "website")
+SITE_COLUMNS = ("host", "registrable_domain")
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_domain(value: Optional[str]) -> Optional[str]:
+    """Host of a URL or bare domain, lowercased, without port and leading "www."."""
+    value = (value or "").strip().lower()
+    if not value:
+        return None
+    if "://" not in value:
+        value = "//" + value
+    try:
+        host = urlsplit(value).hostname
+    except ValueError:
+        return None
+    if host and host.startswith("www."):
+        host = host[4:]
+    return host or None
+
+
+def _normalize_text(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip().lower()
+    return value or None
+
+
+NORMALIZERS = {
+    "username": _normalize_text,
+    "email": _normalize_text,
+    "website": normalize_domain,
+    "host": _normalize_text,
+    "registrable_domain": _normalize_text,
+}
+
+
+def blind_index(user_id: int, field: str, value: Optional[str]) -> Optional[str]:
+    """Keyed HMAC of the normalized value, scoped to one user and field.
+
+    Equal values in different vaults get different indexes, so the index
+    column does not reveal which users share an account or website.
+    """
+    normalized = NORMALIZERS[field](value)
+    if normalized is None:
+        return None
+    message = f"{field}:{user_id}:{normalized}".encode()
+    return hmac.new(BLIND_INDEX_KEY, message, hashlib.sha256).hexdigest()[:BLIND_INDEX_LENGTH]
+
+
+def site_columns(website: Optional[str], user_id: Optional[int] = None) -> dict:
+    """Host and registrable domain of a website, as used by the autofill lookup.
+
+    Stored in plain text for team entries. For personal entries with
+    ENCRYPT_METADATA they are blind indexes instead, so the columns do not
+    reveal the encrypted website.
+    """
+    host, domain = split_host(normalize_domain(website))
+    if ENCRYPT_METADATA and user_id is not None:
+        return {
+            "host": blind_index(user_id, "host", host),
+            "registrable_domain": blind_index(user_id, "registrable_domain", domain),
+        }
+    return {"host": host, "registrable_domain": domain}
+
+
+def seal_metadata(cipher: EnvelopeCipher, user_id: int, **values: Optional[str]) -> dict:
+    """Column values for the given metadata fields: blind index plus the (optionally encrypted) value."""
+    columns = {}
+    for field, value in values.items():
+        columns[f"{field}_bidx"] = blind_index(user_id, field, value)
+        columns[field] = cipher.encrypt(value) if ENCRYPT_METADATA and value else value
+    if "website" in values:
+        columns.update(site_columns(values["website"], user_id))
+    return columns
+
+
+def open_value(cipher: EnvelopeCipher, value) -> Optional[str]:
+    """Plain metadata value; encrypted values are bytes, plain ones str."""
+    if not isinstance(value, bytes):
+        return value
+    try:
+        return cipher.decrypt_strict(value)
+    except InvalidToken:
+        return None
+
+
+def open_metadata(cipher: EnvelopeCipher, password: Password) -> dict:
+    return {field: open_value(cipher, getattr(password, field)) for field in METADATA_FIELDS}
+
+
+class MetadataBackfill:
+    """Brings existing entries in line with the current settings in keyset-ordered batches.
+
+    Builds missing or outdated blind indexes and site columns (e.g. after
+    the index key changed) and encrypts or decrypts the metadata according
+    to ENCRYPT_METADATA; team entries only get their site columns. Rows are
+    updated only if their metadata did not change in the meantime, so
+    concurrent edits win. Runs once at startup; rows that are already up to
+    date cost one HMAC per field.
+    """
+
+    def _desired(self, cipher: EnvelopeCipher, row) -> Optional[dict]:
+        plain = {}
+        for field in METADATA_FIELDS:
+            value = getattr(row, field)
+            if isinstance(value, bytes):
+                try:
+                    plain[field] = cipher.decrypt_strict(value)
+                except InvalidToken:
+                    logger.warning(f"Metadata backfill: {field} of password {row.id} is not readable")
+                    return None
+            else:
+                plain[field] = value
+
+        columns = {}
+        for field in METADATA_FIELDS:
+            stored = getattr(row, field)
+            if ENCRYPT_METADATA and plain[field]:
+                columns[field] = stored if isinstance(stored, bytes) else cipher.encrypt(plain[field])
+            else:
+                columns[field] = plain[field]
+            columns[f"{field}_bidx"] = blind_index(row.user_id, field, plain[field])
+        columns.update(site_columns(plain["website"], row.user_id))
+
+        current = {column: getattr(row, column) for column in columns}
+        return None if columns == current else columns
+
+    def run(self, batch_size: int = METADATA_BACKFILL_BATCH) -> int:
+        table = Password.__table__
+        statement = update(table).where(and_(
+            table.c.id == bindparam("row_id"),
+            *[table.c[field].is_not_distinct_from(bindparam(f"old_{field}")) for field in METADATA_FIELDS]
+        )).values({
+            **{column: bindparam(f"new_{column}") for field in METADATA_FIELDS
+               for column in (field, f"{field}_bidx")},
+            **{column: bindparam(f"new_{column}") for column in SITE_COLUMNS},
+            "updated_at": table.c.updated_at,
+        })
+
+        last_id = 0
+        updated = 0
+        with SessionLocal() as db:
+            while True:
+                rows = db.query(
+                    Password.id, Password.user_id,
+                    *[getattr(Password, field) for field in METADATA_FIELDS],
+                    *[getattr(Password, f"{field}_bidx") for field in METADATA_FIELDS],
+                    Password.host, Password.registrable_domain
+                ).filter(Password.id > last_id).order_by(Password.id).limit(batch_size).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+
+                changes = []
+                for row in rows:
+                    if row.user_id is None:
+                        continue
+                    columns = self._desired(data_keys.user(db, row.user_id), row)
+                    if columns is not None:
+                        changes.append({
+                            "row_id": row.id,
+                            **{f"old_{field}": getattr(row, field) for field in METADATA_FIELDS},
+                            **{f"new_{column}": value for column, value in columns.items()},
+                        })
+
+                if changes:
+                    result = db.connection().execute(statement, changes)
+                    db.commit()
+                    updated += result.rowcount if result.rowcount >= 0 else len(changes)
+                    time.sleep(METADATA_BACKFILL_PAUSE)
+
+        updated += self._run_shared(batch_size)
+        if updated:
+            logger.info(f"Metadata backfill updated {updated} vault entries")
+        return updated
+
+    def _run_shared(self, batch_size: int) -> int:
+        table = SharedPassword.__table__
+        statement = update(table).where(and_(
+            table.c.id == bindparam("row_id"),
+            table.c.website.is_not_distinct_from(bindparam("old_website"))
+        )).values({
+            **{column: bindparam(f"new_{column}") for column in SITE_COLUMNS},
+            "updated_at": table.c.updated_at,
+        })
+
+        last_id = 0
+        updated = 0
+        with SessionLocal() as db:
+            while True:
+                rows = db.query(
+                    SharedPassword.id, SharedPassword.website,
+                    SharedPassword.host, SharedPassword.registrable_domain
+                ).filter(SharedPassword.id > last_id).order_by(SharedPassword.id).limit(batch_size).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+
+                changes = []
+                for row in rows:
+                    columns = site_columns(row.website)
+                    if columns != {column: getattr(row, column) for column in SITE_COLUMNS}:
+                        changes.append({
+                            "row_id": row.id,
+                            "old_website": row.website,
+                            **{f"new_{column}": value for column, value in columns.items()},
+                        })
+
+                if changes:
+                    result = db.connection().execute(statement, changes)
+                    db.commit()
+                    updated += result.rowcount if result.rowcount >= 0 else len(changes)
+                    time.sleep(METADATA_BACKFILL_PAUSE)
+        return updated
+
+
+metadata_backfill = MetadataBackfill()
+
+
+def schedule_metadata_backfill() -> None:
+    scheduler.add_job(metadata_backfill.run, id="metadata_backfill", replace_existing=True)
@@ -0,0 +1,229 @@
+"""Offline check of passwords against a breach corpus (Have I Been Pwned SHA-1 lists).
+
+The corpus is an indexed file built from the HIBP download with::
+
+    python -m backend.security.breach build pwned-passwords-sha1-ordered-by-hash.txt breached_passwords.idx
+    python -m backend.security.breach build ./hibp-ranges/ breached_passwords.idx
+    python -m backend.security.breach check breached_passwords.idx "hunter2"
+
+The input is either the full dump ("<40 hex SHA-1>:<count>" per line, sorted
+by hash) or a directory of range files as served by the range API (file name
+= 5 hex prefix, lines "<35 hex suffix>:<count>").
+
+File layout: 16 byte header (magic, record count), a fanout table of 65537
+uint32 record offsets for the first two hash bytes, then fixed-width records
+of the remaining 18 hash bytes and a uint32 count, all big-endian and sorted.
+A lookup reads one fanout slot and binary searches the few records behind
+it. The file is memory-mapped, so the corpus is paged in by the OS on demand
+and does not count against the worker's heap. Reloading swaps in a new
+mapping; the old one is unmapped once the last lookup using it has finished.
+"""
+import argparse
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Iterator, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+BREACH_CORPUS = os.environ.get("BREACH_CORPUS", "./breached_passwords.idx")
+# Passwords seen less often than this are not treated as breached.
+BREACH_MIN_COUNT = int(os.environ.get("BREACH_MIN_COUNT", "1"))
+
+MAGIC = b"ABRIDX01"
+HEADER = struct.Struct(">8sQ")
+FANOUT_SIZE = 65537
+FANOUT = struct.Struct(f">{FANOUT_SIZE}I")
+RECORD = struct.Struct(">18sI")
+DATA_OFFSET = HEADER.size + FANOUT.size
+
+
+class BreachCorpus:
+    """Read-only view of an indexed breach corpus; missing files disable the check."""
+
+    def __init__(self, path: str = BREACH_CORPUS):
+        self.path = path
+        self._lock = threading.Lock()
+        # Mapping and fanout table, replaced as one tuple so lookups never mix two files.
+        self._index: Optional[Tuple[mmap.mmap, Tuple[int, ...]]] = None
+        self.records = 0
+        self.version: Optional[datetime] = None
+        self.load()
+
+    def load(self) -> bool:
+        """(Re)opens the corpus file; returns whether a corpus is available.
+
+        The previous mapping is not closed here, as concurrent lookups may
+        still read from it; it is unmapped when it is no longer referenced.
+        """
+        with self._lock:
+            if not os.path.exists(self.path):
+                self._unload()
+                return False
+            mapped = None
+            try:
+                # The mapping keeps its own file descriptor.
+                with open(self.path, "rb") as file:
+                    mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                    version = datetime.utcfromtimestamp(int(os.fstat(file.fileno()).st_mtime))
+                magic, records = HEADER.unpack_from(mapped, 0)
+                if magic != MAGIC or len(mapped) != DATA_OFFSET + records * RECORD.size:
+                    raise ValueError("unknown format or truncated file")
+            except (OSError, ValueError, struct.error) as e:
+                logger.error(f"Breach corpus {self.path} could not be loaded: {e}")
+                if mapped is not None:
+                    mapped.close()
+                self._unload()
+                return False
+
+            self._index = (mapped, FANOUT.unpack_from(mapped, HEADER.size))
+            self.records = records
+            self.version = version
+            logger.info(f"Breach corpus loaded: {records} hashes")
+            return True
+
+    def _unload(self) -> None:
+        self._index = None
+        self.records = 0
+        self.version = None
+
+    @property
+    def available(self) -> bool:
+        return self._index is not None
+
+    def count_digest(self, digest: bytes) -> int:
+        """Breach count of a SHA-1 digest, 0 if it is not in the corpus."""
+        index = self._index
+        if index is None:
+            return 0
+        mapped, fanout = index
+        bucket = digest[0] << 8 | digest[1]
+        low, high = fanout[bucket], fanout[bucket + 1]
+        rest = digest[2:]
+        while low < high:
+            middle = (low + high) // 2
+            offset = DATA_OFFSET + middle * RECORD.size
+            candidate = mapped[offset:offset + 18]
+            if candidate < rest:
+                low = middle + 1
+            elif candidate > rest:
+                high = middle
+            else:
+                return RECORD.unpack_from(mapped, offset)[1]
+        return 0
+
+    def count(self, password: str) -> int:
+        return self.count_digest(hashlib.sha1(password.encode()).digest())
+
+    def is_breached(self, password: str) -> Optional[bool]:
+        """True or False, or None if no corpus is installed."""
+        if not self.available:
+            return None
+        if not password:
+            return False
+        return self.count(password) >= BREACH_MIN_COUNT
+
+    def stats(self) -> dict:
+        return {
+            "available": self.available,
+            "records": self.records,
+            "version": self.version.isoformat() if self.version else None,
+        }
+
+
+breach_corpus = BreachCorpus()
+
+
+def _dump_records(path: str) -> Iterator[Tuple[bytes, int]]:
+    with open(path, encoding="ascii") as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                digest, _, count = line.partition(":")
+                yield bytes.fromhex(digest), int(count or 1)
+
+
+def _range_records(directory: str) -> Iterator[Tuple[bytes, int]]:
+    for name in sorted(os.listdir(directory), key=str.upper):
+        prefix = os.path.splitext(name)[0]
+        if len(prefix) != 5:
+            continue
+        with open(os.path.join(directory, name), encoding="ascii") as file:
+            for line in file:
+                line = line.strip()
+                if line:
+                    suffix, _, count = line.partition(":")
+                    yield bytes.fromhex(prefix + suffix), int(count or 1)
+
+
+def build_index(source: str, output: str, min_count: int = 1) -> int:
+    """Converts a sorted HIBP dump or range directory into the indexed format; returns the record count."""
+    records = _range_records(source) if os.path.isdir(source) else _dump_records(source)
+    fanout = [0] * FANOUT_SIZE
+    written = 0
+    previous = b""
+    temporary = output + ".tmp"
+
+    with open(temporary, "wb") as file:
+        file.write(b"\0" * DATA_OFFSET)
+        for digest, count in records:
+            if len(digest) != 20:
+                raise ValueError(f"invalid SHA-1 hash after record {written}")
+            if digest <= previous:
+                raise ValueError("input is not sorted by hash (or contains duplicates)")
+            previous = digest
+            if count < min_count:
+                continue
+            fanout[(digest[0] << 8 | digest[1]) + 1] += 1
+            file.write(RECORD.pack(digest[2:], min(count, 0xFFFFFFFF)))
+            written += 1
+
+        for bucket in range(1, FANOUT_SIZE):
+            fanout[bucket] += fanout[bucket - 1]
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, written))
+        file.write(FANOUT.pack(*fanout))
+
+    os.replace(temporary, output)
+    return written
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build and query the offline breach corpus")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="convert a HIBP SHA-1 dump or range directory")
+    build.add_argument("source", help="sorted '<sha1>:<count>' file or directory of range files")
+    build.add_argument("output", help="indexed corpus file (BREACH_CORPUS)")
+    build.add_argument("--min-count", type=int, default=1, help="skip hashes seen less often")
+
+    check = commands.add_parser("check", help="look up passwords in an indexed corpus")
+    check.add_argument("corpus")
+    check.add_argument("passwords", nargs="+")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.perf_counter()
+        written = build_index(args.source, args.output, args.min_count)
+        print(f"{written} hashes written to {args.output} in {time.perf_counter() - started:.1f}s "
+              f"({os.path.getsize(args.output) / 2**20:.1f} MiB)")
+        return
+
+    corpus = BreachCorpus(args.corpus)
+    if not corpus.available:
+        sys.exit(f"{args.corpus} is not a breach corpus")
+    for password in args.passwords:
+        started = time.perf_counter()
+        count = corpus.count(password)
+        print(f"{password!r}: {count} ({(time.perf_counter() - started) * 1e6:.1f} µs)")
+
+
+if __name__ == "__main__":
+    main()
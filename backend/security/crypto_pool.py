@@ -0,0 +1,69 @@
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Sequence
+
+CRYPTO_WORKERS = int(os.environ.get("CRYPTO_WORKERS", min(4, os.cpu_count() or 1)))
+CRYPTO_CHUNK_SIZE = 32
+
+
+class CryptoExecutor:
+    """Thread pool for symmetric crypto work that would otherwise block the event loop."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crypto")
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._completed = 0
+        self._items = 0
+
+    def _run_chunk(self, func: Callable, chunk: Sequence) -> list:
+        try:
+            return [func(value) for value in chunk]
+        finally:
+            with self._lock:
+                self._completed += 1
+
+    async def map(self, func: Callable, values: Sequence) -> list:
+        """Applies func to all values in chunks on the pool, preserving order."""
+        if not values:
+            return []
+
+        loop = asyncio.get_running_loop()
+        chunks = [values[i:i + CRYPTO_CHUNK_SIZE] for i in range(0, len(values), CRYPTO_CHUNK_SIZE)]
+
+        with self._lock:
+            self._submitted += len(chunks)
+            self._items += len(values)
+
+        results = await asyncio.gather(*[
+            loop.run_in_executor(self._executor, contextvars.copy_context().run, self._run_chunk, func, chunk)
+            for chunk in chunks
+        ])
+        return [value for chunk in results for value in chunk]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "in_flight": self._submitted - self._completed,
+                "items": self._items,
+            }
+
+
+crypto_executor = CryptoExecutor(CRYPTO_WORKERS)
+
+
+def _decrypt_item(item) -> str:
+    cipher, encrypted_value = item
+    return cipher.decrypt(encrypted_value)
+
+
+async def decrypt_many(encrypted_values: Sequence[str], ciphers: Sequence) -> List[str]:
+    """Decrypts stored values on the crypto pool, each with the EnvelopeCipher at the same position."""
+    return await crypto_executor.map(_decrypt_item, list(zip(ciphers, encrypted_values)))
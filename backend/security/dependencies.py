@@ -4,13 +4,28 @@ from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from fastapi import Request, Header
 from typing import Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
 
 from backend.database.database import get_db
 from backend.database.models import User
 from backend.security.utils import SECRET_KEY, ALGORITHM
+from backend.security.revocation import token_revocation
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/token")
 
+_shared_principal: ContextVar = ContextVar("shared_principal", default=None)
+
+
+@contextmanager
+def shared_principal(token: str, user: User):
+    """Reuses an already authenticated user for requests carrying the same token."""
+    context_token = _shared_principal.set((token, user))
+    try:
+        yield user
+    finally:
+        _shared_principal.reset(context_token)
+
 async def get_temp_or_full_user(
     authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db)
@@ -42,6 +57,13 @@ async def get_temp_or_full_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
+        if token_revocation.is_revoked(payload):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
         user = db.query(User).filter(User.id == user_id).first()
         if user is None:
             raise HTTPException(
@@ -49,6 +71,13 @@ async def get_temp_or_full_user(
                 detail="User not found",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        token_revocation.sync_version(user.id, user.token_version or 0)
+        if payload.get("ver", 0) != (user.token_version or 0):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
         if payload.get("temp", False) and payload.get("requires_2fa", True):
             user.requires_2fa_verification = True
 
@@ -63,6 +92,10 @@ async def get_temp_or_full_user(
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     """Verify JWT token and return current user."""
+    principal = _shared_principal.get()
+    if principal is not None and principal[0] == token:
+        return principal[1]
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -76,10 +109,18 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
 
+    if token_revocation.is_revoked(payload):
+        raise credentials_exception
+
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise credentials_exception
 
+    # Another worker may have changed the version; the loaded row is authoritative.
+    token_revocation.sync_version(user.id, user.token_version or 0)
+    if payload.get("ver", 0) != (user.token_version or 0):
+        raise credentials_exception
+
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,106 @@
+import logging
+import os
+import sys
+from functools import lru_cache
+from typing import Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bundled copy of https://publicsuffix.org/list/public_suffix_list.dat, so the
+# lookup works offline. PUBLIC_SUFFIX_LIST points to a newer copy if needed.
+if getattr(sys, "frozen", False):
+    _BASE_DIR = sys._MEIPASS
+else:
+    _BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PUBLIC_SUFFIX_LIST = os.environ.get(
+    "PUBLIC_SUFFIX_LIST", os.path.join(_BASE_DIR, "data", "public_suffix_list.dat")
+)
+
+
+def _to_ascii(name: str) -> Optional[str]:
+    """Punycode form of a (possibly internationalized) domain name."""
+    try:
+        return name.encode("idna").decode("ascii")
+    except UnicodeError:
+        return None
+
+
+class PublicSuffixList:
+    """Rules of the public suffix list: plain, wildcard ("*.") and exception ("!") entries.
+
+    Rules are stored in punycode, so hosts are matched in the form browsers
+    send them. Only the ICANN and private sections are read; comments and
+    blank lines are skipped.
+    """
+
+    def __init__(self, path: str):
+        self.rules: Set[str] = set()
+        self.wildcards: Set[str] = set()
+        self.exceptions: Set[str] = set()
+        try:
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    self._add(line.split(maxsplit=1)[0] if line.strip() else "")
+        except OSError as e:
+            logger.error(f"Public suffix list {path} could not be loaded: {e}")
+
+    def _add(self, rule: str) -> None:
+        if not rule or rule.startswith("//"):
+            return
+        target = self.rules
+        if rule.startswith("!"):
+            rule, target = rule[1:], self.exceptions
+        elif rule.startswith("*."):
+            rule, target = rule[2:], self.wildcards
+        rule = _to_ascii(rule)
+        if rule:
+            target.add(rule)
+
+    def suffix_length(self, labels: Tuple[str, ...]) -> int:
+        """Number of trailing labels that form the public suffix (at least 1)."""
+        for i in range(len(labels)):
+            candidate = ".".join(labels[i:])
+            if candidate in self.exceptions:
+                return len(labels) - i - 1
+            if candidate in self.rules:
+                return len(labels) - i
+            if i > 0 and candidate in self.wildcards:
+                return len(labels) - i + 1
+        # Implicit "*" rule: unknown TLDs are public suffixes themselves.
+        return 1
+
+
+@lru_cache(maxsize=1)
+def public_suffixes() -> PublicSuffixList:
+    return PublicSuffixList(PUBLIC_SUFFIX_LIST)
+
+
+@lru_cache(maxsize=4096)
+def registrable_domain(host: Optional[str]) -> Optional[str]:
+    """Public suffix plus one label ("login.example.co.uk" -> "example.co.uk").
+
+    IP addresses and single-label hosts are returned unchanged; a host that is
+    itself a public suffix has no registrable domain and is returned as is, so
+    it still matches exactly.
+    """
+    if not host:
+        return None
+    host = _to_ascii(host.strip(".").lower())
+    if not host:
+        return None
+    labels = tuple(host.split("."))
+    if len(labels) < 2 or labels[-1].isdigit() or ":" in host:
+        return host
+    length = public_suffixes().suffix_length(labels)
+    if length >= len(labels):
+        return host
+    return ".".join(labels[-length - 1:])
+
+
+def split_host(host: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """(host, registrable domain) of a normalized host, both in punycode."""
+    if not host:
+        return None, None
+    ascii_host = _to_ascii(host.strip(".").lower())
+    return ascii_host, registrable_domain(ascii_host)
@@ -0,0 +1,227 @@
+import base64
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.database.database import SessionLocal
+from backend.database.models import DataKey
+from backend.monitoring.tracing import traced
+from backend.security.utils import KEY_IDS, decrypt_password, fernet
+
+DATA_KEY_CACHE_SIZE = int(os.environ.get("DATA_KEY_CACHE_SIZE", "10000"))
+DATA_KEY_CACHE_TTL = float(os.environ.get("DATA_KEY_CACHE_TTL", "300"))
+
+# Current format: binary version byte || 12 byte nonce || AES-256-GCM
+# ciphertext and tag, with the owner as associated data. Older formats are
+# text: "e1:" + Fernet token under the data key, or a bare Fernet token under
+# the master keyring. All of them are read; writes use the binary format.
+CIPHERTEXT_VERSION = b"\x01"
+AEAD_NONCE_SIZE = 12
+AEAD_KEY_INFO = b"authron aead v1"
+ENVELOPE_PREFIX = "e1:"
+
+OWNER_USER = "user"
+OWNER_TEAM = "team"
+
+
+def is_envelope(value) -> bool:
+    """True if the value is encrypted under a data key rather than the master keyring."""
+    return isinstance(value, bytes) or (isinstance(value, str) and value.startswith(ENVELOPE_PREFIX))
+
+
+def is_current_format(value) -> bool:
+    return isinstance(value, bytes) and value[:1] == CIPHERTEXT_VERSION
+
+
+def derive_aead(data_key: bytes) -> AESGCM:
+    """Derives the AES-256-GCM key of the binary format from a (Fernet) data key."""
+    hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=AEAD_KEY_INFO)
+    return AESGCM(hkdf.derive(base64.urlsafe_b64decode(data_key)))
+
+
+class EnvelopeCipher:
+    """Encrypts with the data key of one user or team and still reads older formats."""
+
+    __slots__ = ("owner_type", "owner_id", "_key", "_aead", "_associated_data")
+
+    def __init__(self, owner_type: str, owner_id: int, key: Fernet, aead: AESGCM):
+        self.owner_type = owner_type
+        self.owner_id = owner_id
+        self._key = key
+        self._aead = aead
+        # Binds each value to its owner, so it cannot be copied into another vault.
+        self._associated_data = f"{owner_type}:{owner_id}".encode()
+
+    @traced("crypto.encrypt")
+    def encrypt(self, plaintext) -> bytes:
+        if not plaintext:
+            return b""
+        if not isinstance(plaintext, str):
+            plaintext = str(plaintext)
+        nonce = os.urandom(AEAD_NONCE_SIZE)
+        return CIPHERTEXT_VERSION + nonce + self._aead.encrypt(nonce, plaintext.encode(), self._associated_data)
+
+    def decrypt_strict(self, stored) -> str:
+        """Like decrypt, but raises InvalidToken instead of returning a placeholder."""
+        if not stored:
+            return ""
+        if isinstance(stored, bytes):
+            if stored[:1] != CIPHERTEXT_VERSION:
+                raise InvalidToken
+            nonce = stored[1:1 + AEAD_NONCE_SIZE]
+            try:
+                return self._aead.decrypt(nonce, stored[1 + AEAD_NONCE_SIZE:], self._associated_data).decode()
+            except InvalidTag:
+                raise InvalidToken
+        if is_envelope(stored):
+            return self._key.decrypt(stored[len(ENVELOPE_PREFIX):].encode()).decode()
+        return fernet.decrypt(stored.encode()).decode()
+
+    @traced("crypto.decrypt")
+    def decrypt(self, stored) -> str:
+        """Same semantics as decrypt_password: a placeholder instead of an exception."""
+        if not is_envelope(stored):
+            return decrypt_password(stored)
+        try:
+            return self.decrypt_strict(stored)
+        except InvalidToken:
+            return "[Passwort kann nicht entschlüsselt werden: Schlüssel ungültig]"
+        except Exception:
+            return "[Passwort kann nicht entschlüsselt werden]"
+
+    @traced("crypto.reencrypt")
+    def reencrypt(self, stored):
+        """Moves a stored value to the current format under this data key; raises InvalidToken if it is unreadable."""
+        if not stored:
+            return stored
+        return self.encrypt(self.decrypt_strict(stored))
+
+
+class DataKeyStore:
+    """Per-user and per-team data keys, wrapped by the master keyring.
+
+    Vault entries are encrypted with the data key of their owner, and only the
+    data keys are encrypted with the master key. Rotating the master key or
+    rekeying a team therefore rewraps one short value per owner instead of
+    re-encrypting every entry. Unwrapped keys are kept in a bounded LRU cache
+    with a TTL, so key material does not stay in memory indefinitely.
+    Rewrapping never changes the data key itself, so a stale cache entry in
+    another worker process is still correct.
+
+    Rekeying a team after a member was removed is deliberately this cheap
+    rewrap. Data keys are only ever unwrapped on the server and never handed
+    to members, so a removed member loses access through the membership
+    check alone. What a rewrap does not cover is a data key that leaked
+    unwrapped (e.g. from a memory dump of a worker); that would require a new
+    data key and re-encrypting all of the owner's entries.
+    """
+
+    def __init__(self, max_entries: int = DATA_KEY_CACHE_SIZE, ttl: float = DATA_KEY_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._cache: "OrderedDict[Tuple[str, int], Tuple[Tuple[Fernet, AESGCM], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, owner: Tuple[str, int], now: float) -> Optional[Tuple[Fernet, AESGCM]]:
+        with self._lock:
+            entry = self._cache.get(owner)
+            if entry is None or entry[1] <= now:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(owner)
+            self.hits += 1
+            return entry[0]
+
+    def _store(self, owner: Tuple[str, int], keys: Tuple[Fernet, AESGCM], now: float) -> None:
+        with self._lock:
+            self._cache[owner] = (keys, now + self.ttl)
+            self._cache.move_to_end(owner)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def evict(self, owner_type: str, owner_id: int) -> None:
+        with self._lock:
+            self._cache.pop((owner_type, owner_id), None)
+
+    def _create(self, owner_type: str, owner_id: int) -> None:
+        # Committed in its own session: a key must never be cached (and used)
+        # if the request that created it is rolled back.
+        with SessionLocal() as session:
+            session.add(DataKey(
+                owner_type=owner_type,
+                owner_id=owner_id,
+                wrapped_key=fernet.encrypt(Fernet.generate_key()).decode(),
+                master_key_id=KEY_IDS[0],
+            ))
+            try:
+                session.commit()
+            except IntegrityError:
+                # Created concurrently by another request.
+                session.rollback()
+
+    def cipher(self, db: Session, owner_type: str, owner_id: int) -> EnvelopeCipher:
+        """Returns the cipher of an owner, creating its data key on first use."""
+        owner = (owner_type, owner_id)
+        now = time.monotonic()
+        keys = self._cached(owner, now)
+        if keys is None:
+            row = self._load(db, owner_type, owner_id)
+            if row is None:
+                self._create(owner_type, owner_id)
+                row = self._load(db, owner_type, owner_id)
+            data_key = fernet.decrypt(row.wrapped_key.encode())
+            keys = (Fernet(data_key), derive_aead(data_key))
+            self._store(owner, keys, now)
+        return EnvelopeCipher(owner_type, owner_id, *keys)
+
+    def user(self, db: Session, user_id: int) -> EnvelopeCipher:
+        return self.cipher(db, OWNER_USER, user_id)
+
+    def team(self, db: Session, team_id: int) -> EnvelopeCipher:
+        return self.cipher(db, OWNER_TEAM, team_id)
+
+    @staticmethod
+    def _load(db: Session, owner_type: str, owner_id: int) -> Optional[DataKey]:
+        return db.query(DataKey).filter(
+            DataKey.owner_type == owner_type,
+            DataKey.owner_id == owner_id
+        ).populate_existing().first()
+
+    def rewrap(self, db: Session, owner_type: str, owner_id: int) -> bool:
+        """Wraps the owner's data key again under the primary master key; the caller commits."""
+        row = self._load(db, owner_type, owner_id)
+        if row is None:
+            return False
+        row.wrapped_key = fernet.rotate(row.wrapped_key.encode()).decode()
+        row.master_key_id = KEY_IDS[0]
+        row.rotated_at = datetime.utcnow()
+        self.evict(owner_type, owner_id)
+        return True
+
+    def delete(self, db: Session, owner_type: str, owner_id: int) -> None:
+        """Drops the data key together with its owner; the caller commits."""
+        db.query(DataKey).filter(
+            DataKey.owner_type == owner_type,
+            DataKey.owner_id == owner_id
+        ).delete(synchronize_session=False)
+        self.evict(owner_type, owner_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"cached": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+data_keys = DataKeyStore()
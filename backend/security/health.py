@@ -0,0 +1,356 @@
+import hashlib
+import hmac
+import logging
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from cryptography.fernet import InvalidToken
+from sqlalchemy import and_, bindparam, case, func, literal, or_, update
+from sqlalchemy.orm import Session
+
+from backend.database.database import SessionLocal
+from backend.database.models import Password, User
+from backend.scheduler import scheduler
+from backend.security.breach import breach_corpus
+from backend.security.envelope import data_keys
+from backend.security.policy import CompiledPolicy, password_policy
+from backend.security.utils import derive_key, get_key_id
+
+# Keyed, so the fingerprints cannot be checked against a list of known
+# passwords without the key. Scoped per user like the blind indexes: reuse is
+# detected within a vault, never across vaults. Without PASSWORD_FINGERPRINT_KEY
+# the key is derived from the master key; HealthBackfill recomputes the
+# fingerprints whenever the key changes.
+_configured_fingerprint_key = os.environ.get("PASSWORD_FINGERPRINT_KEY")
+PASSWORD_FINGERPRINT_KEY = (
+    _configured_fingerprint_key.encode() if _configured_fingerprint_key
+    else derive_key(b"authron password fingerprint v1")
+)
+FINGERPRINT_KEY_ID = get_key_id(PASSWORD_FINGERPRINT_KEY)
+FINGERPRINT_LENGTH = 32
+# Scores range from 0 (trivial) to 4 (strong); below this an entry counts as weak.
+WEAK_STRENGTH = 2
+HEALTH_BACKFILL_BATCH = 200
+HEALTH_BACKFILL_PAUSE = 0.05
+HEALTH_AUDIT_INTERVAL_HOURS = float(os.environ.get("HEALTH_AUDIT_INTERVAL_HOURS", "24"))
+
+logger = logging.getLogger(__name__)
+
+_SEQUENCES = ("abcdefghijklmnopqrstuvwxyz", "0123456789", "qwertyuiopasdfghjklzxcvbnm", "qwertzuiopasdfghjklyxcvbnm")
+
+
+def password_fingerprint(user_id: int, password: str) -> Optional[str]:
+    if not password:
+        return None
+    message = f"{user_id}:{password}".encode()
+    return hmac.new(PASSWORD_FINGERPRINT_KEY, message, hashlib.sha256).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def _pattern_length(password: str) -> int:
+    """Characters that are part of repetitions or keyboard/alphabet sequences."""
+    lowered = password.lower()
+    covered = 0
+    run = 1
+    for previous, current in zip(lowered, lowered[1:]):
+        if current == previous or any(previous + current in sequence for sequence in _SEQUENCES):
+            run += 1
+        else:
+            if run >= 3:
+                covered += run
+            run = 1
+    if run >= 3:
+        covered += run
+    return covered
+
+
+def password_strength(password: str) -> int:
+    """Strength score from 0 to 4, estimated from length, character classes and patterns."""
+    if not password:
+        return 0
+    pool = 0
+    if any(c.islower() for c in password):
+        pool += 26
+    if any(c.isupper() for c in password):
+        pool += 26
+    if any(c.isdigit() for c in password):
+        pool += 10
+    if any(not c.isalnum() for c in password):
+        pool += 33
+    # Repeated and sequential characters add almost no entropy.
+    effective = max(len(password) - _pattern_length(password) * 0.75, 1)
+    entropy = effective * math.log2(max(pool, 2))
+
+    for score, threshold in enumerate((28, 40, 60, 80)):
+        if entropy < threshold:
+            return score
+    return 4
+
+
+def health_columns(user_id: int, password: str, changed_at: Optional[datetime] = None,
+                   policy: Optional[CompiledPolicy] = None) -> dict:
+    """Health columns for a newly set password; the plaintext is not stored.
+
+    `changed_at` defaults to now and `policy` to the cached policy; the dataset
+    generator passes both, as it writes past entries into another database.
+    """
+    breached = breach_corpus.is_breached(password)
+    now = datetime.utcnow()
+    changed_at = changed_at or now
+    policy = policy or password_policy.get()
+    return {
+        "password_fingerprint": password_fingerprint(user_id, password),
+        "fingerprint_key_id": FINGERPRINT_KEY_ID,
+        "password_strength": password_strength(password),
+        "password_changed_at": changed_at,
+        "password_breached": breached,
+        "breach_checked_at": now if breached is not None else None,
+        **policy.columns(password, changed_at),
+    }
+
+
+def apply_health(entry: Password, user_id: int, password: str) -> None:
+    """Updates the health columns of an entry; saving the same password again keeps its age."""
+    columns = health_columns(user_id, password)
+    if columns["password_fingerprint"] == entry.password_fingerprint and entry.password_changed_at:
+        del columns["password_changed_at"]
+        columns["password_expires_at"] = password_policy.get().expires_at(entry.password_changed_at)
+    for column, value in columns.items():
+        setattr(entry, column, value)
+
+
+def max_password_age(db: Session) -> Optional[int]:
+    """Maximum age in days of the strictest password policy, None without policies."""
+    return password_policy.get(db).max_age_days
+
+
+def _issue_columns(max_age_days: Optional[int]):
+    """Per-entry issue counters, summed by the reports."""
+    weak = case((Password.password_strength < WEAK_STRENGTH, 1), else_=0)
+    breached = case((Password.password_breached == True, 1), else_=0)
+    if max_age_days:
+        cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+        old = case((Password.password_changed_at < cutoff, 1), else_=0)
+    else:
+        old = literal(0)
+    pending = case((Password.password_strength.is_(None), 1), else_=0)
+    return weak, breached, old, pending
+
+
+def _reused_groups(db: Session, user_id: Optional[int] = None):
+    """Fingerprints used by more than one entry of the same user, with their entry count."""
+    query = db.query(
+        Password.user_id,
+        Password.password_fingerprint,
+        func.count(Password.id).label("entries")
+    ).filter(Password.password_fingerprint.isnot(None))
+    if user_id is not None:
+        query = query.filter(Password.user_id == user_id)
+    return query.group_by(Password.user_id, Password.password_fingerprint).having(func.count(Password.id) > 1)
+
+
+def user_report(db: Session, user_id: int) -> dict:
+    """Health report of one vault, computed from the stored columns without decrypting."""
+    max_age_days = max_password_age(db)
+    weak, breached, old, pending = _issue_columns(max_age_days)
+
+    total, weak_count, breached_count, old_count, pending_count = db.query(
+        func.count(Password.id),
+        func.coalesce(func.sum(weak), 0),
+        func.coalesce(func.sum(breached), 0),
+        func.coalesce(func.sum(old), 0),
+        func.coalesce(func.sum(pending), 0)
+    ).filter(Password.user_id == user_id).one()
+
+    groups = _reused_groups(db, user_id).subquery()
+    reused_entries = db.query(Password.id, Password.password_fingerprint).join(
+        groups, and_(
+            groups.c.user_id == Password.user_id,
+            groups.c.password_fingerprint == Password.password_fingerprint
+        )
+    ).order_by(Password.password_fingerprint, Password.id).all()
+    reused = {}
+    for password_id, fingerprint in reused_entries:
+        reused.setdefault(fingerprint, []).append(password_id)
+
+    weak_ids = [password_id for (password_id,) in db.query(Password.id).filter(
+        Password.user_id == user_id,
+        Password.password_strength < WEAK_STRENGTH
+    ).order_by(Password.id)]
+    breached_ids = [password_id for (password_id,) in db.query(Password.id).filter(
+        Password.user_id == user_id,
+        Password.password_breached == True
+    ).order_by(Password.id)]
+    old_ids = []
+    if max_age_days:
+        old_ids = [password_id for (password_id,) in db.query(Password.id).filter(
+            Password.user_id == user_id,
+            Password.password_changed_at < datetime.utcnow() - timedelta(days=max_age_days)
+        ).order_by(Password.password_changed_at)]
+
+    return {
+        "total": total,
+        "weak": weak_count,
+        "breached": breached_count,
+        "reused": len(reused_entries),
+        "old": old_count,
+        "pending": pending_count,
+        "max_age_days": max_age_days,
+        "weak_ids": weak_ids,
+        "breached_ids": breached_ids,
+        "reused_groups": list(reused.values()),
+        "old_ids": old_ids,
+    }
+
+
+def admin_report(db: Session) -> dict:
+    """Health counters of all vaults, per user and in total."""
+    max_age_days = max_password_age(db)
+    weak, breached, old, pending = _issue_columns(max_age_days)
+
+    rows = db.query(
+        Password.user_id,
+        func.count(Password.id),
+        func.coalesce(func.sum(weak), 0),
+        func.coalesce(func.sum(breached), 0),
+        func.coalesce(func.sum(old), 0),
+        func.coalesce(func.sum(pending), 0)
+    ).group_by(Password.user_id).all()
+
+    groups = _reused_groups(db).subquery()
+    reused = dict(db.query(groups.c.user_id, func.sum(groups.c.entries)).group_by(groups.c.user_id).all())
+    usernames = dict(db.query(User.id, User.username).filter(User.id.in_([row[0] for row in rows])).all())
+
+    users = [{
+        "user_id": user_id,
+        "username": usernames.get(user_id, ""),
+        "total": total,
+        "weak": weak_count,
+        "breached": breached_count,
+        "reused": int(reused.get(user_id, 0)),
+        "old": old_count,
+        "pending": pending_count,
+    } for user_id, total, weak_count, breached_count, old_count, pending_count in rows if user_id is not None]
+    users.sort(key=lambda user: (user["weak"] + user["breached"] + user["reused"] + user["old"]), reverse=True)
+
+    totals = {
+        key: sum(user[key] for user in users)
+        for key in ("total", "weak", "breached", "reused", "old", "pending")
+    }
+    return {**totals, "max_age_days": max_age_days, "users": users}
+
+
+class HealthBackfill:
+    """Computes the health and policy columns of entries that are not up to date.
+
+    Only entries without a strength score, not yet checked against the
+    installed breach corpus, audited against an older policy version or
+    fingerprinted with another key are decrypted, in keyset-ordered batches.
+    Every later write keeps the columns current, so subsequent runs are
+    incremental; a new corpus, policy change or fingerprint key causes
+    exactly one pass over the vaults. An entry is updated only
+    if its password did not change in the meantime. Entries keep their
+    updated_at; the password age starts at the last update, as the actual
+    change date is unknown.
+    """
+
+    def run(self, batch_size: int = HEALTH_BACKFILL_BATCH) -> int:
+        table = Password.__table__
+        statement = update(table).where(and_(
+            table.c.id == bindparam("row_id"),
+            table.c.encrypted_password.is_not_distinct_from(bindparam("old_password"))
+        )).values(
+            password_fingerprint=bindparam("new_fingerprint"),
+            fingerprint_key_id=FINGERPRINT_KEY_ID,
+            password_strength=bindparam("new_strength"),
+            password_breached=bindparam("new_breached"),
+            breach_checked_at=bindparam("checked_at"),
+            policy_compliant=bindparam("new_compliant"),
+            policy_violations=bindparam("new_violations"),
+            policy_version=bindparam("new_policy_version"),
+            password_expires_at=bindparam("new_expires_at"),
+            password_changed_at=bindparam("changed_at"),
+            updated_at=table.c.updated_at,
+        )
+
+        policy = password_policy.get()
+        outdated = or_(
+            Password.password_strength.is_(None),
+            Password.policy_version.is_distinct_from(policy.version),
+            Password.fingerprint_key_id.is_distinct_from(FINGERPRINT_KEY_ID)
+        )
+        if breach_corpus.available:
+            outdated = or_(
+                outdated,
+                Password.breach_checked_at.is_(None),
+                Password.breach_checked_at < breach_corpus.version
+            )
+
+        last_id = 0
+        updated = 0
+        with SessionLocal() as db:
+            while True:
+                rows = db.query(
+                    Password.id, Password.user_id, Password.encrypted_password,
+                    func.coalesce(
+                        Password.password_changed_at, Password.updated_at, Password.created_at
+                    ).label("changed_at")
+                ).filter(
+                    Password.id > last_id,
+                    outdated
+                ).order_by(Password.id).limit(batch_size).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+
+                changes = []
+                for row in rows:
+                    if row.user_id is None:
+                        continue
+                    try:
+                        plaintext = data_keys.user(db, row.user_id).decrypt_strict(row.encrypted_password)
+                    except (InvalidToken, ValueError):
+                        logger.warning(f"Health backfill: password {row.id} is not readable")
+                        continue
+                    breached = breach_corpus.is_breached(plaintext)
+                    compliance = policy.columns(plaintext, row.changed_at)
+                    changes.append({
+                        "row_id": row.id,
+                        "old_password": row.encrypted_password,
+                        "new_fingerprint": password_fingerprint(row.user_id, plaintext),
+                        "new_strength": password_strength(plaintext),
+                        "new_breached": breached,
+                        "checked_at": datetime.utcnow() if breached is not None else None,
+                        "new_compliant": compliance["policy_compliant"],
+                        "new_violations": compliance["policy_violations"],
+                        "new_policy_version": compliance["policy_version"],
+                        "new_expires_at": compliance["password_expires_at"],
+                        "changed_at": row.changed_at,
+                    })
+
+                if changes:
+                    result = db.connection().execute(statement, changes)
+                    db.commit()
+                    updated += result.rowcount if result.rowcount >= 0 else len(changes)
+                    time.sleep(HEALTH_BACKFILL_PAUSE)
+
+        if updated:
+            logger.info(f"Health backfill analyzed {updated} vault entries")
+        return updated
+
+
+health_backfill = HealthBackfill()
+
+
+def schedule_health_backfill() -> None:
+    """Runs the audit now and then periodically, catching policy changes made by other workers."""
+    scheduler.add_job(
+        health_backfill.run,
+        "interval",
+        hours=HEALTH_AUDIT_INTERVAL_HOURS,
+        next_run_time=datetime.now(),
+        id="health_backfill",
+        replace_existing=True,
+    )
@@ -0,0 +1,214 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from cryptography.fernet import InvalidToken
+from sqlalchemy import and_, bindparam, func, or_, update
+from sqlalchemy.orm import Session
+
+from backend.database.database import SessionLocal
+from backend.database.models import DataKey, KeyRotationJob, Password, SharedPassword, User
+from backend.scheduler import scheduler
+from backend.security.envelope import OWNER_TEAM, OWNER_USER, EnvelopeCipher, data_keys, is_current_format
+from backend.security.utils import KEY_IDS, encrypt_password, is_encrypted, needs_reencryption, reencrypt_password
+
+logger = logging.getLogger(__name__)
+
+# (name, model, encrypted columns, owner type, owner column) in processing
+# order. Data keys and 2FA secrets are encrypted under the master keyring;
+# vault entries are encrypted under their owner's data key, so rewrapping the
+# data keys covers them and they are only migrated to the binary format.
+ROTATION_TARGETS = [
+    ("data_keys", DataKey, ("wrapped_key",), None, None),
+    ("passwords", Password, ("encrypted_password", "totp_secret"), OWNER_USER, "user_id"),
+    ("shared_passwords", SharedPassword, ("encrypted_password",), OWNER_TEAM, "team_id"),
+    ("users", User, ("otp_secret",), None, None),
+]
+PLAINTEXT_COLUMNS = {("users", "otp_secret")}
+
+
+def _rotate_value(target: str, column: str, value, cipher: Optional[EnvelopeCipher] = None):
+    """Returns the new stored value, or None if the value is already current."""
+    if not value:
+        return None
+    if cipher is not None:
+        return None if is_current_format(value) else cipher.reencrypt(value)
+    if (target, column) in PLAINTEXT_COLUMNS and not is_encrypted(value):
+        # Legacy rows stored the 2FA secret in plain text.
+        return encrypt_password(value)
+    if not needs_reencryption(value):
+        return None
+    return reencrypt_password(value)
+
+
+class KeyRotationRunner:
+    """Re-encrypts all stored secrets under the primary key in keyset-ordered batches.
+
+    Vault entries still stored in an older text format are moved to the binary
+    format under their owner's data key on the way.
+
+    The job state lives in key_rotation_jobs, so an interrupted job resumes from
+    its last processed id after a restart. Each batch is a short transaction and
+    updates only rows whose ciphertext did not change in the meantime, so live
+    writes are never overwritten. A pause between batches keeps the load low.
+    """
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def active_job(self, db: Session) -> Optional[KeyRotationJob]:
+        return db.query(KeyRotationJob).filter(KeyRotationJob.status == "running").first()
+
+    def latest_job(self, db: Session) -> Optional[KeyRotationJob]:
+        return db.query(KeyRotationJob).order_by(KeyRotationJob.id.desc()).first()
+
+    def start(self, db: Session, batch_size: int, throttle_ms: int, started_by: Optional[int]) -> KeyRotationJob:
+        total = sum(
+            db.query(func.count(model.id)).filter(or_(*[getattr(model, column).isnot(None) for column in columns])).scalar()
+            for _, model, columns, _, _ in ROTATION_TARGETS
+        )
+        job = KeyRotationJob(
+            status="running",
+            target_key_id=KEY_IDS[0],
+            current_target=ROTATION_TARGETS[0][0],
+            last_id=0,
+            total=total,
+            batch_size=batch_size,
+            throttle_ms=throttle_ms,
+            started_by=started_by,
+        )
+        db.add(job)
+        db.commit()
+        self.schedule(job.id)
+        return job
+
+    def schedule(self, job_id: int) -> None:
+        self._stop.clear()
+        scheduler.add_job(self.run, args=[job_id], id="key_rotation", replace_existing=True)
+
+    def resume_interrupted(self) -> None:
+        with SessionLocal() as db:
+            job = self.active_job(db)
+            if job is not None:
+                logger.info(f"Resuming key rotation job {job.id} at {job.current_target} > {job.last_id}")
+                self.schedule(job.id)
+
+    def pause(self, db: Session) -> Optional[KeyRotationJob]:
+        job = self.active_job(db)
+        if job is not None:
+            self._stop.set()
+            job.status = "paused"
+            db.commit()
+        return job
+
+    def _batch(self, db: Session, model, columns: Tuple[str, ...], owner_column: Optional[str],
+               last_id: int, limit: int) -> List:
+        selected = [getattr(model, column) for column in columns]
+        if owner_column:
+            selected.append(getattr(model, owner_column))
+        return db.query(model.id, *selected).filter(
+            model.id > last_id,
+            or_(*[getattr(model, column).isnot(None) for column in columns])
+        ).order_by(model.id).limit(limit).all()
+
+    def _write(self, db: Session, target: str, model, columns: Tuple[str, ...], owner_type: Optional[str],
+               rows: List) -> Tuple[int, int]:
+        rotated = failed = 0
+        for index, column in enumerate(columns, start=1):
+            changes = []
+            for row in rows:
+                cipher = None
+                if owner_type:
+                    if row[-1] is None:
+                        continue
+                    cipher = data_keys.cipher(db, owner_type, row[-1])
+                try:
+                    new_value = _rotate_value(target, column, row[index], cipher)
+                except InvalidToken:
+                    failed += 1
+                    logger.warning(f"Key rotation: {target}.{column} of id {row[0]} is not readable with any key")
+                    continue
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Key rotation: {target}.{column} of id {row[0]} could not be encrypted: {e}")
+                    continue
+                if new_value is not None:
+                    changes.append({"row_id": row[0], "old_value": row[index], "new_value": new_value})
+
+            if changes:
+                table = model.__table__
+                values = {column: bindparam("new_value")}
+                if "updated_at" in table.c:
+                    # Re-encryption is not an edit; keep onupdate from touching the timestamp.
+                    values["updated_at"] = table.c.updated_at
+                if model is DataKey:
+                    values.update(master_key_id=KEY_IDS[0], rotated_at=datetime.utcnow())
+                result = db.connection().execute(
+                    update(table)
+                    .where(and_(table.c.id == bindparam("row_id"), table.c[column] == bindparam("old_value")))
+                    .values(values),
+                    changes,
+                )
+                rotated += result.rowcount if result.rowcount >= 0 else len(changes)
+        return rotated, failed
+
+    def run(self, job_id: int) -> None:
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            with SessionLocal() as db:
+                job = db.get(KeyRotationJob, job_id)
+                if job is None or job.status != "running":
+                    return
+                try:
+                    self._run(db, job)
+                except Exception as e:
+                    db.rollback()
+                    job.status = "failed"
+                    job.error = str(e)
+                    db.commit()
+                    logger.exception(f"Key rotation job {job.id} failed")
+        finally:
+            self._lock.release()
+
+    def _run(self, db: Session, job: KeyRotationJob) -> None:
+        names = [name for name, _, _, _, _ in ROTATION_TARGETS]
+        start_index = names.index(job.current_target) if job.current_target in names else 0
+
+        for name, model, columns, owner_type, owner_column in ROTATION_TARGETS[start_index:]:
+            if job.current_target != name:
+                job.current_target = name
+                job.last_id = 0
+                db.commit()
+
+            while True:
+                if self._stop.is_set():
+                    return
+                db.refresh(job)
+                if job.status != "running":
+                    return
+
+                rows = self._batch(db, model, columns, owner_column, job.last_id, job.batch_size)
+                if not rows:
+                    break
+
+                rotated, failed = self._write(db, name, model, columns, owner_type, rows)
+                job.last_id = rows[-1][0]
+                job.processed += len(rows)
+                job.rotated += rotated
+                job.failed += failed
+                db.commit()
+
+                if job.throttle_ms:
+                    time.sleep(job.throttle_ms / 1000)
+
+        job.status = "completed"
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        logger.info(f"Key rotation job {job.id} completed: {job.rotated} values re-encrypted, {job.failed} failed")
+
+
+key_rotation = KeyRotationRunner()
@@ -2,7 +2,17 @@ import pyotp
 import qrcode
 import base64
 import io
-from typing import Dict, Optional
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from cryptography.fernet import InvalidToken
+
+from backend.monitoring.tracing import traced
+from backend.security.utils import encrypt_password, fernet, is_encrypted
+
+TOTP_SECRET_CACHE_TTL = 300
+TOTP_SECRET_CACHE_SIZE = 10000
 
 
 def generate_totp_secret() -> str:
@@ -14,6 +24,7 @@ def generate_totp_uri(secret: str, account_name: str, issuer_name: str = "Authro
     return totp.provisioning_uri(account_name, issuer_name=issuer_name)
 
 
+@traced("otp.qr_code")
 def get_qr_code_image(uri: str) -> str:
     qr = qrcode.QRCode(
         version=1,
@@ -39,6 +50,20 @@ def verify_totp(secret: str, token: str) -> bool:
     return totp.verify(token)
 
 
+def encrypt_otp_secret(secret: str) -> str:
+    return encrypt_password(secret)
+
+
+def decrypt_otp_secret(stored: Optional[str]) -> Optional[str]:
+    """User.otp_secret is encrypted at rest; rows from older versions still hold the plain base32 secret."""
+    if not stored or not is_encrypted(stored):
+        return stored
+    try:
+        return fernet.decrypt(stored.encode()).decode()
+    except InvalidToken:
+        return None
+
+
 def setup_2fa(user_email: str) -> Dict[str, str]:
     """Richtet 2FA für einen Benutzer ein."""
     secret = generate_totp_secret()
@@ -50,3 +75,69 @@ def setup_2fa(user_email: str) -> Dict[str, str]:
         "uri": uri,
         "qr_code": qr_code
     }
+
+
+class TOTPCodeCache:
+    """Caches decrypted TOTP generators per entry and memoizes codes per time step.
+
+    Entries are keyed by password id and validated against the stored ciphertext,
+    so re-configuring or disabling TOTP on an entry never serves a stale secret.
+    `decrypt` must raise for unreadable secrets (e.g. EnvelopeCipher.decrypt_strict);
+    unreadable or invalid secrets raise ValueError and are never cached.
+    """
+
+    def __init__(self, ttl: int = TOTP_SECRET_CACHE_TTL, max_entries: int = TOTP_SECRET_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[int, list] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, entry_id: int, encrypted_secret: str, decrypt, now: float) -> list:
+        with self._lock:
+            entry = self._entries.get(entry_id)
+            if entry and entry[0] == encrypted_secret and entry[1] > now:
+                return entry
+
+        try:
+            secret = decrypt(encrypted_secret)
+        except InvalidToken:
+            raise ValueError("TOTP-Secret konnte nicht entschlüsselt werden")
+        if not secret:
+            raise ValueError("TOTP-Secret konnte nicht entschlüsselt werden")
+        totp = pyotp.TOTP(secret.replace(" ", "").upper())
+        # Invalid base32 would only fail when the first code is generated.
+        totp.byte_secret()
+
+        entry = [encrypted_secret, now + self.ttl, totp, None, None]
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._purge(now)
+            self._entries[entry_id] = entry
+        return entry
+
+    def _purge(self, now: float) -> None:
+        expired = [key for key, entry in self._entries.items() if entry[1] <= now]
+        for key in expired:
+            del self._entries[key]
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+
+    def code(self, entry_id: int, encrypted_secret: str, decrypt, now: Optional[float] = None) -> Tuple[str, int, int]:
+        """Returns (code, remaining_seconds, interval) for the current time step."""
+        now = time.time() if now is None else now
+        entry = self._load(entry_id, encrypted_secret, decrypt, now)
+        totp = entry[2]
+
+        step = int(now // totp.interval)
+        if entry[3] != step:
+            entry[4] = totp.at(now)
+            entry[3] = step
+
+        return entry[4], int(totp.interval - (now % totp.interval)), totp.interval
+
+    def invalidate(self, entry_id: int) -> None:
+        with self._lock:
+            self._entries.pop(entry_id, None)
+
+
+totp_code_cache = TOTPCodeCache()
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from backend.database.database import SessionLocal
+from backend.database.models import PasswordPolicy
+
+POLICY_CACHE_TTL = float(os.environ.get("POLICY_CACHE_TTL", "60"))
+
+LOWERCASE = 1
+UPPERCASE = 2
+DIGIT = 4
+SPECIAL = 8
+
+# Violation codes, in the order they are reported.
+CLASS_RULES = (
+    ("lowercase", LOWERCASE),
+    ("uppercase", UPPERCASE),
+    ("numbers", DIGIT),
+    ("special", SPECIAL),
+)
+CLASS_NAMES = {
+    "lowercase": "one lowercase letter",
+    "uppercase": "one uppercase letter",
+    "numbers": "one digit",
+    "special": "one special character",
+}
+
+
+def character_classes(password: str) -> int:
+    """Bit mask of the character classes in a password, stopping once all are found."""
+    mask = 0
+    for c in password:
+        if c.islower():
+            mask |= LOWERCASE
+        elif c.isupper():
+            mask |= UPPERCASE
+        elif c.isdigit():
+            mask |= DIGIT
+        elif not c.isalnum():
+            mask |= SPECIAL
+        if mask == LOWERCASE | UPPERCASE | DIGIT | SPECIAL:
+            break
+    return mask
+
+
+class CompiledPolicy:
+    """All password policies merged into their strictest combination.
+
+    Policies are not assigned to users, so every policy applies to everyone:
+    the longest minimum length, every required character class and the
+    shortest maximum age win. Without any policy the previous built-in rules
+    apply (12 characters, all four classes, no maximum age).
+    """
+
+    __slots__ = ("min_length", "required", "max_age_days", "version")
+
+    def __init__(self, min_length: int, required: int, max_age_days: Optional[int]):
+        self.min_length = min_length
+        self.required = required
+        self.max_age_days = max_age_days
+        # Identifies the rules an entry was audited against.
+        self.version = hashlib.sha256(f"{min_length}:{required}:{max_age_days}".encode()).hexdigest()[:16]
+
+    @classmethod
+    def compile(cls, policies: List[PasswordPolicy]) -> "CompiledPolicy":
+        if not policies:
+            return cls(12, LOWERCASE | UPPERCASE | DIGIT | SPECIAL, None)
+        required = 0
+        for policy in policies:
+            required |= (
+                (LOWERCASE if policy.require_lowercase else 0)
+                | (UPPERCASE if policy.require_uppercase else 0)
+                | (DIGIT if policy.require_numbers else 0)
+                | (SPECIAL if policy.require_special else 0)
+            )
+        max_ages = [policy.max_age_days for policy in policies if policy.max_age_days and policy.max_age_days > 0]
+        return cls(
+            max(policy.min_length or 0 for policy in policies),
+            required,
+            min(max_ages) if max_ages else None,
+        )
+
+    def violations(self, password: str) -> List[str]:
+        """Codes of the violated rules; empty if the password complies."""
+        violations = []
+        if len(password or "") < self.min_length:
+            violations.append("min_length")
+        missing = self.required & ~character_classes(password or "")
+        violations.extend(code for code, bit in CLASS_RULES if missing & bit)
+        return violations
+
+    def message(self, violations: List[str], subject: str = "The new password") -> str:
+        if "min_length" in violations:
+            return f"{subject} must be at least {self.min_length} characters long"
+        required = [CLASS_NAMES[code] for code, bit in CLASS_RULES if self.required & bit]
+        if len(required) > 2:
+            required = [", ".join(required[:-1]) + ",", required[-1]]
+        return f"{subject} must contain at least " + " and ".join(required)
+
+    def expires_at(self, changed_at: Optional[datetime]) -> Optional[datetime]:
+        if not self.max_age_days or changed_at is None:
+            return None
+        return changed_at + timedelta(days=self.max_age_days)
+
+    def columns(self, password: str, changed_at: Optional[datetime]) -> dict:
+        """Compliance columns of a vault entry with this password."""
+        violations = self.violations(password)
+        return {
+            "policy_compliant": not violations,
+            "policy_violations": ",".join(violations) or None,
+            "policy_version": self.version,
+            "password_expires_at": self.expires_at(changed_at),
+        }
+
+
+class PolicyCache:
+    """Compiled policy shared by all requests of a process.
+
+    Policy changes through the API invalidate it immediately; the TTL bounds
+    how long other worker processes keep validating against old rules.
+    """
+
+    def __init__(self, ttl: float = POLICY_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._policy: Optional[CompiledPolicy] = None
+        self._expires = 0.0
+
+    def get(self, db: Optional[Session] = None) -> CompiledPolicy:
+        now = time.monotonic()
+        with self._lock:
+            if self._policy is not None and self._expires > now:
+                return self._policy
+
+        if db is None:
+            with SessionLocal() as session:
+                policy = CompiledPolicy.compile(session.query(PasswordPolicy).all())
+        else:
+            policy = CompiledPolicy.compile(db.query(PasswordPolicy).all())
+
+        with self._lock:
+            self._policy = policy
+            self._expires = now + self.ttl
+        return policy
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._policy = None
+
+
+password_policy = PolicyCache()
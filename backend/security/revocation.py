@@ -0,0 +1,128 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from backend.database.database import SessionLocal
+from backend.database.models import RevokedToken, User
+from backend.scheduler import scheduler
+
+REVOCATION_PURGE_INTERVAL_MINUTES = 15
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRevocation:
+    """In-memory view of revoked access tokens, checked before any database access.
+
+    Two mechanisms: a per-user token version embedded in every access token
+    ("ver"), bumped to invalidate all of a user's tokens at once, and a denylist
+    of single token ids ("jti") for logout. Only users whose version is not 0
+    are kept, and denylist entries are dropped once the token would have
+    expired anyway, so memory is bounded by recent revocations. Both live in the
+    database as well; the caches are loaded at startup and updated on writes.
+
+    With several worker processes each has its own caches. A cached version
+    only rejects tokens older than it; a newer token version is checked
+    against the database row and then cached (see sync_version). The jti
+    denylist of other workers is picked up by the periodic purge job, so a
+    logged-out token stays usable on other workers for at most
+    REVOCATION_PURGE_INTERVAL_MINUTES or until it expires.
+    """
+
+    def __init__(self):
+        self._versions: Dict[int, int] = {}
+        self._denied: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            versions = dict(db.query(User.id, User.token_version).filter(User.token_version > 0))
+            denied = {
+                jti: expires_at.replace(tzinfo=timezone.utc).timestamp()
+                for jti, expires_at in db.query(RevokedToken.jti, RevokedToken.expires_at)
+                .filter(RevokedToken.expires_at > now)
+            }
+        with self._lock:
+            self._versions = versions
+            self._denied = denied
+
+    def is_revoked(self, payload: dict) -> bool:
+        """Checks the claims of a decoded access token; two dict lookups.
+
+        Only tokens older than the cached version are rejected here. A newer
+        version may have been issued by another worker, so the caller compares
+        it with the database row.
+        """
+        jti = payload.get("jti")
+        if jti is not None and jti in self._denied:
+            return True
+        try:
+            user_id = int(payload.get("sub"))
+        except (TypeError, ValueError):
+            return True
+        return payload.get("ver", 0) < self._versions.get(user_id, 0)
+
+    def remember_version(self, user_id: int, version: int) -> None:
+        with self._lock:
+            if version:
+                self._versions[user_id] = version
+            else:
+                self._versions.pop(user_id, None)
+
+    def sync_version(self, user_id: int, version: int) -> None:
+        """Caches the version of a freshly loaded user row if it differs from the cache."""
+        if self._versions.get(user_id, 0) != version:
+            self.remember_version(user_id, version)
+
+    def revoke_user(self, db: Session, user: User) -> None:
+        """Invalidates every access token issued to the user so far."""
+        user.token_version = (user.token_version or 0) + 1
+        db.commit()
+        self.remember_version(user.id, user.token_version)
+
+    def revoke_token(self, db: Session, jti: Optional[str], exp: Optional[float]) -> None:
+        """Denies a single access token until its expiry."""
+        if not jti or not exp:
+            return
+        db.merge(RevokedToken(jti=jti, expires_at=datetime.utcfromtimestamp(exp)))
+        db.commit()
+        with self._lock:
+            self._denied[jti] = exp
+
+    def purge_expired(self) -> int:
+        """Drops expired denylist entries and picks up tokens revoked by other workers."""
+        now = time.time()
+        with self._lock:
+            expired = [jti for jti, exp in self._denied.items() if exp <= now]
+            for jti in expired:
+                del self._denied[jti]
+
+        with SessionLocal() as db:
+            db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+            db.commit()
+            denied = {
+                jti: expires_at.replace(tzinfo=timezone.utc).timestamp()
+                for jti, expires_at in db.query(RevokedToken.jti, RevokedToken.expires_at)
+            }
+        with self._lock:
+            self._denied.update(denied)
+        return len(expired)
+
+
+token_revocation = TokenRevocation()
+
+
+def schedule_revocation_purge() -> None:
+    scheduler.add_job(
+        token_revocation.purge_expired,
+        "interval",
+        minutes=REVOCATION_PURGE_INTERVAL_MINUTES,
+        id="revocation_purge",
+        replace_existing=True,
+    )
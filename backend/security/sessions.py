@@ -0,0 +1,214 @@
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from backend.database.database import SessionLocal
+from backend.database.models import UserSession
+from backend.scheduler import scheduler
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+SESSION_CLEANUP_INTERVAL_MINUTES = int(os.environ.get("SESSION_CLEANUP_INTERVAL_MINUTES", "60"))
+SESSION_CLEANUP_BATCH = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def hash_refresh_secret(secret: str) -> str:
+    # Refresh secrets are 256 bit random values, so a fast hash is enough;
+    # Argon2 only matters for low-entropy user passwords.
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def _split_token(refresh_token: str) -> Optional[Tuple[int, str]]:
+    session_id, _, secret = refresh_token.partition(".")
+    if not session_id.isdigit() or not secret:
+        return None
+    return int(session_id), secret
+
+
+class _IndexEntry:
+    __slots__ = ("user_id", "token_hash", "previous_token_hash", "expires_at")
+
+    def __init__(self, user_id: int, token_hash: str, previous_token_hash: Optional[str], expires_at: datetime):
+        self.user_id = user_id
+        self.token_hash = token_hash
+        self.previous_token_hash = previous_token_hash
+        self.expires_at = expires_at
+
+
+class SessionStore:
+    """Server-side refresh sessions with an in-memory index by session id.
+
+    Refresh tokens have the form ``<session id>.<secret>``; only the SHA-256 of
+    the secret is stored. Each refresh rotates the secret and keeps the previous
+    hash, so a replayed old token is detected and revokes the whole session.
+    The database stays authoritative: the index is filled at startup and on
+    writes, and a miss or mismatch falls back to the table, so several worker
+    processes can share one database.
+    """
+
+    def __init__(self):
+        self._index: Dict[int, _IndexEntry] = {}
+        self._lock = threading.Lock()
+
+    def _remember(self, session: UserSession) -> None:
+        with self._lock:
+            self._index[session.id] = _IndexEntry(
+                session.user_id, session.token_hash, session.previous_token_hash, session.expires_at
+            )
+
+    def _forget(self, session_id: int) -> None:
+        with self._lock:
+            self._index.pop(session_id, None)
+
+    def load(self) -> int:
+        """Fills the index with all unexpired sessions."""
+        with SessionLocal() as db:
+            sessions = db.query(UserSession).filter(UserSession.expires_at > datetime.utcnow()).all()
+        with self._lock:
+            self._index = {
+                session.id: _IndexEntry(session.user_id, session.token_hash, session.previous_token_hash,
+                                        session.expires_at)
+                for session in sessions
+            }
+        return len(self._index)
+
+    def create(self, db: Session, user_id: int, ip_address: Optional[str] = None,
+               user_agent: Optional[str] = None) -> Tuple[UserSession, str]:
+        secret = secrets.token_urlsafe(32)
+        now = datetime.utcnow()
+        session = UserSession(
+            user_id=user_id,
+            token_hash=hash_refresh_secret(secret),
+            ip_address=ip_address,
+            user_agent=(user_agent or "")[:255] or None,
+            created_at=now,
+            last_used_at=now,
+            expires_at=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+        db.add(session)
+        db.commit()
+        self._remember(session)
+        return session, f"{session.id}.{secret}"
+
+    def _lookup(self, db: Session, session_id: int, refresh: bool = False) -> Optional[_IndexEntry]:
+        entry = None if refresh else self._index.get(session_id)
+        if entry is None:
+            session = db.get(UserSession, session_id, populate_existing=True)
+            if session is None:
+                self._forget(session_id)
+                return None
+            self._remember(session)
+            entry = self._index.get(session_id)
+        return entry
+
+    def rotate(self, db: Session, refresh_token: str) -> Optional[Tuple[int, int, str]]:
+        """Validates a refresh token and replaces its secret.
+
+        Returns (session id, user id, new refresh token), or None if the token is
+        unknown, expired or was already rotated (the session is revoked then).
+        """
+        parts = _split_token(refresh_token)
+        if parts is None:
+            return None
+        session_id, secret = parts
+        token_hash = hash_refresh_secret(secret)
+
+        entry = self._lookup(db, session_id)
+        if entry is not None and not hmac.compare_digest(entry.token_hash, token_hash):
+            # Another worker may have rotated the session; re-read before judging.
+            entry = self._lookup(db, session_id, refresh=True)
+        if entry is None or entry.expires_at <= datetime.utcnow():
+            return None
+
+        if not hmac.compare_digest(entry.token_hash, token_hash):
+            if entry.previous_token_hash and hmac.compare_digest(entry.previous_token_hash, token_hash):
+                logger.warning(f"Refresh token reuse detected, revoking session {session_id}")
+                self.revoke(db, session_id)
+            return None
+
+        new_secret = secrets.token_urlsafe(32)
+        new_hash = hash_refresh_secret(new_secret)
+        result = db.execute(
+            update(UserSession)
+            .where(UserSession.id == session_id, UserSession.token_hash == token_hash)
+            .values(token_hash=new_hash, previous_token_hash=token_hash, last_used_at=datetime.utcnow())
+        )
+        db.commit()
+        if result.rowcount != 1:
+            # Lost a race against a concurrent refresh with the same token.
+            self._forget(session_id)
+            return None
+
+        with self._lock:
+            entry.previous_token_hash = token_hash
+            entry.token_hash = new_hash
+        return session_id, entry.user_id, f"{session_id}.{new_secret}"
+
+    def revoke(self, db: Session, session_id: int, user_id: Optional[int] = None) -> bool:
+        query = delete(UserSession).where(UserSession.id == session_id)
+        if user_id is not None:
+            query = query.where(UserSession.user_id == user_id)
+        deleted = db.execute(query).rowcount
+        db.commit()
+        if deleted:
+            self._forget(session_id)
+        return bool(deleted)
+
+    def revoke_user(self, db: Session, user_id: int, except_session_id: Optional[int] = None) -> int:
+        query = delete(UserSession).where(UserSession.user_id == user_id)
+        if except_session_id is not None:
+            query = query.where(UserSession.id != except_session_id)
+        deleted = db.execute(query).rowcount
+        db.commit()
+        with self._lock:
+            for session_id in [sid for sid, entry in self._index.items()
+                               if entry.user_id == user_id and sid != except_session_id]:
+                del self._index[session_id]
+        return deleted
+
+    def cleanup_expired(self, batch_size: int = SESSION_CLEANUP_BATCH) -> int:
+        """Deletes expired sessions in batches so the table lock is held only briefly."""
+        now = datetime.utcnow()
+        total = 0
+        with SessionLocal() as db:
+            while True:
+                ids = [session_id for (session_id,) in db.query(UserSession.id)
+                       .filter(UserSession.expires_at <= now).limit(batch_size)]
+                if not ids:
+                    break
+                db.execute(delete(UserSession).where(UserSession.id.in_(ids)))
+                db.commit()
+                total += len(ids)
+
+        with self._lock:
+            for session_id in [sid for sid, entry in self._index.items() if entry.expires_at <= now]:
+                del self._index[session_id]
+
+        if total:
+            logger.info(f"Removed {total} expired sessions")
+        return total
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+session_store = SessionStore()
+
+
+def schedule_session_cleanup() -> None:
+    scheduler.add_job(
+        session_store.cleanup_expired,
+        "interval",
+        minutes=SESSION_CLEANUP_INTERVAL_MINUTES,
+        id="session_cleanup",
+        replace_existing=True,
+    )
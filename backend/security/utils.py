@@ -1,43 +1,119 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+import logging
 import os
 import base64
-from cryptography.fernet import Fernet, InvalidToken
-
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+import binascii
+import hashlib
+import secrets
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from backend.monitoring.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# Defaults match passlib's; run `python -m backend.benchmarks.crypto calibrate` to
+# pick values for the current machine. Existing hashes are upgraded on login.
+ARGON2_TIME_COST = int(os.environ.get("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.environ.get("ARGON2_MEMORY_COST", "65536"))
+ARGON2_PARALLELISM = int(os.environ.get("ARGON2_PARALLELISM", "4"))
+
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
 
 SECRET_KEY = os.environ.get("SECRET_KEY", "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
 ENCRYPTION_KEY = os.environ.get("ENCRYPTION_KEY", "APM1JDVgT8WDGOiCsYoGRpJ-BVxegMO0Mj6wZwxlG7g=")
+# Keyring for rotation: comma-separated, newest first. The first key encrypts,
+# all keys decrypt. Without ENCRYPTION_KEYS the single ENCRYPTION_KEY is used.
+ENCRYPTION_KEYS = [key.strip() for key in os.environ.get("ENCRYPTION_KEYS", ENCRYPTION_KEY).split(",") if key.strip()]
+
+FERNET_TOKEN_PREFIX = "gAAAAA"
+
 
 def get_fernet_key(key_str):
+    """Validates a urlsafe base64 encoded 32 byte key.
+
+    Raises ValueError instead of falling back to a random key, which would make
+    everything encrypted with it unreadable after a restart.
+    """
     try:
-        if isinstance(key_str, str):
-            decoded = base64.urlsafe_b64decode(key_str)
-            if len(decoded) != 32:
-                return Fernet.generate_key()
-            return base64.urlsafe_b64encode(decoded)
-        else:
-            return Fernet.generate_key()
-    except Exception as e:
-        print(f"Fehler bei der Schlüsselverarbeitung: {str(e)}")
-        return Fernet.generate_key()
+        decoded = base64.urlsafe_b64decode(key_str)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise ValueError("Ungültiger Verschlüsselungsschlüssel: kein gültiges URL-sicheres Base64") from e
+    if len(decoded) != 32:
+        raise ValueError(f"Ungültiger Verschlüsselungsschlüssel: 32 Bytes erwartet, {len(decoded)} erhalten")
+    return base64.urlsafe_b64encode(decoded)
+
+
+def get_key_id(key: bytes) -> str:
+    """Short, non-secret identifier of a key for status output."""
+    return hashlib.sha256(key).hexdigest()[:8]
+
+
+if not ENCRYPTION_KEYS:
+    raise ValueError("Kein Verschlüsselungsschlüssel konfiguriert")
+
+fernet_keys = [get_fernet_key(key) for key in ENCRYPTION_KEYS]
+fernet_key = fernet_keys[0]
+KEY_IDS = [get_key_id(key) for key in fernet_keys]
+primary_fernet = Fernet(fernet_key)
+fernet = MultiFernet([Fernet(key) for key in fernet_keys])
+
+
+def derive_key(info: bytes) -> bytes:
+    """32 byte secret for one purpose, derived from the current master key with HKDF.
+
+    Each purpose uses its own info label, so the derived secrets are
+    independent of each other and reveal nothing about the master key. The
+    secret changes when a new master key is put first in the keyring.
+    """
+    hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=info)
+    return hkdf.derive(base64.urlsafe_b64decode(fernet_key))
+
+
+def is_encrypted(value) -> bool:
+    return isinstance(value, str) and value.startswith(FERNET_TOKEN_PREFIX)
 
-fernet_key = get_fernet_key(ENCRYPTION_KEY)
-fernet = Fernet(fernet_key)
 
+def needs_reencryption(encrypted_password) -> bool:
+    """True if the value is not readable with the primary key alone."""
+    if not encrypted_password:
+        return False
+    try:
+        primary_fernet.decrypt(encrypted_password.encode())
+        return False
+    except InvalidToken:
+        return True
+
+@traced("crypto.verify_password")
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+@traced("crypto.verify_password")
+def verify_and_update_password(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """Verifies a password and returns a new hash if the stored one uses outdated parameters."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+@traced("crypto.hash_password")
 def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+@traced("crypto.create_access_token")
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -45,29 +121,32 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", secrets.token_hex(16))
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+@traced("crypto.encrypt")
 def encrypt_password(password):
-    """Encrypt a password using Fernet symmetric encryption."""
+    """Encrypt a password using Fernet symmetric encryption.
+
+    Errors are raised: storing a value that no key can decrypt (or an empty
+    one) would lose the secret silently.
+    """
     if not password:
         return ""
 
-    try:
-        if not isinstance(password, str):
-            password = str(password)
+    if not isinstance(password, str):
+        password = str(password)
 
+    try:
         return fernet.encrypt(password.encode()).decode()
     except Exception as e:
-        print(f"Verschlüsselungsfehler: {str(e)}")
-        try:
-            default_key = Fernet(Fernet.generate_key())
-            return default_key.encrypt(password.encode()).decode()
-        except Exception:
-            return ""
+        logger.error(f"Verschlüsselungsfehler: {e}")
+        raise
 
 
+@traced("crypto.decrypt")
 def decrypt_password(encrypted_password):
     """Decrypt a password using Fernet symmetric encryption."""
     if not encrypted_password:
@@ -79,3 +158,16 @@ def decrypt_password(encrypted_password):
         return "[Passwort kann nicht entschlüsselt werden: Schlüssel ungültig]"
     except Exception as e:
         return "[Passwort kann nicht entschlüsselt werden]"
+
+
+@traced("crypto.reencrypt")
+def reencrypt_password(encrypted_password):
+    """Re-encrypt a stored value under the primary key.
+
+    Unlike decrypt_password this raises InvalidToken instead of returning a
+    placeholder, so callers never overwrite a secret with an error message.
+    """
+    if not encrypted_password:
+        return encrypted_password
+
+    return fernet.rotate(encrypted_password.encode()).decode()
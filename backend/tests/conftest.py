@@ -0,0 +1,35 @@
+import os
+import sys
+
+# Must be set before the backend is imported: the engine and the hashing
+# parameters are configured at import time.
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.setdefault("ARGON2_TIME_COST", "1")
+os.environ.setdefault("ARGON2_MEMORY_COST", "8192")
+os.environ.setdefault("ARGON2_PARALLELISM", "1")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.create_tables import init_db
+from backend.main import app
+
+ADMIN_EMAIL = "admin@example.com"
+ADMIN_PASSWORD = "Admin@1234"
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Not entered as a context manager: the lifespan would start the
+    # background jobs, whose queries would count against the budgets.
+    init_db()
+    return TestClient(app)
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    response = client.post("/api/v1/auth/token", data={"username": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
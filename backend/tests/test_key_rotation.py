@@ -0,0 +1,51 @@
+"""Encryption errors are raised instead of producing unreadable ciphertext."""
+import pytest
+
+from backend.database.database import SessionLocal
+from backend.database.models import User
+from backend.security import utils
+from backend.security.key_rotation import KeyRotationRunner
+from backend.security.utils import encrypt_password
+
+OTP_SECRET = "JBSWY3DPEHPK3PXP"
+
+
+class BrokenFernet:
+    def encrypt(self, data: bytes) -> bytes:
+        raise ValueError("key unavailable")
+
+
+@pytest.fixture
+def broken_keyring(monkeypatch):
+    monkeypatch.setattr(utils, "fernet", BrokenFernet())
+
+
+@pytest.fixture
+def plaintext_otp_user(client):
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.email == "admin@example.com").one()
+        previous = user.otp_secret
+        user.otp_secret = OTP_SECRET
+        db.commit()
+        user_id = user.id
+    yield user_id
+    with SessionLocal() as db:
+        db.get(User, user_id).otp_secret = previous
+        db.commit()
+
+
+def test_encrypt_password_raises_instead_of_using_a_random_key(broken_keyring):
+    with pytest.raises(ValueError):
+        encrypt_password("secret")
+
+
+def test_rotation_counts_values_it_cannot_encrypt_as_failed(plaintext_otp_user, broken_keyring):
+    runner = KeyRotationRunner()
+    with SessionLocal() as db:
+        rows = runner._batch(db, User, ("otp_secret",), None, 0, 100)
+        rotated, failed = runner._write(db, "users", User, ("otp_secret",), None, rows)
+        db.commit()
+
+    assert (rotated, failed) == (0, 1)
+    with SessionLocal() as db:
+        assert db.get(User, plaintext_otp_user).otp_secret == OTP_SECRET
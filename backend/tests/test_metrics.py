@@ -0,0 +1,37 @@
+"""Access to /metrics and the cardinality of its request labels."""
+import pytest
+
+from backend import main
+
+TOKEN = "scrape-token"
+
+
+@pytest.fixture
+def metrics_token(monkeypatch):
+    monkeypatch.setattr(main, "METRICS_TOKEN", TOKEN)
+    return {"Authorization": f"Bearer {TOKEN}"}
+
+
+def test_metrics_are_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(main, "METRICS_TOKEN", None)
+    response = client.get("/metrics")
+    assert response.status_code == 403
+    assert "authron_users" not in response.text
+
+
+def test_metrics_require_the_token(client, metrics_token):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    response = client.get("/metrics", headers=metrics_token)
+    assert response.status_code == 200
+    assert "authron_http_requests_total" in response.text
+
+
+def test_unknown_methods_share_one_series(client, metrics_token):
+    for method in ("FOOBAR", "BAZQUX"):
+        client.request(method, "/health")
+
+    text = client.get("/metrics", headers=metrics_token).text
+    assert 'method="other"' in text
+    assert "FOOBAR" not in text and "BAZQUX" not in text
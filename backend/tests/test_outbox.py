@@ -0,0 +1,265 @@
+"""OutboxSender against the local SMTP sink: delivery, retries, claims and pooled connections."""
+import socket
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.benchmarks.smtp_sink import SmtpSink
+from backend.database.database import SessionLocal
+from backend.database.models import EmailOutbox
+from backend.mail import outbox
+from backend.mail.outbox import (
+    STATUS_FAILED,
+    STATUS_PENDING,
+    STATUS_SENDING,
+    STATUS_SENT,
+    OutboxSender,
+    SmtpPool,
+    enqueue_emails,
+    retry_delay,
+)
+
+
+def _point_at(monkeypatch, port: int) -> None:
+    monkeypatch.setenv("SMTP_SERVER", "127.0.0.1")
+    monkeypatch.setattr(outbox, "SMTP_SERVER", "127.0.0.1")
+    monkeypatch.setattr(outbox, "SMTP_PORT", port)
+    monkeypatch.setattr(outbox, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(outbox, "SMTP_USERNAME", None)
+    monkeypatch.setattr(outbox, "SMTP_PASSWORD", None)
+    monkeypatch.setattr(outbox, "SMTP_TIMEOUT", 5.0)
+
+
+@pytest.fixture
+def empty_outbox(client):
+    with SessionLocal() as db:
+        db.query(EmailOutbox).delete()
+        db.commit()
+    yield
+    with SessionLocal() as db:
+        db.query(EmailOutbox).delete()
+        db.commit()
+
+
+@pytest.fixture
+def sink(monkeypatch, empty_outbox):
+    sink = SmtpSink(port=0, reject_domain="rejected.example").start_in_thread()
+    _point_at(monkeypatch, sink.port)
+    yield sink
+    sink.stop()
+
+
+@pytest.fixture
+def sender():
+    sender = OutboxSender(SmtpPool(size=1))
+    yield sender
+    sender.close()
+
+
+def _enqueue(*recipients: str) -> None:
+    with SessionLocal() as db:
+        enqueue_emails(db, [(recipient, "Geteiltes Passwort", "Hallo") for recipient in recipients])
+        db.commit()
+
+
+def _messages() -> dict:
+    with SessionLocal() as db:
+        return {message.recipient: message for message in db.query(EmailOutbox).all()}
+
+
+def _make_due() -> None:
+    with SessionLocal() as db:
+        db.query(EmailOutbox).update({EmailOutbox.next_attempt_at: datetime.utcnow() - timedelta(seconds=1)})
+        db.commit()
+
+
+def test_delivers_pending_messages(sink, sender):
+    _enqueue("a@example.com", "b@example.com", "c@example.com")
+
+    assert sender.run() == 3
+
+    assert sorted(recipient for message in sink.messages for recipient in message["to"]) == [
+        "a@example.com", "b@example.com", "c@example.com"
+    ]
+    for message in _messages().values():
+        assert message.status == STATUS_SENT
+        assert message.attempts == 1
+        assert message.sent_at is not None
+        assert message.claim_token is None
+    assert sender.run() == 0
+
+
+def test_temporary_failure_is_retried_with_backoff(sink, sender):
+    sink.fail_rate = 1.0
+    _enqueue("a@example.com")
+    before = datetime.utcnow()
+
+    assert sender.run() == 0
+
+    message = _messages()["a@example.com"]
+    assert message.status == STATUS_PENDING
+    assert message.attempts == 1
+    assert message.last_error.startswith("SMTPDataError")
+    delay = (message.next_attempt_at - before).total_seconds()
+    assert outbox.OUTBOX_RETRY_BASE * 0.8 - 1 <= delay <= outbox.OUTBOX_RETRY_BASE * 1.2 + 1
+    # Not due yet.
+    assert sender.run() == 0
+
+    sink.fail_rate = 0.0
+    _make_due()
+    assert sender.run() == 1
+    message = _messages()["a@example.com"]
+    assert message.status == STATUS_SENT
+    assert message.attempts == 2
+
+
+def test_backoff_grows_exponentially_up_to_the_maximum():
+    base = outbox.OUTBOX_RETRY_BASE
+    for attempts in (1, 2, 3, 4):
+        expected = min(base * 2 ** (attempts - 1), outbox.OUTBOX_RETRY_MAX)
+        assert expected * 0.8 <= retry_delay(attempts) <= expected * 1.2
+    assert retry_delay(100) <= outbox.OUTBOX_RETRY_MAX * 1.2
+
+
+def test_dropped_connection_is_retried(monkeypatch, empty_outbox, sender):
+    # A server that accepts connections and closes them before the greeting.
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+
+    def drop() -> None:
+        while True:
+            try:
+                connection, _ = listener.accept()
+            except OSError:
+                return
+            connection.close()
+
+    threading.Thread(target=drop, daemon=True).start()
+    _point_at(monkeypatch, listener.getsockname()[1])
+    _enqueue("a@example.com", "b@example.com")
+    try:
+        assert sender.run() == 0
+    finally:
+        listener.close()
+
+    for message in _messages().values():
+        assert message.status == STATUS_PENDING
+        assert message.attempts == 1
+        assert message.last_error.startswith("SMTPServerDisconnected")
+        assert message.next_attempt_at > datetime.utcnow()
+
+
+def test_permanent_failure_is_not_retried(sink, sender):
+    _enqueue("a@rejected.example", "b@example.com")
+
+    assert sender.run() == 1
+
+    messages = _messages()
+    assert messages["a@rejected.example"].status == STATUS_FAILED
+    assert messages["a@rejected.example"].attempts == 1
+    assert messages["a@rejected.example"].last_error.startswith("SMTPRecipientsRefused")
+    assert messages["b@example.com"].status == STATUS_SENT
+    assert sink.rejected == 1
+
+    _make_due()
+    assert sender.run() == 0
+    assert _messages()["a@rejected.example"].status == STATUS_FAILED
+
+
+def test_claimed_messages_are_not_claimed_again(sink, sender):
+    _enqueue("a@example.com", "b@example.com")
+    other = OutboxSender(SmtpPool(size=1))
+    try:
+        with SessionLocal() as db:
+            claimed = sender._claim(db, 10)
+            assert len(claimed) == 2
+            token = claimed[0].claim_token
+            assert token and all(message.claim_token == token for message in claimed)
+            assert all(message.status == STATUS_SENDING for message in claimed)
+
+        # Another worker finds nothing to send while the lease runs.
+        with SessionLocal() as db:
+            assert other._claim(db, 10) == []
+        assert other.run() == 0
+        assert sink.accepted == 0
+
+        # Once the lease of a crashed sender expired, the messages are claimed with a new token.
+        _make_due()
+        with SessionLocal() as db:
+            reclaimed = other._claim(db, 10)
+            assert len(reclaimed) == 2
+            assert all(message.claim_token not in (None, token) for message in reclaimed)
+    finally:
+        other.close()
+
+
+def test_pool_reuses_the_connection(sink, sender):
+    for index in range(3):
+        _enqueue(f"user{index}@example.com", f"other{index}@example.com")
+        assert sender.run() == 2
+
+    assert sink.accepted == 6
+    assert sink.connections == 1
+    assert sender.pool.stats()["idle"] == 1
+
+    sender.close()
+    assert sender.pool.stats()["idle"] == 0
+    _enqueue("late@example.com")
+    assert sender.run() == 1
+    assert sink.connections == 2
+
+
+def test_lease_covers_a_slow_batch(monkeypatch):
+    monkeypatch.setattr(outbox, "SMTP_TIMEOUT", 30.0)
+    sender = OutboxSender(SmtpPool(size=2))
+    try:
+        # 25 messages per connection, each of whose commands may take the full timeout.
+        assert sender.claim_lease(50) >= timedelta(seconds=25 * outbox.SMTP_MESSAGE_OPERATIONS * 30)
+        assert sender.claim_lease(1) == outbox.OUTBOX_CLAIM_LEASE
+    finally:
+        sender.close()
+
+
+def test_claiming_counts_as_an_attempt(sink, sender):
+    _enqueue("a@example.com")
+    for attempt in range(1, outbox.OUTBOX_MAX_ATTEMPTS + 1):
+        # The sender dies after every claim; its lease expires.
+        with SessionLocal() as db:
+            assert len(sender._claim(db, 10)) == 1
+        assert _messages()["a@example.com"].attempts == attempt
+        _make_due()
+
+    with SessionLocal() as db:
+        assert sender._claim(db, 10) == []
+    message = _messages()["a@example.com"]
+    assert message.status == STATUS_FAILED
+    assert message.claim_token is None
+    assert sink.accepted == 0
+
+
+def test_results_after_an_expired_lease_are_not_written(monkeypatch, sink, sender):
+    _enqueue("a@example.com")
+    other = OutboxSender(SmtpPool(size=1))
+    send_chunk = sender._send_chunk
+    reclaimed = []
+
+    def slow_send_chunk(messages):
+        # The lease runs out while this sender is still busy, and another one takes over.
+        _make_due()
+        with SessionLocal() as db:
+            reclaimed.extend(message.claim_token for message in other._claim(db, 10))
+        return send_chunk(messages)
+
+    monkeypatch.setattr(sender, "_send_chunk", slow_send_chunk)
+    try:
+        assert sender.run() == 1
+    finally:
+        other.close()
+
+    message = _messages()["a@example.com"]
+    assert len(reclaimed) == 1
+    assert message.status == STATUS_SENDING
+    assert message.claim_token == reclaimed[0]
+    assert message.attempts == 2
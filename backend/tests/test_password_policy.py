@@ -0,0 +1,35 @@
+"""Accounts are created only with passwords that satisfy the password policy."""
+from backend.benchmarks.journeys import BENCH_PASSWORD
+
+
+def test_registration_accepts_benchmark_password(client):
+    response = client.post("/api/v1/auth/register", json={
+        "email": "bench@example.com",
+        "username": "bench",
+        "full_name": "Benchmark",
+        "password": BENCH_PASSWORD,
+    })
+    assert response.status_code == 201, response.text
+
+
+def test_registration_rejects_short_password(client):
+    response = client.post("/api/v1/auth/register", json={
+        "email": "short@example.com",
+        "username": "short",
+        "full_name": "Short",
+        "password": "Bench@12345",
+    })
+    assert response.status_code == 400
+    assert "12 characters" in response.json()["detail"]
+
+
+def test_admin_cannot_create_user_with_weak_password(client, auth_headers):
+    response = client.post("/api/v1/admin/users", headers=auth_headers, json={
+        "email": "weak@example.com",
+        "username": "weak",
+        "full_name": "Weak",
+        "password": "alllowercaseletters",
+        "is_admin": False,
+    })
+    assert response.status_code == 400
+    assert "must contain" in response.json()["detail"]
@@ -0,0 +1,75 @@
+"""Query budgets of the hot endpoints.
+
+The budgets are independent of the number of entries: the endpoints load
+and write all entries with a fixed number of statements (IN-lists and
+executemany), so an N+1 regression fails these tests. The data key and
+policy caches are warmed by the seeding, as they are in a running server.
+"""
+import pytest
+
+from backend.database.instrumentation import assert_max_queries
+
+ENTRIES = 30
+TOTP_SECRET = "JBSWY3DPEHPK3PXP"
+
+
+@pytest.fixture(scope="module")
+def password_ids(client, auth_headers):
+    ids = []
+    for index in range(ENTRIES):
+        response = client.post("/api/v1/passwords", json={
+            "title": f"Budget {index}",
+            "username": f"user{index}",
+            "website": f"https://site{index}.example.com/login",
+            "password": f"Budget!{index:04d}Secret",
+        }, headers=auth_headers)
+        assert response.status_code == 201, response.text
+        ids.append(response.json()["id"])
+        response = client.post(f"/api/v1/totp/{ids[-1]}/setup", json={"totp_secret": TOTP_SECRET}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+    return ids
+
+
+def test_list_passwords(client, auth_headers, password_ids):
+    # User, entries.
+    with assert_max_queries(2):
+        response = client.get("/api/v1/passwords", headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json()) >= ENTRIES
+
+
+def test_decrypt_batch(client, auth_headers, password_ids):
+    # User, entries, last_used update.
+    with assert_max_queries(3):
+        response = client.post("/api/v1/passwords/decrypt-batch", json={"ids": password_ids}, headers=auth_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["passwords"]) == ENTRIES
+    assert body["missing"] == []
+
+
+def test_totp_codes(client, auth_headers, password_ids):
+    # User, TOTP secrets.
+    with assert_max_queries(2):
+        response = client.get("/api/v1/totp/codes", headers=auth_headers)
+    assert response.status_code == 200
+    codes = response.json()["codes"]
+    assert len(codes) >= ENTRIES
+    assert all("code" in code for code in codes)
+
+
+def test_bulk_operations(client, auth_headers, password_ids):
+    # User, ownership check, one statement per favorite/move/update, one for
+    # the new passwords, reencrypt read and write, user reload for the log.
+    operations = [
+        {"action": "favorite", "ids": password_ids, "favorite": True},
+        {"action": "move", "ids": password_ids, "category": "Budget"},
+        {"action": "update", "ids": password_ids, "fields": {"notes": "bulk", "password": "Bulk!Update2024x"}},
+        {"action": "reencrypt", "ids": password_ids},
+    ]
+    with assert_max_queries(9):
+        response = client.post("/api/v1/passwords/bulk", json={"operations": operations}, headers=auth_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["failed"] == 0
+    assert body["succeeded"] == ENTRIES * len(operations)
@@ -0,0 +1,48 @@
+"""Removing a team member rewraps the team data key without touching the shared entries."""
+from backend.database.database import SessionLocal
+from backend.database.models import DataKey, SharedPassword
+from backend.security.envelope import OWNER_TEAM
+from backend.security.utils import KEY_IDS, fernet
+
+MEMBER_PASSWORD = "Member@12345678"
+
+
+def _team_key(team_id: int) -> DataKey:
+    with SessionLocal() as db:
+        return db.query(DataKey).filter(DataKey.owner_type == OWNER_TEAM, DataKey.owner_id == team_id).one()
+
+
+def test_removing_a_member_keeps_entries_readable(client, auth_headers):
+    response = client.post("/api/v1/auth/register", json={
+        "email": "member@example.com", "username": "member", "full_name": "Member", "password": MEMBER_PASSWORD,
+    })
+    assert response.status_code == 201, response.text
+    member_user_id = response.json()["id"]
+
+    team_id = client.post("/api/v1/teams", json={"name": "Rekey"}, headers=auth_headers).json()["id"]
+    member = client.post(f"/api/v1/teams/{team_id}/members", json={"user_id": member_user_id},
+                         headers=auth_headers)
+    assert member.status_code == 200, member.text
+    shared = client.post("/api/v1/shared/passwords", json={
+        "title": "Team secret", "username": "team", "password": "Team!Secret2024", "team_id": team_id,
+    }, headers=auth_headers)
+    assert shared.status_code == 201, shared.text
+    shared_id = shared.json()["id"]
+
+    before = _team_key(team_id)
+    with SessionLocal() as db:
+        ciphertext = db.get(SharedPassword, shared_id).encrypted_password
+
+    response = client.delete(f"/api/v1/teams/{team_id}/members/{member.json()['id']}", headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    after = _team_key(team_id)
+    assert after.rotated_at is not None
+    assert after.master_key_id == KEY_IDS[0]
+    assert fernet.decrypt(after.wrapped_key.encode()) == fernet.decrypt(before.wrapped_key.encode())
+    with SessionLocal() as db:
+        assert db.get(SharedPassword, shared_id).encrypted_password == ciphertext
+
+    response = client.get(f"/api/v1/shared/passwords/{shared_id}/decrypt", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["password"] == "Team!Secret2024"
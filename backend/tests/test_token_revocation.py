@@ -0,0 +1,40 @@
+"""Token versions seen by a worker whose cache is behind the database."""
+from backend.database.database import SessionLocal
+from backend.database.models import User
+from backend.security.revocation import token_revocation
+from backend.security.utils import create_access_token
+
+
+def _bump_version_elsewhere(user_id: int) -> int:
+    """Raises the version in the database only, as another worker process would."""
+    with SessionLocal() as db:
+        user = db.get(User, user_id)
+        user.token_version = (user.token_version or 0) + 1
+        db.commit()
+        return user.token_version
+
+
+def _user_id(client, headers) -> int:
+    return client.get("/api/v1/auth/me", headers=headers).json()["id"]
+
+
+def test_newer_version_from_other_worker_is_accepted(client, auth_headers):
+    user_id = _user_id(client, auth_headers)
+    cached = token_revocation._versions.get(user_id, 0)
+    version = _bump_version_elsewhere(user_id)
+    try:
+        token = create_access_token({"sub": str(user_id), "ver": version})
+        response = client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        assert token_revocation._versions.get(user_id, 0) == version > cached
+
+        # The old token is now rejected without a database lookup.
+        old = create_access_token({"sub": str(user_id), "ver": cached})
+        assert token_revocation.is_revoked({"sub": str(user_id), "ver": cached})
+        response = client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {old}"})
+        assert response.status_code == 401
+    finally:
+        with SessionLocal() as db:
+            db.get(User, user_id).token_version = cached
+            db.commit()
+        token_revocation.remember_version(user_id, cached)
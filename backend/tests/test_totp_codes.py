@@ -0,0 +1,64 @@
+"""TOTP codes of entries whose secret cannot be used."""
+import pytest
+
+from backend.database.database import SessionLocal
+from backend.database.models import Password
+from backend.security.envelope import data_keys
+from backend.security.otp import totp_code_cache
+
+ERROR = "TOTP-Secret konnte nicht entschlüsselt werden"
+
+
+@pytest.fixture
+def entry(client, auth_headers):
+    response = client.post("/api/v1/passwords", json={
+        "title": "TOTP broken", "username": "totp", "password": "Totp!Broken2024x",
+    }, headers=auth_headers)
+    assert response.status_code == 201, response.text
+    password_id = response.json()["id"]
+    response = client.post(f"/api/v1/totp/{password_id}/setup", json={"totp_secret": "JBSWY3DPEHPK3PXP"},
+                           headers=auth_headers)
+    assert response.status_code == 200, response.text
+    yield password_id
+    client.delete(f"/api/v1/passwords/{password_id}", headers=auth_headers)
+    totp_code_cache.invalidate(password_id)
+
+
+def _store_secret(password_id: int, value) -> None:
+    with SessionLocal() as db:
+        db.get(Password, password_id).totp_secret = value
+        db.commit()
+
+
+def _code_of(client, auth_headers, password_id: int) -> dict:
+    response = client.get("/api/v1/totp/codes", headers=auth_headers)
+    assert response.status_code == 200
+    return next(code for code in response.json()["codes"] if code["password_id"] == password_id)
+
+
+def test_valid_secret_returns_code(client, auth_headers, entry):
+    code = _code_of(client, auth_headers, entry)
+    assert code["error"] is None
+    assert len(code["code"]) == 6
+    assert code["interval"] == 30
+
+
+def test_unreadable_secret_is_reported_and_not_cached(client, auth_headers, entry):
+    # Current format with a tag that does not verify.
+    _store_secret(entry, b"\x01" + b"\x00" * 40)
+
+    code = _code_of(client, auth_headers, entry)
+    assert code["code"] is None
+    assert code["error"] == ERROR
+    assert entry not in totp_code_cache._entries
+
+
+def test_invalid_secret_does_not_leak_details(client, auth_headers, entry):
+    with SessionLocal() as db:
+        password = db.get(Password, entry)
+        password.totp_secret = data_keys.user(db, password.user_id).encrypt("not base32!")
+        db.commit()
+
+    code = _code_of(client, auth_headers, entry)
+    assert code["error"] == ERROR
+    assert entry not in totp_code_cache._entries
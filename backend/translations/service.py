@@ -1,7 +1,7 @@
 import os
 import sys
-from typing import Dict, Optional
-from backend.translations.xml_parser import XMLTranslationParser
+from typing import Dict, Mapping, Optional
+from backend.translations.xml_parser import XMLTranslationParser, LanguageBundle
 
 class TranslationService:
 
@@ -20,12 +20,21 @@ class TranslationService:
         return cls._parser
 
     @classmethod
-    def get_languages(cls) -> Dict[str, str]:
+    def get_languages(cls) -> Mapping[str, str]:
         """Return all available languages."""
         return cls._get_parser().get_available_languages()
 
     @classmethod
-    def get_translations(cls, language_code: str) -> Dict[str, str]:
+    def get_bundle(cls, language_code: str) -> LanguageBundle:
+        """Get the compiled bundle (with precompressed JSON) for a language."""
+        try:
+            return cls._get_parser().get_bundle(language_code)
+        except Exception as e:
+            print(f"Error getting translations for {language_code}: {e}")
+            return cls._get_parser().get_bundle("en")
+
+    @classmethod
+    def get_translations(cls, language_code: str) -> Mapping[str, str]:
         """Get all translations for a specific language."""
         try:
             return cls._get_parser().get_translations(language_code)
@@ -1,90 +1,187 @@
+import gzip
+import hashlib
+import json
+import logging
 import os
+import re
+import tempfile
+import threading
+import time
 import xml.etree.ElementTree as ET
-from typing import Dict, List, Optional, Set
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
 
-class XMLTranslationParser:
-    """Parses translations from XML file."""
+logger = logging.getLogger(__name__)
 
-    def __init__(self, xml_file: str):
-        """Initialize the parser with the XML file path."""
-        self.xml_file = xml_file
-        self.root = None
-        self.cached_languages = None
-        self.cached_translations = {}
-        self._load_xml()
+CACHE_FORMAT_VERSION = 1
+RELOAD_CHECK_INTERVAL = 2.0
+TRANSLATION_CACHE_DIR = os.environ.get(
+    "TRANSLATION_CACHE_DIR", os.path.join(tempfile.gettempdir(), "authron")
+)
 
-    def _load_xml(self) -> None:
-        """Load the XML file into memory."""
-        if not os.path.exists(self.xml_file):
-            raise FileNotFoundError(f"Translation file not found: {self.xml_file}")
+_PLACEHOLDER = re.compile(r"\{([^{}]+)\}")
+_LANGUAGE_NAMES = {"en": "English", "de": "Deutsch"}
 
-        try:
-            tree = ET.parse(self.xml_file)
-            self.root = tree.getroot()
-        except ET.ParseError as e:
-            raise ValueError(f"Error parsing XML file: {e}")
 
-    def get_available_languages(self) -> Dict[str, str]:
-        """Get all available languages from the XML file."""
-        if self.cached_languages is not None:
-            return self.cached_languages
+def compile_template(text: str) -> Tuple[str, ...]:
+    """Splits a text into alternating literal and placeholder parts."""
+    return tuple(_PLACEHOLDER.split(text))
 
-        if not self.root:
-            return {}
 
-        languages = {}
-        language_attrs = set()
+def render_template(parts: Tuple[str, ...], params: Dict) -> str:
+    """Fills a compiled template; unknown placeholders are kept as they are."""
+    rendered = [parts[0]]
+    for index in range(1, len(parts), 2):
+        name = parts[index]
+        rendered.append(str(params[name]) if name in params else f"{{{name}}}")
+        rendered.append(parts[index + 1])
+    return "".join(rendered)
 
-        for text_elem in self.root.findall("text"):
-            for attr in text_elem.attrib:
-                if attr.startswith("lang") and len(attr) > 4:
-                    language_attrs.add(attr)
 
-        for attr in language_attrs:
-            lang_code = attr[4:].lower()
-            if lang_code == "en":
-                lang_name = "English"
-            elif lang_code == "de":
-                lang_name = "Deutsch"
-            else:
-                lang_name = lang_code.upper()
+class LanguageBundle:
+    """Immutable translations of one language, including its serialized forms."""
 
-            languages[lang_code] = lang_name
+    def __init__(self, translations: Dict[str, str]):
+        self.translations: Mapping[str, str] = MappingProxyType(translations)
+        self.templates = {
+            key: compile_template(text) for key, text in translations.items() if "{" in text
+        }
+        self.body = json.dumps(translations, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
 
-        self.cached_languages = languages
-        return languages
+    def translate(self, key: str, params: Optional[Dict] = None) -> str:
+        text = self.translations.get(key)
+        if text is None:
+            return key
+        if params and key in self.templates:
+            return render_template(self.templates[key], params)
+        return text
 
-    def get_translations(self, language_code: str) -> Dict[str, str]:
-        """Get all translations for a specific language."""
-        if language_code in self.cached_translations:
-            return self.cached_translations[language_code]
 
-        if not self.root:
-            return {}
+class XMLTranslationParser:
+    """Compiles translations from the XML file into per-language bundles.
 
-        lang_attr = f"lang{language_code.capitalize()}"
+    All languages are extracted in a single pass. The compiled result is cached on
+    disk (keyed by the XML content hash) and reloaded when the file changes.
+    """
 
-        translations = {}
-        for text_elem in self.root.findall("text"):
-            name = text_elem.get("name")
-            translation = text_elem.get(lang_attr)
+    def __init__(self, xml_file: str):
+        """Initialize the parser with the XML file path."""
+        self.xml_file = xml_file
+        self._lock = threading.Lock()
+        self._stat_key = None
+        self._next_check = 0.0
+        self._languages: Mapping[str, str] = MappingProxyType({})
+        self._bundles: Dict[str, LanguageBundle] = {}
+        self._empty_bundle = LanguageBundle({})
+        self._load_xml()
 
-            if name and translation:
-                translations[name] = translation
+    def _cache_path(self, digest: str) -> str:
+        return os.path.join(TRANSLATION_CACHE_DIR, f"translations-{digest[:32]}.json")
 
-        self.cached_translations[language_code] = translations
-        return translations
+    def _load_xml(self) -> None:
+        """Load the compiled translations, from the disk cache if it is current."""
+        if not os.path.exists(self.xml_file):
+            raise FileNotFoundError(f"Translation file not found: {self.xml_file}")
 
-    def translate(self, key: str, language_code: str, params: Optional[Dict] = None) -> str:
-        translations = self.get_translations(language_code)
+        stat = os.stat(self.xml_file)
+        with open(self.xml_file, "rb") as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
 
-        if key not in translations:
-            return key
+        compiled = self._read_cache(digest, stat.st_mtime_ns)
+        if compiled is None:
+            compiled = self._compile(content)
+            self._write_cache(digest, stat.st_mtime_ns, compiled)
 
-        text = translations[key]
+        self._languages = MappingProxyType(compiled["languages"])
+        self._bundles = {
+            code: LanguageBundle(translations)
+            for code, translations in compiled["translations"].items()
+        }
+        self._stat_key = (stat.st_mtime_ns, stat.st_size)
 
-        if params:
-            for param_key, param_value in params.items():
-                text = text.replace(f"{{{param_key}}}", str(param_value))
+    def _compile(self, content: bytes) -> Dict:
+        try:
+            root = ET.fromstring(content)
+        except ET.ParseError as e:
+            raise ValueError(f"Error parsing XML file: {e}")
 
-        return text
+        translations: Dict[str, Dict[str, str]] = {}
+        for text_elem in root.iter("text"):
+            name = text_elem.get("name")
+            for attr, value in text_elem.attrib.items():
+                if not attr.startswith("lang") or len(attr) <= 4:
+                    continue
+                lang_code = attr[4:].lower()
+                language = translations.setdefault(lang_code, {})
+                if name and value:
+                    language[name] = value
+
+        languages = {
+            code: _LANGUAGE_NAMES.get(code, code.upper()) for code in translations
+        }
+        return {"languages": languages, "translations": translations}
+
+    def _read_cache(self, digest: str, mtime_ns: int) -> Optional[Dict]:
+        try:
+            with open(self._cache_path(digest), "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if (
+            cached.get("version") != CACHE_FORMAT_VERSION
+            or cached.get("sha256") != digest
+            or cached.get("mtime_ns") != mtime_ns
+        ):
+            return None
+        return cached
+
+    def _write_cache(self, digest: str, mtime_ns: int, compiled: Dict) -> None:
+        data = dict(compiled, version=CACHE_FORMAT_VERSION, sha256=digest, mtime_ns=mtime_ns)
+        path = self._cache_path(digest)
+        try:
+            os.makedirs(TRANSLATION_CACHE_DIR, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Translation cache could not be written: {e}")
+
+    def refresh_if_changed(self) -> None:
+        """Reload the translations when the XML file was modified."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + RELOAD_CHECK_INTERVAL
+            try:
+                stat = os.stat(self.xml_file)
+                if (stat.st_mtime_ns, stat.st_size) != self._stat_key:
+                    self._load_xml()
+                    logger.info("Translations reloaded")
+            except (OSError, ValueError) as e:
+                logger.error(f"Translations could not be reloaded: {e}")
+
+    def get_available_languages(self) -> Mapping[str, str]:
+        """Get all available languages from the XML file."""
+        self.refresh_if_changed()
+        return self._languages
+
+    def get_bundle(self, language_code: str) -> LanguageBundle:
+        """Get the compiled bundle for a language (empty if unknown)."""
+        self.refresh_if_changed()
+        return self._bundles.get(language_code.lower(), self._empty_bundle)
+
+    def get_translations(self, language_code: str) -> Mapping[str, str]:
+        """Get all translations for a specific language."""
+        return self.get_bundle(language_code).translations
+
+    def translate(self, key: str, language_code: str, params: Optional[Dict] = None) -> str:
+        return self.get_bundle(language_code).translate(key, params)